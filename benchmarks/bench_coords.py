@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Parse time of scenes whose polygon hotspots have many vertices.
+
+Measures ``scenegen.ir.parse`` alone (validation and rendering excluded), so
+the cost is dominated by resolving coordinates to pixels.
+
+    python benchmarks/bench_coords.py --vertices 3 64 1024 4096
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.ir import parse  # noqa: E402
+from synth import make_project  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vertices", type=int, nargs="+", default=[3, 64, 1024, 4096])
+    parser.add_argument("--scenes", type=int, default=50)
+    parser.add_argument("--hotspots", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'vertices':>8} {'points':>9} {'ms':>8} {'ns/point':>9}")
+    for vertices in args.vertices:
+        data = make_project(args.scenes, args.hotspots, vertices=vertices)
+        points = sum(
+            len(h["points"]) if h["shape"] == "polygon" else 2
+            for sc in data["scenes"] for h in sc["hotspots"]
+        )
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            parse(data)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{vertices:>8} {points:>9} {best * 1e3:>8.1f} {best * 1e9 / points:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Rendering cost of deep and wide ``group`` layer trees.
+
+Time per output byte should stay flat as depth grows; re-indenting child text
+at every nesting level makes it grow linearly with depth.
+
+    python benchmarks/bench_emitter.py --depths 1 8 32 128 --width 20
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.generator import generate_rpy  # noqa: E402
+from synth import make_layer_tree  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 8, 32, 128, 256])
+    parser.add_argument("--width", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'depth':>5} {'width':>5} {'KB':>8} {'ms':>8} {'ns/byte':>8}")
+    for depth in args.depths:
+        data = {
+            "project": {"reference_resolution": {"width": 1920, "height": 1080}, "coords_mode": "relative"},
+            "scenes": [make_layer_tree(depth, args.width)],
+        }
+        best = float("inf")
+        size = 0
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            files = generate_rpy(data)
+            best = min(best, time.perf_counter() - t0)
+            size = sum(len(c) for c in files.values())
+        print(f"{depth:>5} {args.width:>5} {size / 1024:>8.0f} {best * 1e3:>8.1f} {best * 1e9 / size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
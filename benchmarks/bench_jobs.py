@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for ``validate``/``generate_rpy`` with ``jobs``.
+
+    python benchmarks/bench_jobs.py --scenes 4000 --jobs 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.generator import generate_rpy  # noqa: E402
+from scenegen.validator import validate  # noqa: E402
+from synth import make_project  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args(argv)
+
+    data = make_project(args.scenes)
+    reference = None
+    base = None
+    print(f"{args.scenes} scenes, {os.cpu_count()} CPUs")
+    print(f"{'jobs':>4} {'validate s':>11} {'generate s':>11} {'speedup':>8}")
+    for jobs in sorted(set(args.jobs)):
+        t0 = time.perf_counter()
+        validate(data, jobs)
+        t1 = time.perf_counter()
+        files = generate_rpy(data, jobs=jobs)
+        t2 = time.perf_counter()
+        if reference is None:
+            reference = files
+        elif list(files.items()) != list(reference.items()):
+            raise SystemExit(f"jobs={jobs}: output differs from jobs=1")
+        total = t2 - t0
+        base = base or total
+        print(f"{jobs:>4} {t1 - t0:>11.3f} {t2 - t1:>11.3f} {base / total:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
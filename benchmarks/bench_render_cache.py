@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Render cache: generation time against the number of unique scene templates.
+
+Every scene has its own background, the shared layer tree of ``make_project``
+and the hotspots of one of ``--templates`` templates (``0`` = every scene
+unique). ``off`` renders with ``RenderCache(0)``; ``on`` uses the default
+cache, whose hit rate is printed.
+
+    python benchmarks/bench_render_cache.py --scenes 2000 --templates 0 10 100
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.generator import iter_rpy  # noqa: E402
+from scenegen.rendercache import RenderCache  # noqa: E402
+from scenegen.validator import validate  # noqa: E402
+from synth import make_project  # noqa: E402
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=2000)
+    parser.add_argument("--hotspots", type=int, default=12)
+    parser.add_argument("--templates", type=int, nargs="+", default=[0, 10, 100])
+    parser.add_argument("--hit-cell", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{args.scenes} scenes x {args.hotspots} hotspots, hit cell {args.hit_cell}")
+    print(f"{'templates':>9} {'off ms':>9} {'on ms':>9} {'speedup':>8}  hit rate")
+    for templates in args.templates:
+        project = validate(make_project(args.scenes, args.hotspots, depth=2, width=4, templates=templates))
+
+        def render(cache: RenderCache) -> None:
+            for _ in iter_rpy(project, hit_cell=args.hit_cell, render_cache=cache):
+                pass
+
+        off = _best(lambda: render(RenderCache(0)), args.repeat)
+        on = _best(lambda: render(RenderCache()), args.repeat)
+        cache = RenderCache()
+        render(cache)
+        print(f"{templates or 'unique':>9} {off * 1e3:>9.1f} {on * 1e3:>9.1f} {off / on:>7.1f}x  {cache.summary()}")
+
+
+if __name__ == "__main__":
+    main()
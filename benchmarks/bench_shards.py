@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Flat vs sharded dialogue output: first conversion and the run after one edit.
+
+Ren'Py re-parses and recompiles exactly the ``.rpy`` files whose text
+changed, so the bytes rewritten by a run are what the next game launch has
+to compile again. The flat script is rewritten whole on every edit; the
+sharded one rewrites the shard holding the edited line.
+
+    python benchmarks/bench_shards.py --lines 1000000 --shard-lines 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from make_renpy_script import convert_file, convert_file_sharded  # noqa: E402
+from synth import make_dialogue  # noqa: E402
+
+
+def _row(name: str, seconds: float, files: int, nbytes: int) -> None:
+    print(f"{name:<24} {seconds * 1e3:>9.1f} {files:>7} {nbytes / 1e6:>11.2f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--shard-lines", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    dialogue = make_dialogue(args.lines, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "script.json"
+        flat = Path(tmp) / "script.rpy"
+        out = Path(tmp) / "shards"
+        src.write_text(json.dumps(dialogue), encoding="utf8")
+
+        print(f"{args.lines} lines, {args.shard_lines} per shard")
+        print(f"{'':<24} {'ms':>9} {'written':>7} {'MB written':>11}")
+        t0 = time.perf_counter()
+        convert_file(src, flat)
+        _row("flat, first run", time.perf_counter() - t0, 1, flat.stat().st_size)
+        t0 = time.perf_counter()
+        report = convert_file_sharded(src, out, args.shard_lines)
+        _row("sharded, first run", time.perf_counter() - t0, len(report.written),
+             sum(p.stat().st_size for p in report.written))
+
+        dialogue["dialogues"][args.lines // 2]["text"] = "An edited line."
+        src.write_text(json.dumps(dialogue), encoding="utf8")
+        t0 = time.perf_counter()
+        convert_file(src, flat)
+        _row("flat, after an edit", time.perf_counter() - t0, 1, flat.stat().st_size)
+        t0 = time.perf_counter()
+        report = convert_file_sharded(src, out, args.shard_lines)
+        _row("sharded, after an edit", time.perf_counter() - t0, len(report.written),
+             sum(p.stat().st_size for p in report.written))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Multi-resolution output: one validation for every target vs a run per target.
+
+``separate`` validates and renders the project once per resolution (what
+editing ``reference_resolution`` and rerunning amounts to); ``targets``
+validates once with ``validate_targets`` and renders each resolution from
+its IR. Rendering is inherently per target, so the rows show what the
+shared validation saves.
+
+    python benchmarks/bench_targets.py --scenes 1000 --targets 1280x720 1920x1080 3840x2160
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.generator import iter_rpy  # noqa: E402
+from scenegen.ir import parse_resolution  # noqa: E402
+from scenegen.validator import validate, validate_targets  # noqa: E402
+from synth import make_project  # noqa: E402
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _render(project) -> None:
+    for _ in iter_rpy(project):
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=1000)
+    parser.add_argument("--hotspots", type=int, default=12)
+    parser.add_argument("--targets", type=parse_resolution, nargs="+",
+                        default=[(1280, 720), (1920, 1080), (3840, 2160)])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = make_project(args.scenes, args.hotspots, depth=2, width=4, variants=2)
+
+    def separate() -> None:
+        for w, h in args.targets:
+            rr = {"width": w, "height": h}
+            _render(validate(dict(data, project=dict(data["project"], reference_resolution=rr))))
+
+    def targets() -> None:
+        for project in validate_targets(data, args.targets):
+            _render(project)
+
+    rows = [
+        ("validate + render once", _best(lambda: _render(validate(data)), args.repeat)),
+        (f"separate x{len(args.targets)}", _best(separate, args.repeat)),
+        (f"validate_targets x{len(args.targets)}", _best(targets, args.repeat)),
+        ("validate_targets only", _best(lambda: validate_targets(data, args.targets), args.repeat)),
+        ("validate only", _best(lambda: validate(data), args.repeat)),
+    ]
+    print(f"{args.scenes} scenes x {args.hotspots} hotspots, {len(args.targets)} targets")
+    for name, seconds in rows:
+        print(f"{name:<24} {seconds * 1e3:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
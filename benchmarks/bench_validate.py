@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Cost of the validation rules on clean input.
+
+``validate`` checks every scene and builds its IR; the ``parse`` row builds
+the same IR without checking anything, so ``validate - parse`` is what the
+rules cost. Also times collect-all mode and ``jobs``.
+
+    python benchmarks/bench_validate.py --scenes 2000 --jobs 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from scenegen.ir import parse_project, parse_scene  # noqa: E402
+from scenegen.validator import validate  # noqa: E402
+from synth import make_project  # noqa: E402
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=2000)
+    parser.add_argument("--hotspots", type=int, default=12)
+    parser.add_argument("--vertices", type=int, default=8)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    data = make_project(args.scenes, args.hotspots, vertices=args.vertices, depth=2, width=4, variants=2)
+
+    def parse() -> None:
+        project = parse_project(data["project"])
+        project.scenes = [parse_scene(sc, project) for sc in data["scenes"]]
+
+    floor = _best(parse, args.repeat)
+    # (name, seconds, serial): the cost of the checks is only meaningful for serial runs
+    rows = [("parse (no checks)", floor, False)]
+    for jobs in args.jobs:
+        rows.append((f"validate jobs={jobs}", _best(lambda: validate(data, jobs), args.repeat), jobs == 1))
+    rows.append(("validate max_errors=0", _best(lambda: validate(data, max_errors=0), args.repeat), True))
+
+    print(f"{args.scenes} scenes x {args.hotspots} hotspots")
+    print(f"{'':<22} {'ms':>9} {'checks ms':>10} {'us/scene':>9}")
+    for name, seconds, serial in rows:
+        checks = f"{(seconds - floor) * 1e3:>10.1f}" if serial else f"{'-':>10}"
+        print(f"{name:<22} {seconds * 1e3:>9.1f} {checks} {seconds / args.scenes * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
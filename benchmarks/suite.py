@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Benchmark suite with a stored baseline and a regression budget.
+
+Builds seeded synthetic inputs (``synth.py``) and measures throughput and
+peak memory of SceneGen's validate, generate and write stages and of
+``make_renpy_script`` on a large dialogue, in memory (``json_to_renpy``) and
+streamed from file to file (``convert_file``). Timing runs take the
+best of ``--repeat``; peak memory comes from one extra ``tracemalloc`` run
+per case so tracing never skews the timings.
+
+    python benchmarks/suite.py --save-baseline          # record this machine
+    python benchmarks/suite.py --budget 1.25            # exit 1 on a >25% slowdown
+
+Baselines are machine-specific: record one on the machine that compares
+against it. A baseline made with other input parameters is refused.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from make_renpy_script import convert_file, json_to_renpy  # noqa: E402
+from scenegen.generator import generate_rpy  # noqa: E402
+from scenegen.manifest import Manifest  # noqa: E402
+from scenegen.validator import validate  # noqa: E402
+from scenegen.writer import write_files  # noqa: E402
+from synth import SHAPES, make_dialogue, make_project  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_kib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    data = make_project(
+        args.scenes, args.hotspots, args.seed, args.vertices,
+        depth=args.depth, width=args.width, shapes=args.shapes, variants=args.variants,
+    )
+    in_mb = len(json.dumps(data)) / 1e6
+    project = validate(data)
+    files = generate_rpy(project)
+    out_mb = sum(len(c.encode("utf-8")) for c in files.values()) / 1e6
+    dialogue = make_dialogue(args.dialogue_lines, seed=args.seed)
+    dialogue_mb = len(json.dumps(dialogue)) / 1e6
+
+    def write() -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_files(Path(tmp), files.items(), Manifest())
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    dialogue_file = Path(tmp_dir.name) / "dialogue.json"
+    dialogue_file.write_text(json.dumps(dialogue), encoding="utf8")
+
+    # (name, fn, items, items unit, MB processed)
+    cases = [
+        ("validate", lambda: validate(data), args.scenes, "scenes", in_mb),
+        ("generate", lambda: generate_rpy(project), args.scenes, "scenes", out_mb),
+        ("write", write, len(files), "files", out_mb),
+        ("convert", lambda: json_to_renpy(dialogue), args.dialogue_lines, "lines", dialogue_mb),
+        ("convert-file", lambda: convert_file(dialogue_file), args.dialogue_lines, "lines", dialogue_mb),
+    ]
+    results = []
+    with tmp_dir:
+        for name, fn, items, unit, mb in cases:
+            seconds = _best(fn, args.repeat)
+            results.append({
+                "case": name,
+                "seconds": seconds,
+                "items_per_s": items / seconds,
+                "unit": unit,
+                "mb_per_s": mb / seconds,
+                "peak_kib": _peak_kib(fn),
+            })
+    return results
+
+
+def _params(args: argparse.Namespace) -> Dict[str, Any]:
+    keys = ["scenes", "hotspots", "seed", "vertices", "depth", "width", "shapes", "variants", "dialogue_lines"]
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in vars(args).items() if k in keys}
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], budget: float) -> List[str]:
+    """Return one message per case slower than ``budget`` x its baseline time."""
+    base = {r["case"]: r for r in baseline["results"]}
+    failures = []
+    for r in results:
+        b = base.get(r["case"])
+        if b is None:
+            continue
+        ratio = r["seconds"] / b["seconds"]
+        r["vs_baseline"] = ratio
+        if ratio > budget:
+            failures.append(f"{r['case']}: {ratio:.2f}x baseline time (budget {budget:.2f}x)")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=300)
+    parser.add_argument("--hotspots", type=int, default=12)
+    parser.add_argument("--vertices", type=int, default=8)
+    parser.add_argument("--depth", type=int, default=2, help="Nested group levels per scene")
+    parser.add_argument("--width", type=int, default=4, help="Images per group level")
+    parser.add_argument("--shapes", type=lambda s: tuple(s.split(",")), default=SHAPES,
+                        help="Comma-separated hotspot shape cycle, e.g. rect,rect,polygon")
+    parser.add_argument("--variants", type=int, default=2, help="Conditional variants per background")
+    parser.add_argument("--dialogue-lines", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--budget", type=float, default=1.3, help="Allowed time ratio against the baseline")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    params = _params(args)
+    failures: List[str] = []
+    if args.save_baseline:
+        payload = {"params": params, "python": platform.python_version(), "results": results}
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["params"] != params:
+            print(f"baseline {args.baseline} was recorded with other parameters: {baseline['params']}")
+            return 2
+        failures = compare(results, baseline, args.budget)
+    else:
+        print(f"no baseline at {args.baseline}; run with --save-baseline to record one")
+
+    print(f"{'case':>9} {'ms':>9} {'items/s':>11} {'':<6} {'MB/s':>8} {'peak KiB':>10} {'vs base':>8}")
+    for r in results:
+        ratio = f"{r['vs_baseline']:.2f}x" if "vs_baseline" in r else "-"
+        print(f"{r['case']:>9} {r['seconds'] * 1e3:>9.1f} {r['items_per_s']:>11.0f} {r['unit']:<6} "
+              f"{r['mb_per_s']:>8.1f} {r['peak_kib']:>10.0f} {ratio:>8}")
+    if args.json:
+        args.json.write_text(json.dumps({"params": params, "results": results}, indent=2), encoding="utf-8")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+"""Seeded synthetic SceneGen projects and dialogue scripts for benchmarks."""
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Dict, Sequence
+
+SHAPES = ("rect", "polygon", "circle")
+
+
+def _polygon(x: float, y: float, vertices: int) -> list:
+    if vertices == 3:
+        return [[x, y], [x + 0.1, y], [x + 0.05, y + 0.1]]
+    step = 2 * math.pi / vertices
+    return [[x + 0.05 + 0.05 * math.cos(k * step), y + 0.05 + 0.05 * math.sin(k * step)] for k in range(vertices)]
+
+
+def make_project(
+    scenes: int = 500,
+    hotspots: int = 12,
+    seed: int = 0,
+    vertices: int = 3,
+    depth: int = 0,
+    width: int = 0,
+    shapes: Sequence[str] = SHAPES,
+    variants: int = 0,
+    templates: int = 0,
+) -> Dict[str, Any]:
+    """Return a valid relative-coords project with ``scenes`` scenes.
+
+    Polygon hotspots get ``vertices`` points on an ellipse (3 keeps the triangle).
+    Hotspot ``j`` has shape ``shapes[j % len(shapes)]``. ``depth``/``width`` add
+    a ``make_layer_tree`` group to every scene and ``variants`` gives each
+    background that many conditional variants. With ``templates`` scene ``i``
+    reuses the hotspots of scene ``i % templates``, like a project built from a
+    few screen templates. The defaults reproduce the original two-layer
+    scenes, so results stay comparable across versions.
+    """
+    rnd = random.Random(seed)
+    out = []
+    for i in range(scenes):
+        layers = [
+            {"id": "bg", "type": "image", "image": f"bg/scene_{i}.png", "zorder": 0},
+            {"id": "tint", "type": "color", "color": "#000000", "alpha": 0.2, "zorder": 5},
+        ]
+        if variants:
+            layers[0]["variants"] = [
+                {"if": f"flag_{v}", "image": f"bg/scene_{i}_v{v}.png"} for v in range(variants)
+            ]
+        if depth:
+            layers.append({"id": "ui", "type": "group", "zorder": 10,
+                           "children": _layer_level(1, depth, width or 1)})
+        spots = []
+        for j in range(hotspots):
+            x, y = rnd.random() * 0.8, rnd.random() * 0.8
+            action = {"type": "go_scene", "scene_id": f"s{rnd.randrange(scenes)}",
+                      "transition": {"type": "dissolve", "duration": 0.2}}
+            shape = shapes[j % len(shapes)]
+            spot: Dict[str, Any] = {"id": f"h{j}", "shape": shape, "tooltip": f"Hotspot {j}", "action": action}
+            if shape == "rect":
+                spot["rect"] = {"x": x, "y": y, "w": 0.1, "h": 0.1}
+            elif shape == "polygon":
+                spot["points"] = _polygon(x, y, vertices)
+            else:
+                spot["circle"] = {"cx": x + 0.05, "cy": y + 0.05, "r": 0.03}
+            spots.append(spot)
+        if templates and i >= templates:
+            spots = out[i % templates]["hotspots"]
+        out.append({"id": f"s{i}", "layers": layers, "hotspots": spots})
+    return {
+        "version": "1.0",
+        "project": {"reference_resolution": {"width": 1920, "height": 1080}, "coords_mode": "relative"},
+        "scenes": out,
+    }
+
+
+def _layer_level(d: int, depth: int, width: int) -> list:
+    layers: list = [
+        {"id": f"img{d}_{k}", "type": "image", "image": f"ui/{d}_{k}.png", "zorder": k,
+         "transform": {"pos": {"x": 0.1 * k % 1, "y": 0.5}}}
+        for k in range(width)
+    ]
+    if d < depth:
+        layers.append({"id": f"grp{d}", "type": "group", "zorder": width, "children": _layer_level(d + 1, depth, width)})
+    return layers
+
+
+def make_dialogue(lines: int = 100_000, speakers: int = 8, seed: int = 0) -> Dict[str, Any]:
+    """A ``make_renpy_script`` dialogue document; about one line in ten is narration."""
+    rnd = random.Random(seed)
+    words = ["the", "door", "opens", "quietly", "and", "we", "wait", "for", "a", "sign", "nobody", "knows"]
+    dialogues = []
+    for _ in range(lines):
+        text = " ".join(rnd.choice(words) for _ in range(rnd.randint(3, 16))).capitalize() + "."
+        if rnd.random() < 0.1:
+            dialogues.append({"text": text})
+        else:
+            dialogues.append({"speaker": f"c{rnd.randrange(speakers)}", "text": text})
+    return {"dialogues": dialogues}
+
+
+def make_layer_tree(depth: int, width: int) -> Dict[str, Any]:
+    """A scene whose layers nest ``depth`` groups deep with ``width`` images per level."""
+    return {"id": f"deep_{depth}x{width}", "layers": _layer_level(1, depth, width), "hotspots": []}
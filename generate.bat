@@ -14,10 +14,7 @@ for /f %%i in ('powershell -NoProfile -Command "Get-Date -Format yyyyMMdd_HHmmss
 pushd "%SCRIPT_DIR%"
 
 if exist "%INPUT_DIR%\*.json" (
-    for %%F in ("%INPUT_DIR%\*.json") do (
-        powershell -NoProfile -Command "Write-Output ('Processing %%F') | Tee-Object -FilePath '%LOG_FILE%' -Append"
-        powershell -NoProfile -Command "python -m scenegen.cli --in '%%F' --out-dir '%OUTPUT_DIR%' 2>&1 | Tee-Object -FilePath '%LOG_FILE%' -Append"
-    )
+    powershell -NoProfile -Command "python -m scenegen.cli --in '%INPUT_DIR%' --out-dir '%OUTPUT_DIR%' %* 2>&1 | Tee-Object -FilePath '%LOG_FILE%' -Append"
 ) else (
     echo No JSON files found in %INPUT_DIR%
 )
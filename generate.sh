@@ -13,8 +13,5 @@ exec > >(tee -a "$LOG_FILE") 2>&1
 
 cd "$SCRIPT_DIR"
 
-shopt -s nullglob
-for json in "$INPUT_DIR"/*.json; do
-    echo "Processing $json"
-    python3 -m scenegen.cli --in "$json" --out-dir "$OUTPUT_DIR"
-done
+# one process for every input; extra arguments (e.g. --jobs 0) are passed through
+python3 -m scenegen.cli --in "$INPUT_DIR" --out-dir "$OUTPUT_DIR" "$@"
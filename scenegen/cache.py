@@ -0,0 +1,100 @@
+"""On-disk cache of validated projects (``--cache-dir``).
+
+An entry is the pickled IR of one input file (the list of target projects
+for ``--target-resolution``), keyed by the file's size, mtime, content hash,
+the targets and the SceneGen version, so a hit skips ``json.loads``
+and ``validate``. Only valid projects are stored. Entries are loaded with
+``pickle``, so the cache dir must be as trusted as the code. The least
+recently used entries are evicted once the dir grows past ``max_bytes``.
+"""
+from typing import List, Tuple
+import gc, hashlib, logging, os, pathlib, pickle, tempfile
+
+from . import __version__
+from .ir import Project
+
+DEFAULT_MAX_MB = 256
+_SUFFIX = ".project.pickle"
+
+
+class ProjectCache:
+    """``hits``/``misses``/``evicted`` count this process's lookups."""
+
+    def __init__(self, root: pathlib.Path, max_bytes: int = DEFAULT_MAX_MB << 20):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def key(self, src: pathlib.Path, content: bytes, variant: str = "") -> str:
+        """Fingerprint of ``src`` as read into ``content``; ``variant`` tells apart IRs built differently."""
+        st = src.stat()
+        h = hashlib.sha256(f"scenegen {__version__}\0{variant}\0{len(content)}\0{st.st_mtime_ns}\0".encode())
+        h.update(content)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / f"{key}{_SUFFIX}"
+
+    def load(self, key: str) -> Project | List[Project] | None:
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        # the IR is acyclic: collections while unpickling would only rescan it
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            project = pickle.loads(blob)
+        except Exception as e:
+            logging.warning("Dropping unreadable cache entry %s: %s", path, e)
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+        try:
+            os.utime(path)  # recently used: evicted last
+        except OSError:
+            pass
+        self.hits += 1
+        return project
+
+    def store(self, key: str, project: Project | List[Project]) -> None:
+        blob = pickle.dumps(project, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        # a unique temp name, so concurrent batch workers never clobber each other
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            pathlib.Path(tmp).unlink(missing_ok=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.root.glob(f"*{_SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # removed by another process
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evicted += 1
+
+    def stats(self) -> Tuple[int, int, int]:
+        return self.hits, self.misses, self.evicted
@@ -1,13 +1,31 @@
-import argparse, json, pathlib, sys, logging, datetime
-from .validator import validate, ValidationError
-from .generator import generate_rpy
+import argparse, contextlib, cProfile, json, pathlib, sys, logging, datetime, glob, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+from .validator import SceneCache, validate, validate_stream, validate_targets, ValidationError
+from .cache import DEFAULT_MAX_MB, ProjectCache
+from .generator import generate_stream, iter_rpy, target_dir
+from .hittest import DEFAULT_HIT_CELL
+from .ir import Project, Scene, parse_project, parse_resolution
+from .jsonstream import SceneStream
+from .layout import check_layout, scene_layout
+from .manifest import Manifest, input_key, input_manifest_name
+from .metrics import Metrics, write_report
+from .parallel import resolve_jobs
+from .rendercache import DEFAULT_MAX_ENTRIES, Counts, RenderCache
+from . import server
+from .watch import DEFAULT_DEBOUNCE, Watcher
+from .writer import write_files
 
 
-def _setup_logging() -> pathlib.Path:
-    """Configure logging and return the log file path."""
-    log_dir = pathlib.Path(__file__).resolve().parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / f"scenegen_{datetime.datetime.now():%Y%m%d_%H%M%S}.log"
+def _setup_logging(log_file: pathlib.Path | None = None) -> pathlib.Path:
+    """Configure logging and return the log file path.
+
+    Batch workers pass the parent's ``log_file`` so a run shares one log.
+    """
+    if log_file is None:
+        log_dir = pathlib.Path(__file__).resolve().parent.parent / "logs"
+        log_dir.mkdir(exist_ok=True)
+        log_file = log_dir / f"scenegen_{datetime.datetime.now():%Y%m%d_%H%M%S}.log"
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s %(levelname)s %(message)s",
@@ -18,39 +36,413 @@ def _setup_logging() -> pathlib.Path:
     )
     return log_file
 
-def main(argv=None):
-    p = argparse.ArgumentParser(prog="scenegen", description="SceneGen: JSON -> Ren'Py scenes generator")
-    p.add_argument("--in", dest="infile", required=True, help="Input scenes JSON")
-    p.add_argument("--out-dir", dest="outdir", required=True, help="Output directory (Ren'Py /game)")
-    args = p.parse_args(argv)
+def _expand_inputs(patterns, warn: bool = True) -> list:
+    """Resolve ``--in`` values (files, directories, globs) to JSON paths."""
+    paths = []
+    for pattern in patterns:
+        path = pathlib.Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.json"))
+        elif glob.has_magic(pattern):
+            matches = sorted(pathlib.Path(m) for m in glob.glob(pattern, recursive=True))
+        else:
+            paths.append(path)  # a missing file is reported by _process
+            continue
+        if not matches and warn:
+            logging.warning("No JSON files match %s", pattern)
+        paths.extend(matches)
+    return paths
 
-    log_file = _setup_logging()
-    logging.info("Log file: %s", log_file)
+def _load_manifest(outdir: pathlib.Path, name: str, full: bool) -> Manifest:
+    manifest = Manifest(name=name) if full else Manifest.load(outdir, name)
+    manifest.drop_missing(outdir)
+    return manifest
 
-    src = pathlib.Path(args.infile)
-    outdir = pathlib.Path(args.outdir)
+def _resolution(text: str) -> Tuple[int, int]:
+    try:
+        return parse_resolution(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+def _phase(metrics: Metrics | None, name: str):
+    return contextlib.nullcontext() if metrics is None else metrics.phase(name)
+
+def _timed(metrics: Metrics | None, name: str, items: Iterable[Any]) -> Iterable[Any]:
+    return items if metrics is None else metrics.timed(name, items)
+
+def _log_validation_error(e: ValidationError, src: pathlib.Path | None = None):
+    where = "" if src is None else f" in {src}"
+    if len(e.errors) == 1:
+        logging.error("Validation error%s: %s", where, e)
+        return
+    logging.error("Validation failed%s with %d errors:", where, len(e.errors))
+    for message in e.errors:
+        logging.error("  %s", message)
+
+def _log_layout(messages: Iterable[str]) -> None:
+    for message in messages:
+        logging.warning("Layout: %s", message)
+
+def _with_layout(scenes: Iterable[Scene], project: Project, metrics: Metrics | None) -> Iterator[Scene]:
+    for i, sc in enumerate(scenes):
+        with _phase(metrics, "layout"):
+            _log_layout(scene_layout(sc, i, project.width, project.height))
+        yield sc
+
+def _process(
+    src: pathlib.Path, outdir: pathlib.Path, full: bool, stream: bool, jobs: int, io_threads: int = 0,
+    hit_cell: int = DEFAULT_HIT_CELL, metrics: Metrics | None = None, max_errors: int = 1,
+    project_cache: ProjectCache | None = None, layout: bool = False,
+    targets: Sequence[Tuple[int, int]] = (), render_cache: RenderCache | None = None,
+) -> int:
+    """Validate and generate one input file; return its exit code.
+
+    With ``metrics`` the phases read, parse, validate, generate and write are
+    timed separately (streaming interleaves them: reading and parsing scenes
+    count as validate) and every scene gets a row. A ``project_cache`` hit
+    replaces parse and validate; streaming does not use the cache. ``layout``
+    logs hotspot layout problems (see ``scenegen.layout``) as warnings.
+    With ``targets`` (``(width, height)`` pairs; not with ``stream``) the input
+    is validated once and each resolution is written to its own
+    ``outdir/<W>x<H>``; the layout check runs on the first one.
+    ``render_cache`` carries rendered fragments over to the next input.
+    """
     logging.info("Input: %s", src)
     logging.info("Output dir: %s", outdir)
     if not src.exists():
         logging.error("Input not found: %s", src)
         return 2
-    data = json.loads(src.read_text(encoding="utf-8"))
-    logging.info("Validating JSON")
+    name, input_name = input_manifest_name(src), input_key(src)
+
+    if stream:
+        manifest = _load_manifest(outdir, name, full)
+        logging.info("Streaming: validating and generating scene by scene")
+        try:
+            with _phase(metrics, "read"):
+                scene_stream = SceneStream(src)
+            scenes = _timed(metrics, "validate", validate_stream(scene_stream, jobs, max_errors))
+            if layout:
+                scenes = _with_layout(scenes, parse_project(scene_stream.header["project"]), metrics)
+            files = generate_stream(
+                scene_stream.header["project"], scenes, manifest, jobs, hit_cell, metrics, render_cache, input_name,
+            )
+            with _phase(metrics, "write"):
+                write_files(outdir, _timed(metrics, "generate", files), manifest, io_threads)
+        except ValidationError as e:
+            _log_validation_error(e)
+            return 3
+        except ValueError as e:
+            logging.error("Invalid JSON in %s: %s", src, e)
+            return 4
+        return 0
+
+    key = project = None
+    try:
+        with _phase(metrics, "read"):
+            raw = src.read_bytes()
+        if project_cache is not None:
+            with _phase(metrics, "cache"):
+                # a multi-resolution run stores the list of target projects under its own key
+                key = project_cache.key(src, raw, " ".join(f"{w}x{h}" for w, h in targets))
+                project = project_cache.load(key)
+            logging.info("Project cache %s: %s", "miss" if project is None else "hit", src)
+        if project is None:
+            with _phase(metrics, "parse"):
+                data = json.loads(raw.decode("utf-8"))
+    except ValueError as e:
+        logging.error("Invalid JSON in %s: %s", src, e)
+        return 4
+    del raw
+    cached = project is not None
+    if not cached:
+        logging.info("Validating JSON")
+        try:
+            with _phase(metrics, "validate"):
+                if targets:
+                    project = validate_targets(data, targets, jobs, max_errors)
+                else:
+                    project = validate(data, jobs, max_errors=max_errors)
+        except ValidationError as e:
+            _log_validation_error(e)
+            return 3
+        del data  # generation runs on the IR
+    projects = project if targets else [project]
+    if layout:
+        with _phase(metrics, "layout"):
+            _log_layout(check_layout(projects[0]))
+
+    for target in projects:
+        target_out = outdir / target_dir(target) if targets else outdir
+        logging.info("Generating Ren'Py files" + (f" for {target_dir(target)}: {target_out}" if targets else ""))
+        manifest = _load_manifest(target_out, name, full)
+        files = iter_rpy(target, manifest, jobs, hit_cell, metrics, render_cache, input_name)
+        with _phase(metrics, "write"):
+            write_files(target_out, _timed(metrics, "generate", files), manifest, io_threads)
+    if key is not None and not cached:
+        # stored after generation, so the entry carries the memoized scene hashes
+        with _phase(metrics, "cache"):
+            project_cache.store(key, project)
+    return 0
+
+def _metrics_for(src: pathlib.Path, profile: str | None, memory: bool) -> Metrics | None:
+    return Metrics(str(src), memory) if profile else None
+
+def _project_cache(cache_dir: str | None, max_mb: int) -> ProjectCache | None:
+    return ProjectCache(pathlib.Path(cache_dir), max_mb << 20) if cache_dir else None
+
+def _process_in_worker(
+    log_file: pathlib.Path, src: pathlib.Path, outdir: pathlib.Path, full: bool, stream: bool, io_threads: int,
+    hit_cell: int, profile: str | None, profile_memory: bool, max_errors: int = 1,
+    cache_dir: str | None = None, cache_max_mb: int = DEFAULT_MAX_MB, layout: bool = False,
+    targets: Sequence[Tuple[int, int]] = (), render_entries: int = DEFAULT_MAX_ENTRIES,
+) -> Tuple[int, Dict[str, Any] | None, Tuple[int, int, int], Counts]:
+    """Run ``_process`` in a pool worker; return its exit code, metrics report and cache stats."""
+    _setup_logging(log_file)
+    metrics = _metrics_for(src, profile, profile_memory)
+    project_cache = _project_cache(cache_dir, cache_max_mb)
+    render_cache = RenderCache(render_entries)
     try:
-        validate(data)
-    except ValidationError as e:
-        logging.error("Validation error: %s", e)
-        return 3
-
-    logging.info("Generating Ren'Py files")
-    files = generate_rpy(data)
-    for rel, content in files.items():
-        path = outdir / rel
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(content, encoding="utf-8")
-        logging.info("Wrote %s", path)
-    logging.info("Generated %d files into %s", len(files), outdir)
+        code = _process(
+            src, outdir, full, stream, 1, io_threads, hit_cell, metrics, max_errors, project_cache, layout,
+            targets, render_cache,
+        )
+    except Exception:
+        logging.exception("Failed to process %s", src)
+        code = 1
+    stats = (0, 0, 0) if project_cache is None else project_cache.stats()
+    rendered = ({kind: tuple(c) for kind, c in render_cache.counts.items()}, render_cache.evicted)
+    return code, None if metrics is None else metrics.report(), stats, rendered
+
+def _log_cache_stats(cache_dir: str, stats: List[Tuple[int, int, int]]) -> None:
+    hits, misses, evicted = (sum(s[k] for s in stats) for k in range(3))
+    logging.info("Project cache %s: %d hit(s), %d miss(es), %d evicted", cache_dir, hits, misses, evicted)
+
+def _log_render_stats(render_cache: RenderCache) -> None:
+    if render_cache.max_entries > 0:
+        logging.info("Render cache: %s", render_cache.summary())
+
+def _watch(
+    patterns, outdir: pathlib.Path, full: bool, io_threads: int, hit_cell: int, debounce: float, max_errors: int = 1,
+    layout: bool = False, render_entries: int = DEFAULT_MAX_ENTRIES,
+) -> int:
+    """Generate every input, then regenerate each one after its saves settle, until Ctrl+C.
+
+    Per input the validated scenes (``SceneCache``) and the manifest stay in
+    memory, so a cycle re-validates and re-renders only the scenes that
+    changed; rendered fragments are shared by every input and cycle.
+    Invalid intermediate saves are logged and the output is left as it was.
+    """
+    states: Dict[pathlib.Path, Tuple[SceneCache, Manifest]] = {}
+    render_cache = RenderCache(render_entries)
+
+    def cycle(src: pathlib.Path, seen: float | None = None) -> int:
+        start = time.monotonic()
+        if src not in states:
+            name = input_manifest_name(src)
+            states[src] = (SceneCache(), Manifest(name=name) if full else Manifest.load(outdir, name))
+        cache, manifest = states[src]
+        try:
+            data = json.loads(src.read_text(encoding="utf-8"))
+        except OSError as e:
+            logging.error("Cannot read %s: %s", src, e)
+            return 2
+        except ValueError as e:
+            logging.error("Invalid JSON in %s: %s", src, e)
+            return 4
+        try:
+            project = validate(data, cache=cache, max_errors=max_errors)
+        except ValidationError as e:
+            _log_validation_error(e, src)
+            return 3
+        del data
+        if layout:
+            _log_layout(check_layout(project))
+        manifest.drop_missing(outdir)
+        files = iter_rpy(project, manifest, 1, hit_cell, None, render_cache, input_key(src))
+        writer = write_files(outdir, files, manifest, io_threads)
+        done = time.monotonic()
+        logging.info(
+            "Cycle %s: %.1f ms (%.1f ms since save), %d/%d scenes revalidated, %d files written",
+            src.name, (done - start) * 1e3, (done - (start if seen is None else seen)) * 1e3,
+            cache.checked, len(project.scenes), writer.written,
+        )
+        return 0
+
+    watcher = Watcher(lambda: _expand_inputs(patterns, warn=False), debounce)
+    sources = watcher.prime()
+    if not sources:
+        logging.warning("No inputs match %s yet", ", ".join(patterns))
+    for src in sources:
+        cycle(src)
+    logging.info("Watching %d input(s) for changes (Ctrl+C to stop)", len(sources))
+    watcher.run(cycle)
     return 0
 
+def _write_profile(path: str, reports) -> None:
+    write_report(pathlib.Path(path), reports)
+    for report in reports:
+        logging.info(
+            "Profile %s: %s", report["input"],
+            ", ".join(f"{p['name']} {p['wall_ms']:.1f} ms" for p in report["phases"]),
+        )
+    logging.info("Profile report: %s", path)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["serve"]:
+        _setup_logging()
+        return server.main(argv[1:])
+    p = argparse.ArgumentParser(
+        prog="scenegen", description="SceneGen: JSON -> Ren'Py scenes generator",
+        epilog="'scenegen serve --help' describes the JSON-RPC server mode.",
+    )
+    p.add_argument(
+        "--in", dest="inputs", action="append", required=True,
+        help="Input scenes JSON, directory of *.json or glob; may be repeated",
+    )
+    p.add_argument("--out-dir", dest="outdir", required=True, help="Output directory (Ren'Py /game)")
+    p.add_argument("--full", action="store_true", help="Ignore the manifest and regenerate every scene")
+    p.add_argument(
+        "--stream", action="store_true",
+        help="Read, validate and write one scene at a time (bounded memory for huge inputs)",
+    )
+    p.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="Worker processes (0 = one per CPU): across files in batch mode, across scenes otherwise",
+    )
+    p.add_argument(
+        "--io-threads", type=int, default=0,
+        help="Threads for comparing and staging output files (0 = write inline)",
+    )
+    p.add_argument(
+        "--hit-cell", type=int, default=DEFAULT_HIT_CELL,
+        help="Hit-mask cell size in pixels for polygon/circle hotspots (0 = click by bounding box)",
+    )
+    p.add_argument(
+        "--max-errors", type=int, default=1,
+        help="Report up to this many validation errors per input instead of the first one (0 = all)",
+    )
+    p.add_argument(
+        "--target-resolution", dest="targets", type=_resolution, nargs="+", default=[], metavar="WxH",
+        help="Generate for each of these resolutions into OUT_DIR/WxH, validating the input once",
+    )
+    p.add_argument(
+        "--render-cache-entries", type=int, default=DEFAULT_MAX_ENTRIES, metavar="N",
+        help="Keep up to N rendered layer trees, hotspots and hit masks for reuse across scenes (0 = off)",
+    )
+    p.add_argument(
+        "--check-layout", action="store_true",
+        help="Warn about hotspots that lie off screen, overlap or are covered by later hotspots",
+    )
+    p.add_argument(
+        "--cache-dir",
+        help="Keep validated projects here and skip parsing and validating unchanged inputs (not with --stream)",
+    )
+    p.add_argument(
+        "--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+        help="Evict the least recently used cache entries beyond this size",
+    )
+    p.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and regenerate changed scenes whenever an input is saved",
+    )
+    p.add_argument(
+        "--debounce-ms", type=int, default=int(DEFAULT_DEBOUNCE * 1000),
+        help="With --watch, wait until an input has not changed for this long",
+    )
+    p.add_argument(
+        "--profile", metavar="REPORT",
+        help="Write per-phase and per-scene timings and counts to REPORT (.csv, otherwise JSON)",
+    )
+    p.add_argument(
+        "--profile-memory", action="store_true",
+        help="With --profile, also record peak traced memory (tracemalloc; slows the run)",
+    )
+    p.add_argument("--profile-cprofile", metavar="FILE", help="Dump cProfile stats of the main process to FILE")
+    args = p.parse_args(argv)
+    if args.targets and (args.stream or args.watch):
+        p.error("--target-resolution cannot be combined with --stream or --watch")
+
+    log_file = _setup_logging()
+    logging.info("Log file: %s", log_file)
+
+    if args.profile_cprofile:
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(_run, args, log_file)
+        finally:
+            profiler.dump_stats(args.profile_cprofile)
+            logging.info("cProfile stats: %s", args.profile_cprofile)
+    return _run(args, log_file)
+
+def _run(args: argparse.Namespace, log_file: pathlib.Path) -> int:
+    outdir = pathlib.Path(args.outdir)
+    if args.watch:
+        return _watch(
+            args.inputs, outdir, args.full, args.io_threads, args.hit_cell, args.debounce_ms / 1000,
+            args.max_errors, args.check_layout, args.render_cache_entries,
+        )
+    sources = _expand_inputs(args.inputs)
+    reports = []
+    batch = len(args.inputs) > 1 or len(sources) != 1 or sources[0] != pathlib.Path(args.inputs[0])
+    project_cache = _project_cache(args.cache_dir, args.cache_max_mb)
+    render_cache = RenderCache(args.render_cache_entries)
+    if not batch:
+        metrics = _metrics_for(sources[0], args.profile, args.profile_memory)
+        code = _process(
+            sources[0], outdir, args.full, args.stream, args.jobs, args.io_threads, args.hit_cell, metrics,
+            args.max_errors, project_cache, args.check_layout, args.targets, render_cache,
+        )
+        if metrics is not None:
+            _write_profile(args.profile, [metrics.report()])
+        if project_cache is not None:
+            _log_cache_stats(args.cache_dir, [project_cache.stats()])
+        _log_render_stats(render_cache)
+        return code
+
+    jobs = min(resolve_jobs(args.jobs), len(sources)) if sources else 1
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(
+                    _process_in_worker, log_file, src, outdir, args.full, args.stream, args.io_threads, args.hit_cell,
+                    args.profile, args.profile_memory, args.max_errors, args.cache_dir, args.cache_max_mb,
+                    args.check_layout, args.targets, args.render_cache_entries,
+                )
+                for src in sources
+            ]
+            results = [f.result() for f in futures]
+        codes = [code for code, _, _, _ in results]
+        reports = [report for _, report, _, _ in results if report is not None]
+        cache_stats = [stats for _, _, stats, _ in results]
+        for _, _, _, rendered in results:
+            render_cache.add(rendered)
+    else:
+        codes = []
+        for src in sources:
+            metrics = _metrics_for(src, args.profile, args.profile_memory)
+            try:
+                codes.append(_process(
+                    src, outdir, args.full, args.stream, 1, args.io_threads, args.hit_cell, metrics, args.max_errors,
+                    project_cache, args.check_layout, args.targets, render_cache,
+                ))
+            except Exception:
+                logging.exception("Failed to process %s", src)
+                codes.append(1)
+            if metrics is not None:
+                reports.append(metrics.report())
+        cache_stats = [] if project_cache is None else [project_cache.stats()]
+    if args.profile:
+        _write_profile(args.profile, reports)
+    if args.cache_dir:
+        _log_cache_stats(args.cache_dir, cache_stats)
+    _log_render_stats(render_cache)
+
+    failed = [(src, code) for src, code in zip(sources, codes) if code]
+    for src, code in failed:
+        logging.error("FAILED (exit %d): %s", code, src)
+    logging.info("Batch done: %d files, %d ok, %d failed", len(sources), len(sources) - len(failed), len(failed))
+    return max(codes, default=0)
+
 if __name__ == "__main__":
     raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Batched pixel resolution of scene coordinates.
+
+Every coordinate of a scene (rects, polygon vertices, circles, layer
+positions) is gathered into flat ``array('d')`` buffers, then scaled and
+rounded in one pass. NumPy is used when installed and the batch is large
+enough to pay for the conversion; results are identical either way (both
+round half to even, like ``round``).
+"""
+from array import array
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as _np
+except ImportError:  # optional fast path
+    _np = None
+
+# below this many values the pure-Python loop beats NumPy's call overhead
+NUMPY_MIN_VALUES = 256
+
+
+class CoordBatch:
+    """Flat x/y buffers; ``add*`` return the index of the first stored pair."""
+
+    __slots__ = ("xs", "ys")
+
+    def __init__(self):
+        self.xs = array("d")
+        self.ys = array("d")
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def add(self, x: float, y: float) -> int:
+        i = len(self.xs)
+        self.xs.append(x)
+        self.ys.append(y)
+        return i
+
+    def add_points(self, points: Sequence[Sequence[float]]) -> int:
+        i = len(self.xs)
+        self.xs.extend([p[0] for p in points])
+        self.ys.extend([p[1] for p in points])
+        return i
+
+    def resolve(self, sx: float, sy: float) -> Tuple[List[int], List[int]]:
+        """Return ``round(x * sx)`` and ``round(y * sy)`` for every stored pair."""
+        if _np is not None and len(self.xs) >= NUMPY_MIN_VALUES:
+            xs = _np.rint(_np.frombuffer(self.xs, dtype=_np.float64) * sx).astype(_np.int64)
+            ys = _np.rint(_np.frombuffer(self.ys, dtype=_np.float64) * sy).astype(_np.int64)
+            return xs.tolist(), ys.tolist()
+        return [int(round(v * sx)) for v in self.xs], [int(round(v * sy)) for v in self.ys]
+
+    def resolve_many(self, scales: Sequence[Tuple[float, float]]) -> List[Tuple[List[int], List[int]]]:
+        """``resolve`` for every ``(sx, sy)`` of ``scales``; NumPy scales them all in one product."""
+        if _np is not None and len(self.xs) * len(scales) >= NUMPY_MIN_VALUES:
+            f = _np.asarray(scales, dtype=_np.float64)
+            xs = _np.rint(_np.outer(f[:, 0], _np.frombuffer(self.xs, dtype=_np.float64))).astype(_np.int64)
+            ys = _np.rint(_np.outer(f[:, 1], _np.frombuffer(self.ys, dtype=_np.float64))).astype(_np.int64)
+            return list(zip(xs.tolist(), ys.tolist()))
+        return [self.resolve(sx, sy) for sx, sy in scales]
+
+
+def bboxes(xs: List[int], ys: List[int], spans: Sequence[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    """``(x, y, w, h)`` bounding boxes of resolved points ``xs[a:b], ys[a:b]`` per span."""
+    if not spans:
+        return []
+    if _np is not None and len(xs) >= NUMPY_MIN_VALUES:
+        ax = _np.asarray(xs, dtype=_np.int64)
+        ay = _np.asarray(ys, dtype=_np.int64)
+        # spans may have gaps between them: reduce over [a0, b0, a1, b1, ...]
+        # and keep the even segments
+        idx = _np.fromiter((i for span in spans for i in span), dtype=_np.intp, count=2 * len(spans))
+        if idx[-1] == len(ax):
+            idx = idx[:-1]
+        x0 = _np.minimum.reduceat(ax, idx)[0::2]
+        x1 = _np.maximum.reduceat(ax, idx)[0::2]
+        y0 = _np.minimum.reduceat(ay, idx)[0::2]
+        y1 = _np.maximum.reduceat(ay, idx)[0::2]
+        return list(zip(x0.tolist(), y0.tolist(), (x1 - x0).tolist(), (y1 - y0).tolist()))
+    out = []
+    for a, b in spans:
+        px, py = xs[a:b], ys[a:b]
+        x, y = min(px), min(py)
+        out.append((x, y, max(px) - x, max(py) - y))
+    return out
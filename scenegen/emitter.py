@@ -0,0 +1,72 @@
+"""Indentation-aware line emitter for generated Ren'Py code."""
+from typing import List, TextIO
+
+
+class _Dedent:
+    __slots__ = ("_pads",)
+
+    def __init__(self, pads: List[str]):
+        self._pads = pads
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        self._pads.pop()
+
+
+class Emitter:
+    """Write lines at the current indentation into a shared buffer or stream.
+
+    Nesting pushes onto an indent stack instead of re-indenting rendered child
+    text, so output cost is linear in its size regardless of depth.
+    """
+
+    def __init__(self, out: TextIO | None = None, unit: int = 4):
+        self._buf: List[str] | None = None
+        if out is None:
+            self._buf = []
+            self._write = self._buf.append
+        else:
+            self._write = out.write
+        self._unit = unit
+        self._pads = [""]
+        self._dedent = _Dedent(self._pads)
+
+    @property
+    def pad(self) -> str:
+        return self._pads[-1]
+
+    def line(self, text: str = "") -> None:
+        """Emit one line; empty lines carry no indentation."""
+        self._write(self._pads[-1] + text + "\n" if text else "\n")
+
+    def lines(self, texts: List[str]) -> None:
+        pad = self._pads[-1]
+        write = self._write
+        for text in texts:
+            write(pad + text + "\n" if text else "\n")
+
+    def mark(self) -> int:
+        """Position in the buffer for ``since``."""
+        if self._buf is None:
+            raise ValueError("emitter writes to a stream")
+        return len(self._buf)
+
+    def since(self, mark: int) -> str:
+        """Text emitted after ``mark``, indentation included."""
+        return "".join(self._buf[mark:])
+
+    def raw(self, text: str) -> None:
+        """Emit already indented text, such as a ``since`` result, as is."""
+        self._write(text)
+
+    def indent(self, width: int | None = None) -> _Dedent:
+        """Indent until the returned context manager exits: ``with em.indent(): ...``"""
+        self._pads.append(self._pads[-1] + " " * (self._unit if width is None else width))
+        return self._dedent
+
+    def getvalue(self) -> str:
+        if self._buf is None:
+            raise ValueError("emitter writes to a stream")
+        return "".join(self._buf)
@@ -1,35 +1,19 @@
-from typing import Any, Dict, List, Tuple
-import textwrap
-
-def _px(val, ref: int, relative: bool) -> int:
-    return int(round(val * ref)) if relative else int(round(val))
-
-def _coords_rect(rect: Dict[str, float], refw: int, refh: int, relative: bool) -> Tuple[int, int, int, int]:
-    x = _px(rect["x"], refw, relative)
-    y = _px(rect["y"], refh, relative)
-    w = _px(rect["w"], refw, relative)
-    h = _px(rect["h"], refh, relative)
-    return x, y, w, h
-
-def _bbox_points(points: List[List[float]], refw: int, refh: int, relative: bool) -> Tuple[int,int,int,int]:
-    xs = [_px(p[0], refw, relative) for p in points]
-    ys = [_px(p[1], refh, relative) for p in points]
-    x, y = min(xs), min(ys)
-    w, h = max(xs) - x, max(ys) - y
-    return x, y, w, h
-
-def _bbox_circle(c: Dict[str, float], refw: int, refh: int, relative: bool) -> Tuple[int,int,int,int]:
-    cx = _px(c["cx"], refw, relative)
-    cy = _px(c["cy"], refh, relative)
-    r = int(round((c["r"] * refw) if relative else c["r"]))  # assume r in X
-    return cx - r, cy - r, 2 * r, 2 * r
-
-def _transition_code(t: Dict[str, Any] | None) -> str:
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+from functools import partial
+
+from .emitter import Emitter
+from .graph import SceneIndex, scene_images, scene_links
+from .hittest import DEFAULT_HIT_CELL, circle_mask, polygon_mask
+from .ir import Action, Hotspot, Layer, Project, Scene, parse_project, parse_scene, parse_targets
+from .manifest import Manifest, scene_hash, settings_hash, text_hash
+from .metrics import Metrics, Probe
+from .parallel import imap_chunks
+from .rendercache import Counts, RenderCache
+
+def _transition_code(t: Tuple[str, Any] | None) -> str:
     if not t:
         return ""
-    ttype = t.get("type", "dissolve")
-    ttype = ttype.lower()
-    dur = t.get("duration", 0.2)
+    ttype, dur = t
     # map a few common names
     mapping = {
         "fade": "Fade",
@@ -53,220 +37,590 @@ def _transition_code(t: Dict[str, Any] | None) -> str:
     klass = mapping.get(ttype, "Dissolve")
     return f"with {klass}({dur})"
 
-def _indent(s: str, n: int = 4) -> str:
-    pad = " " * n
-    return "\n".join(pad + line if line else "" for line in s.splitlines())
-
-def _layer_to_code(layer: Dict[str, Any], refw: int, refh: int, relative: bool, depth=0) -> str:
-    t = layer.get("type")
-    vis_if = layer.get("visibility", {}).get("if")
-    tx = layer.get("transform", {})
-    pos = tx.get("pos", {"x": 0.5, "y": 0.5})
-    anchor = tx.get("anchor", {"x": 0.5, "y": 0.5})
-    zoom = tx.get("zoom", 1.0)
-    rot = tx.get("rotate", 0)
+OUTLINE_COLOR = "#FFFFFF"
+
+def _solid_name(color: str, w: int, h: int) -> str:
+    """Name of the shared variable holding ``Solid(color, xysize=(w, h))``."""
+    size = f"{w}x{h}".replace("-", "m")
+    return f"scene_solid_{color.lstrip('#').lower()}_{size}"
+
+def _collect_layer_solids(layers, refw: int, refh: int, out: set) -> None:
+    for layer in layers:
+        if layer.type == "color":
+            out.add((layer.color, refw, refh))
+        elif layer.type == "group":
+            _collect_layer_solids(layer.children, refw, refh, out)
+
+def scene_solids(sc: Scene, project: Project) -> set:
+    """``(color, w, h)`` of every ``Solid`` the scene's screen references.
+
+    Mirrors what ``_render_scene`` emits so the tables file can build them
+    without rendering unchanged scenes.
+    """
+    out: set = set()
+    _collect_layer_solids(sc.layers, project.width, project.height, out)
+    for h in sc.hotspots:
+        _, _, w, hh = h.rect
+        if h.highlight:
+            out.add((OUTLINE_COLOR, w, hh))
+        out.add((OUTLINE_COLOR, w, 1))
+        out.add((OUTLINE_COLOR, 1, hh))
+    return out
+
+def _is_static(layer: Layer) -> bool:
+    """An image or color layer drawn unconditionally, so it never changes at runtime."""
+    return layer.type in ("image", "color") and not layer.visible_if and not layer.variants
+
+def _layer_runs(layers) -> Iterator[Layer | Tuple[Layer, ...]]:
+    """``layers`` in order, each run of two or more adjacent static layers as one tuple."""
+    run: List[Layer] = []
+    for layer in layers:
+        if _is_static(layer):
+            run.append(layer)
+            continue
+        if run:
+            yield tuple(run) if len(run) > 1 else run[0]
+            run = []
+        yield layer
+    if run:
+        yield tuple(run) if len(run) > 1 else run[0]
+
+def _static_define(run: Tuple[Layer, ...], refw: int, refh: int) -> Tuple[str, str]:
+    """``(name, expression)`` of the ``Fixed`` that draws ``run`` like consecutive ``add``s.
+
+    The name is derived from the expression, so equal runs in any scenes
+    (and inputs) share one variable built in the tables file.
+    """
+    parts = []
+    for layer in run:
+        if layer.type == "image":
+            child = f'"{layer.image}"'
+        else:
+            child = f"{_solid_name(layer.color, refw, refh)}, alpha={layer.alpha}"
+        ax, ay = layer.anchor
+        parts.append(
+            f"    Transform({child}, xpos={layer.xpos}, ypos={layer.ypos}, anchor=({ax}, {ay}), "
+            f"zoom={layer.zoom}, rotate={layer.rotate}),\n"
+        )
+    expr = f"Fixed(\n{''.join(parts)}    xysize=({refw}, {refh}))"
+    return f"scene_static_{text_hash(expr)[:12]}", expr
+
+def _collect_layer_statics(layers, refw: int, refh: int, out: Dict[str, str]) -> None:
+    for item in _layer_runs(layers):
+        if isinstance(item, tuple):
+            name, expr = _static_define(item, refw, refh)
+            out[name] = expr
+        elif item.type == "group":
+            _collect_layer_statics(item.children, refw, refh, out)
+
+def scene_statics(sc: Scene, project: Project) -> Dict[str, str]:
+    """``{name: expression}`` of every precomposed static layer run of the scene.
+
+    Like ``scene_solids``, lets the tables file build them without
+    rendering unchanged scenes.
+    """
+    out: Dict[str, str] = {}
+    _collect_layer_statics(sc.layers, project.width, project.height, out)
+    return out
+
+def displayables_saved(layers) -> int:
+    """How many fewer displayables the screen shows thanks to precomposed runs."""
+    saved = 0
+    for item in _layer_runs(layers):
+        if isinstance(item, tuple):
+            saved += len(item) - 1
+        elif item.type == "group":
+            saved += displayables_saved(item.children)
+    return saved
+
+def _emit_layers(em: Emitter, item: Layer | Tuple[Layer, ...], refw: int, refh: int) -> None:
+    """Emit one item of ``_layer_runs``: a run as a single ``add`` of its precomposed ``Fixed``."""
+    if isinstance(item, tuple):
+        em.line(f"add {_static_define(item, refw, refh)[0]}")
+    else:
+        _emit_layer(em, item, refw, refh)
+
+def _emit_layer(em: Emitter, layer: Layer, refw: int, refh: int) -> None:
+    t = layer.type
+    vis_if = layer.visible_if
+    if t == "group":
+        if vis_if:
+            em.line(f"if {vis_if}:")
+            with em.indent():
+                em.line("fixed:")
+        else:
+            em.line("fixed:")
+        with em.indent():
+            for item in _layer_runs(layer.children):
+                _emit_layers(em, item, refw, refh)
+        return
     if t == "image":
-        base_image = layer["image"]
+        base_image = layer.image
         # variants via ConditionSwitch
-        if "variants" in layer and layer["variants"]:
-            lines = ["add ConditionSwitch("]
-            for v in layer["variants"]:
-                lines.append(f'    "{v["if"]}", "{v["image"]}",')
-            lines.append(f'    True, "{base_image}")')
-            add_line = "\n".join(lines)
+        if layer.variants:
+            add_lines = ["add ConditionSwitch("]
+            for cond, image in layer.variants:
+                add_lines.append(f'    "{cond}", "{image}",')
+            add_lines.append(f'    True, "{base_image}")')
         else:
-            add_line = f'add "{base_image}"'
+            add_lines = [f'add "{base_image}"']
     elif t == "color":
-        color = layer["color"]
-        alpha = layer["alpha"]
-        add_line = f'add Solid("{color}", xysize ({refw},{refh})) alpha {alpha}'
-    elif t == "group":
-        code = []
-        if vis_if:
-            code.append(f"if {vis_if}:")
-            prefix = _indent("fixed:")
-            code.append(prefix)
-        else:
-            code.append("fixed:")
-        for ch in layer["children"]:
-            code.append(_indent(_layer_to_code(ch, refw, refh, relative, depth + 1), 4))
-        return "\n".join(code)
+        add_lines = [f"add {_solid_name(layer.color, refw, refh)} alpha {layer.alpha}"]
     else:
-        add_line = ""
+        add_lines = [""]
     # wrap with position/transform
-    posx = int(round(pos.get("x", 0.5) * refw if relative else pos.get("x", 0)))
-    posy = int(round(pos.get("y", 0.5) * refh if relative else pos.get("y", 0)))
+    ax, ay = layer.anchor
     tr = (
-        f"at Transform(xpos={posx}, ypos={posy}, anchor=( {anchor.get('x', 0.5)}, {anchor.get('y', 0.5)} ), "
-        f"zoom={zoom}, rotate={rot})"
+        f"at Transform(xpos={layer.xpos}, ypos={layer.ypos}, anchor=( {ax}, {ay} ), "
+        f"zoom={layer.zoom}, rotate={layer.rotate})"
     )
+    add_lines[-1] = f"{add_lines[-1]} {tr}"
 
-    body = f"{add_line} {tr}\n"
     if vis_if:
-        return f"if {vis_if}:\n    {body}"
-    return body
-
-def _hotspot_button(
-    rect: Tuple[int, int, int, int],
-    tooltip: str | None,
-    hover: dict | None,
-    action_code: str,
-) -> str:
-    x, y, w, h = rect
-    # simple semi-transparent overlay + outline
+        em.line(f"if {vis_if}:")
+        with em.indent():
+            em.line(add_lines[0])
+        # ConditionSwitch continuation lines sit inside its parentheses
+        em.lines(add_lines[1:])
+    else:
+        em.lines(add_lines)
+
+def _hit_mask(hotspot: Hotspot, hit_cell: int):
+    """Exact hit-test bitmap for polygons and circles, ``None`` for rects or when disabled."""
+    if not hit_cell or hotspot.shape == "rect":
+        return None
+    if hotspot.shape == "polygon":
+        return polygon_mask(hotspot.points, hotspot.rect, hit_cell)
+    return circle_mask(hotspot.circle, hotspot.rect, hit_cell)
+
+def _emit_hotspot_button(em: Emitter, hotspot: Hotspot, mask_name: str | None = None) -> None:
+    x, y, w, h = hotspot.rect
+    tooltip = hotspot.tooltip
+    # simple semi-transparent overlay + outline, all shared Solids (see scene_solids)
     hover_lines = []
-    if hover and hover.get("highlight", False):
-        opacity = hover.get("opacity", 0.12)
-        hover_lines.append(f"add Solid('#FFFFFF', xysize ({w},{h})) alpha {opacity}")
+    if hotspot.highlight:
+        hover_lines.append(f"add {_solid_name(OUTLINE_COLOR, w, h)} alpha {hotspot.opacity}")
     # Outline (approximate dashed with thin solid)
-    hover_lines.append(f"add Solid('#FFFFFF', xysize ({w},1))")        # top
-    hover_lines.append(f"add Solid('#FFFFFF', xysize ({w},1)) ypos {h-1}") # bottom
-    hover_lines.append(f"add Solid('#FFFFFF', xysize (1,{h}))")        # left
-    hover_lines.append(f"add Solid('#FFFFFF', xysize (1,{h})) xpos {w-1}") # right
-
-    tooltip_lines = ""
-    if tooltip:
-        tooltip_lines = (
-            f"hovered SetField(store, 'scene_tooltip', _('{tooltip}')) "
-            "unhovered SetField(store, 'scene_tooltip', None)"
-        )
+    edge_h = _solid_name(OUTLINE_COLOR, w, 1)
+    edge_v = _solid_name(OUTLINE_COLOR, 1, h)
+    hover_lines.append(f"add {edge_h}")              # top
+    hover_lines.append(f"add {edge_h} ypos {h-1}")   # bottom
+    hover_lines.append(f"add {edge_v}")              # left
+    hover_lines.append(f"add {edge_v} xpos {w-1}")   # right
 
-    hover_block = _indent("\n".join(hover_lines), 16)
-    return f"""
-    button:
-        xpos {x} ypos {y} xsize {w} ysize {h}
-        focus_mask True
-        {tooltip_lines}
-        action {action_code}
-        hovered:
-            fixed:
-{hover_block}
-    """.rstrip()
-
-def _action_to_code(act: Dict[str, Any]) -> str:
-    t = act["type"]
+    em.line()
+    with em.indent():
+        em.line("button:")
+        with em.indent():
+            em.line(f"xpos {x} ypos {y} xsize {w} ysize {h}")
+            em.line(f"focus_mask {mask_name or True}")
+            if tooltip:
+                em.line(
+                    f"hovered SetField(store, 'scene_tooltip', _('{tooltip}')) "
+                    "unhovered SetField(store, 'scene_tooltip', None)"
+                )
+            em.line(f"action {_action_to_code(hotspot.action)}")
+            em.line("hovered:")
+            with em.indent():
+                em.line("fixed:")
+                with em.indent():
+                    em.lines(hover_lines)
+
+def _action_to_code(act: Action) -> str:
+    t = act.type
     if t == "go_scene":
-        scene_id = act["scene_id"]
-        transition = _transition_code(act.get("transition"))
-        action = f"[SetField(store,'_next_scene','{scene_id}'), Jump('scene__internal__go')]"
+        transition = _transition_code(act.transition)
+        action = f"[SetField(store,'_next_scene','{act.target}'), Jump('scene__internal__go')]"
         return f"{action} {transition}".rstrip()
     if t == "jump_label":
-        label = act["label"]
-        return f"Jump('{label}')"
+        return f"Jump('{act.target}')"
     if t == "call_label":
-        label = act["label"]
-        return f"Call('{label}')"
+        return f"Call('{act.target}')"
     if t == "call_screen":
-        screen = act["screen"]
-        params = act.get("params", {})
-        if params:
+        if act.kwargs:
             # serialize params as kwargs
-            kwargs = ", ".join([f"{k}={repr(v)}" for k, v in params.items()])
-            return f"CallScreen('{screen}', {kwargs})"
-        return f"CallScreen('{screen}')"
+            kwargs = ", ".join([f"{k}={repr(v)}" for k, v in act.kwargs])
+            return f"CallScreen('{act.target}', {kwargs})"
+        return f"CallScreen('{act.target}')"
     if t == "function":
-        name = act["name"]
-        args = act.get("args", [])
-        kwargs = act.get("kwargs", {})
-        args_s = ", ".join([repr(a) for a in args])
-        kwargs_s = ", ".join([f"{k}={repr(v)}" for k, v in kwargs.items()])
+        args_s = ", ".join([repr(a) for a in act.args])
+        kwargs_s = ", ".join([f"{k}={repr(v)}" for k, v in act.kwargs])
         join = ", ".join([s for s in [args_s, kwargs_s] if s])
-        return f"Function({name}{', ' + join if join else ''})"
+        return f"Function({act.target}{', ' + join if join else ''})"
     return "NullAction()"
 
-def generate_rpy(data: Dict[str, Any]) -> Dict[str, str]:
-    """Return dict: { filename: content }"""
-    project = data["project"]
-    refw = int(project["reference_resolution"]["width"])
-    refh = int(project["reference_resolution"]["height"])
-    relative = project["coords_mode"] == "relative"
-
-    files: Dict[str, str] = {}
-    # Common helpers file
-    helpers = []
-    helpers.append(
-        "# AUTOGENERATED – DO NOT EDIT\ninit python:\n    scene_tooltip = None\n    _next_scene = None\n"
-    )
-    helpers.append(
-        textwrap.dedent(
-            """
-    screen scene_tooltip_overlay():
-        if scene_tooltip:
-            frame:
-                align (0.98, 0.06)
-                padding (8,6)
-                text scene_tooltip
+HELPERS_FILE = "_gen/scene_helpers.rpy"
+DEFAULT_INPUT_NAME = "scenes"
+
+def tables_file(input_name: str = DEFAULT_INPUT_NAME) -> str:
+    """Per-input helpers file with the solids, precomposed layers and scene tables of one input."""
+    return f"_gen/scene_helpers_{input_name}.rpy"
+
+def _render_helpers() -> str:
+    """Shared runtime helpers, the same for every input written to one output dir.
+
+    ``scene_labels`` and ``scene_neighbour_images`` start empty here and are
+    filled by the ``tables_file`` of each input.
     """
-        )
-    )
-    helpers.append(
-        textwrap.dedent(
-            """
-    label scene__internal__go:
-        # Internal redirect used by go_scene actions
-        if _next_scene is None:
-            return
-        $ _sc = _next_scene
-        $ _next_scene = None
-        jump expression f"show_{{_sc}}"
+    em = Emitter()
+    em.line("# AUTOGENERATED – DO NOT EDIT")
+    em.line("init python:")
+    with em.indent():
+        em.line("scene_tooltip = None")
+        em.line("_next_scene = None")
+    em.line()
+    # runs before the scene files' ``define``s that build the masks
+    em.line("init -1 python:")
+    with em.indent():
+        em.line("class SceneHitMask(object):")
+        with em.indent():
+            em.line('"""Precomputed hotspot bitmap used as focus_mask: one lookup per event."""')
+            em.line()
+            em.line("def __init__(self, cols, rows, cell, data):")
+            with em.indent():
+                em.lines([
+                    "self.cols = cols",
+                    "self.rows = rows",
+                    "self.cell = cell",
+                    "self.bits = bytearray.fromhex(data)",
+                ])
+            em.line()
+            em.line("def __call__(self, x, y):")
+            with em.indent():
+                em.lines([
+                    "c = int(x) // self.cell",
+                    "r = int(y) // self.cell",
+                    "if c < 0 or r < 0 or c >= self.cols or r >= self.rows:",
+                    "    return False",
+                    "i = r * self.cols + c",
+                    "return bool(self.bits[i >> 3] >> (i & 7) & 1)",
+                ])
+        em.line()
+        em.line("def scene_predict_neighbours(sid):")
+        with em.indent():
+            em.line("renpy.start_predict(*scene_neighbour_images.get(sid, ()))")
+        em.line()
+        em.line("def scene_stop_predict(sid):")
+        with em.indent():
+            em.line("renpy.stop_predict(*scene_neighbour_images.get(sid, ()))")
+        em.line()
+        em.line("# filled at init by the scene_helpers_<input>.rpy of every input")
+        em.line("scene_labels = {}")
+        em.line("scene_neighbour_images = {}")
+    em.line()
+    em.line("screen scene_tooltip_overlay():")
+    with em.indent():
+        em.line("if scene_tooltip:")
+        with em.indent():
+            em.line("frame:")
+            with em.indent():
+                em.line("align (0.98, 0.06)")
+                em.line("padding (8,6)")
+                em.line("text scene_tooltip")
+    em.line()
+    em.line("label scene__internal__go:")
+    with em.indent():
+        em.line("# Internal redirect used by go_scene actions")
+        em.line("if _next_scene is None:")
+        with em.indent():
+            em.line("return")
+        em.line("$ _sc = _next_scene")
+        em.line("$ _next_scene = None")
+        em.line("jump expression scene_labels[_sc]")
+    return em.getvalue()
+
+def _render_tables(
+    solids: Iterable[Tuple[str, int, int]] = (), index: SceneIndex | None = None,
+    statics: Dict[str, str] | None = None,
+) -> str:
+    """The ``tables_file`` of one input.
+
+    Adds the input's scenes to the ``show_<id>`` dispatch table and their
+    neighbours' images from ``index``, then builds every distinct ``Solid``
+    and precomposed run of static layers (``statics``, after the solids they
+    use). Those are named by their content and assigned rather than
+    ``define``d, so inputs sharing them simply assign the same value twice.
     """
-        )
-    )
-    files["_gen/scene_helpers.rpy"] = "".join(helpers)
-
-    for sc in data["scenes"]:
-        sid = sc["id"]
-        enter_t = _transition_code(sc.get("enter_transition"))
-        # Screen
-        lines = []
-        lines.append("# AUTOGENERATED – DO NOT EDIT")
-        lines.append(f"screen scene_{sid}():")
-        lines.append("    zorder 10")
-        lines.append("    fixed:")
-        # layers
-        sorted_layers = sorted(sc["layers"], key=lambda L: int(L.get("zorder", 0)))
-        for layer in sorted_layers:
-            code = _layer_to_code(layer, refw, refh, relative)
-            lines.append(_indent(code, 8))
-        # hotspots
-        lines.append("    # Hotspots")
-        for h in sc["hotspots"]:
-            shape = h["shape"]
-            tooltip = h.get("tooltip")
-            hover = h.get("hover_effect", {})
-            act = _action_to_code(h["action"])
-            if shape == "rect":
-                rect = _coords_rect(h["rect"], refw, refh, relative)
-                btn = _hotspot_button(rect, tooltip, hover, act)
-                lines.append(_indent(btn, 4))
-            elif shape == "polygon":
-                # approximate by bounding box + function filter (done inside action is too complex),
-                # we still draw bbox and rely on UX simplicity.
-                rect = _bbox_points(h["points"], refw, refh, relative)
-                btn = _hotspot_button(rect, tooltip, hover, act)
-                lines.append(_indent(btn, 4))
-            else:  # circle
-                rect = _bbox_circle(h["circle"], refw, refh, relative)
-                btn = _hotspot_button(rect, tooltip, hover, act)
-                lines.append(_indent(btn, 4))
-        lines.append("")
-        # Label to show scene
-        lbl = []
-        lbl.append(f"label show_{sid}:")
+    if index is None:
+        index = SceneIndex()
+    em = Emitter()
+    em.line("# AUTOGENERATED – DO NOT EDIT")
+    em.line("init python:")
+    with em.indent():
+        em.line("scene_labels.update({")
+        with em.indent():
+            em.lines([f'"{sid}": "show_{sid}",' for sid in index.links])
+        em.line("})")
+        em.line("scene_neighbour_images.update({")
+        with em.indent():
+            for sid in index.links:
+                images = "".join(f'"{image}", ' for image in index.neighbour_images(sid))
+                if images:
+                    em.line(f'"{sid}": ({images.rstrip()}),')
+        em.line("})")
+        # built once instead of on every screen evaluation
+        if solids:
+            em.line()
+            for color, w, h in sorted(solids):
+                em.line(f'{_solid_name(color, w, h)} = Solid("{color}", xysize=({w}, {h}))')
+        if statics:
+            em.line()
+            for name, expr in sorted(statics.items()):
+                em.lines(f"{name} = {expr}".split("\n"))
+    return em.getvalue()
+
+def scene_file(sid: str) -> str:
+    return f"_gen/scene_{sid}.rpy"
+
+def _mask_code(hotspot: Hotspot, hit_cell: int, cache: RenderCache | None) -> str | None:
+    """``SceneHitMask(...)`` for polygons and circles, ``None`` for rects or when disabled."""
+    if not hit_cell or hotspot.shape == "rect":
+        return None
+    key = (hotspot.mask_key(), hit_cell)
+    code = cache.get("mask", key) if cache is not None else None
+    if code is None:
+        mask = _hit_mask(hotspot, hit_cell)
+        code = f'SceneHitMask({mask.cols}, {mask.rows}, {mask.cell}, "{mask.hex()}")'
+        if cache is not None:
+            cache.put("mask", key, code)
+    return code
+
+def _render_scene(
+    sc: Scene, project: Project, hit_cell: int = DEFAULT_HIT_CELL, cache: RenderCache | None = None,
+) -> str:
+    sid = sc.id
+    refw, refh = project.width, project.height
+    em = Emitter()
+    em.line("# AUTOGENERATED – DO NOT EDIT")
+    saved = displayables_saved(sc.layers)
+    if saved:
+        em.line(f"# Static layers precomposed into scene_static_*: {saved} fewer displayables per screen update")
+    # Hit masks, built once at init instead of inside the screen
+    mask_names = []
+    for j, h in enumerate(sc.hotspots):
+        code = _mask_code(h, hit_cell, cache)
+        if code is None:
+            mask_names.append(None)
+            continue
+        name = f"scene_{sid}_hitmask_{j}"
+        em.line(f"define {name} = {code}")
+        mask_names.append(name)
+    if any(mask_names):
+        em.line()
+    # Screen
+    em.line(f"screen scene_{sid}():")
+    with em.indent():
+        em.line("zorder 10")
+        if scene_links(sc):
+            # start loading the images of scenes reachable from here
+            em.line(f'on "show" action Function(scene_predict_neighbours, "{sid}")')
+            em.line(f'on "hide" action Function(scene_stop_predict, "{sid}")')
+        em.line("fixed:")
+        # layers, static runs folded into one Fixed each; a top-level subtree
+        # repeated across scenes is rendered once
+        with em.indent():
+            for item in _layer_runs(sc.layers):
+                if cache is None:
+                    _emit_layers(em, item, refw, refh)
+                    continue
+                key = (
+                    tuple(L.render_key() for L in item) if isinstance(item, tuple) else item.render_key(),
+                    refw, refh,
+                )
+                text = cache.get("layer", key)
+                if text is None:
+                    mark = em.mark()
+                    _emit_layers(em, item, refw, refh)
+                    cache.put("layer", key, em.since(mark))
+                else:
+                    em.raw(text)
+        # hotspots; polygons and circles are clicked through their hit mask
+        em.line("# Hotspots")
+        for h, mask_name in zip(sc.hotspots, mask_names):
+            if cache is None:
+                _emit_hotspot_button(em, h, mask_name)
+                continue
+            # one entry serves every mask name: the text around the focus_mask value
+            focus = f"focus_mask {mask_name or True}\n"
+            key = h.render_key()
+            parts = cache.get("hotspot", key)
+            if parts is None:
+                mark = em.mark()
+                _emit_hotspot_button(em, h, mask_name)
+                before, _, after = em.since(mark).partition(focus)
+                cache.put("hotspot", key, (before + "focus_mask ", "\n" + after))
+            else:
+                em.raw(f"{parts[0]}{mask_name or True}{parts[1]}")
+    em.line()
+    em.line()
+    # Label to show scene
+    em.line(f"label show_{sid}:")
+    with em.indent():
         # choose a background layer if exists (first image layer at lowest z)
-        bg_image = None
-        for L in sorted_layers:
-            if L.get("type") == "image":
-                bg_image = L["image"]
-                break
+        bg_image = next((L.image for L in sc.layers if L.type == "image"), None)
         if bg_image:
-            lbl.append(f"    scene {bg_image} {enter_t}".rstrip())
+            em.line(f"scene {bg_image} {_transition_code(sc.enter_transition)}".rstrip())
         else:
-            lbl.append("    # scene has no base image layer")
-        lbl.append(f"    show screen scene_{sid}")
-        lbl.append("    show screen scene_tooltip_overlay")
-        lbl.append("    $ renpy.pause(0)  # allow interaction")
-        lbl.append("    return")
-
-        files[f"_gen/scene_{sid}.rpy"] = "\n".join(lines) + "\n\n" + "\n".join(lbl) + "\n"
-    return files
+            em.line("# scene has no base image layer")
+        em.line(f"show screen scene_{sid}")
+        em.line("show screen scene_tooltip_overlay")
+        em.line("$ renpy.pause(0)  # allow interaction")
+        em.line("return")
+    return em.getvalue()
+
+def render_scene(
+    sc: Scene, project: Project, hit_cell: int = DEFAULT_HIT_CELL, render_cache: RenderCache | None = None,
+) -> Tuple[str, str]:
+    """Return ``(filename, content)`` of one parsed scene, reusing fragments in ``render_cache``."""
+    if render_cache is None or render_cache.max_entries <= 0:
+        return scene_file(sc.id), _render_scene(sc, project, hit_cell)
+    content = _render_scene(sc, project, hit_cell, render_cache)
+    render_cache.add(render_cache.take())
+    return scene_file(sc.id), content
+
+def _render_chunk(
+    project: Project, hashed: bool, hit_cell: int, profile: bool, cache: RenderCache,
+    chunk: List[Tuple[Dict[str, Any] | Scene, str | None]],
+) -> Tuple[List[Tuple[str, str, str | None, set, Dict[str, str], tuple, tuple, tuple | None]], Counts]:
+    """Render ``(scene, previous_hash)`` pairs into ``(id, hash, content, solids, statics, links, images, stats)``.
+
+    Runs in pool workers; raw scene dicts are parsed here. Content is ``None``
+    for scenes whose hash is unchanged; what the tables file needs from them
+    is still reported. ``stats`` is a ``metrics.SceneStats`` when profiling.
+    Also returns the chunk's ``cache`` lookups (see ``RenderCache.take``); a
+    cache of ``max_entries`` 0 is not consulted at all.
+    """
+    memo = cache if cache.max_entries > 0 else None
+    out = []
+    for sc, previous in chunk:
+        probe = Probe() if profile else None
+        if not isinstance(sc, Scene):
+            sc = parse_scene(sc, project)
+        digest = scene_hash(sc) if hashed else ""
+        content = None if hashed and digest == previous else _render_scene(sc, project, hit_cell, memo)
+        stats = probe.stop(sc, content, displayables_saved(sc.layers)) if probe is not None else None
+        out.append((
+            sc.id, digest, content, scene_solids(sc, project), scene_statics(sc, project), scene_links(sc),
+            scene_images(sc), stats,
+        ))
+    return out, cache.take()
+
+def generate_stream(
+    project: Dict[str, Any] | Project,
+    scenes: Iterable[Dict[str, Any] | Scene],
+    manifest: Manifest | None = None,
+    jobs: int = 1,
+    hit_cell: int = DEFAULT_HIT_CELL,
+    metrics: Metrics | None = None,
+    render_cache: RenderCache | None = None,
+    input_name: str = DEFAULT_INPUT_NAME,
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(filename, content)`` pairs, rendering one scene at a time.
+
+    ``project`` and ``scenes`` may be raw JSON objects or the IR built by
+    ``validate``. With a ``manifest`` only files whose source hash changed
+    since the last run are rendered and yielded; once the iterator is
+    exhausted the manifest is updated and its ``removed`` attribute lists
+    files of scenes that no longer exist. ``jobs > 1`` renders chunks of
+    scenes in a process pool (``0`` = one worker per CPU); output and its
+    order are identical to the serial run. The shared ``HELPERS_FILE`` and
+    the input's ``tables_file(input_name)`` come last since the latter holds
+    tables built from all scenes; inputs written to one output dir need
+    distinct ``input_name``s. Polygon and circle hotspots get a
+    hit mask of ``hit_cell``-pixel cells (``0`` = click by bounding box).
+    ``metrics`` receives a row per scene. Layer subtrees, hotspots and hit
+    masks repeated across scenes are rendered once through ``render_cache``
+    (a new one per call by default; pool workers keep their own), whose
+    ``counts`` accumulate the lookups.
+    """
+    if render_cache is None:
+        render_cache = RenderCache()
+    if not isinstance(project, Project):
+        project = parse_project(project)
+    settings = settings_hash(project, hit_cell) if manifest is not None else ""
+    previous = manifest.entries if manifest is not None and manifest.settings == settings else {}
+    entries: Dict[str, str] = {}
+    solids: set = set()
+    statics: Dict[str, str] = {}
+    index = SceneIndex()
+
+    items = (
+        (sc, previous.get(scene_file(sc.id if isinstance(sc, Scene) else sc["id"])))
+        for sc in scenes
+    )
+    render = partial(_render_chunk, project, manifest is not None, hit_cell, metrics is not None, render_cache)
+    for _, (rendered, lookups) in imap_chunks(render, items, jobs):
+        render_cache.add(lookups)
+        for sid, digest, content, used, composed, links, images, stats in rendered:
+            if metrics is not None:
+                metrics.scene(sid, stats)
+            rel = scene_file(sid)
+            solids |= used
+            statics.update(composed)
+            index.add(sid, links, images)
+            if manifest is not None:
+                entries[rel] = digest
+            if content is not None:
+                yield rel, content
+
+    # Common runtime and this input's tables
+    tables = _render_tables(solids, index, statics)
+    for rel, content in ((HELPERS_FILE, _render_helpers()), (tables_file(input_name), tables)):
+        if manifest is not None:
+            entries[rel] = text_hash(content)
+        if manifest is None or not manifest.is_fresh(settings, rel, entries[rel]):
+            yield rel, content
+    if manifest is not None:
+        manifest.update(settings, entries)
+
+def iter_rpy(
+    data: Dict[str, Any] | Project, manifest: Manifest | None = None, jobs: int = 1,
+    hit_cell: int = DEFAULT_HIT_CELL, metrics: Metrics | None = None, render_cache: RenderCache | None = None,
+    input_name: str = DEFAULT_INPUT_NAME,
+) -> Iterator[Tuple[str, str]]:
+    """Lazily yield ``(filename, content)`` for a loaded project or its IR.
+
+    Files are produced one scene at a time so callers can write each one
+    before the next is rendered; see ``generate_stream`` for the other
+    arguments.
+    """
+    if isinstance(data, Project):
+        return generate_stream(data, data.scenes, manifest, jobs, hit_cell, metrics, render_cache, input_name)
+    return generate_stream(
+        data["project"], data["scenes"], manifest, jobs, hit_cell, metrics, render_cache, input_name,
+    )
+
+def generate_rpy(
+    data: Dict[str, Any] | Project, manifest: Manifest | None = None, jobs: int = 1,
+    hit_cell: int = DEFAULT_HIT_CELL, render_cache: RenderCache | None = None,
+    input_name: str = DEFAULT_INPUT_NAME,
+) -> Dict[str, str]:
+    """Return dict: { filename: content }
+
+    Holds every rendered file in memory; prefer ``iter_rpy`` for big projects.
+    """
+    return dict(iter_rpy(data, manifest, jobs, hit_cell, None, render_cache, input_name))
+
+def target_dir(project: Project) -> str:
+    """Subdirectory of the output for one target resolution, e.g. ``1920x1080``."""
+    return f"{project.width}x{project.height}"
+
+def generate_targets(
+    data: Dict[str, Any] | Sequence[Project], resolutions: Sequence[Tuple[int, int]] = (), jobs: int = 1,
+    hit_cell: int = DEFAULT_HIT_CELL, render_cache: RenderCache | None = None,
+    input_name: str = DEFAULT_INPUT_NAME,
+) -> Dict[str, str]:
+    """Return ``{"<W>x<H>/<filename>": content}`` for every target resolution.
+
+    ``data`` is a loaded project, read once for all ``resolutions``, or the
+    projects returned by ``validate_targets`` (``resolutions`` is then
+    unused).
+    """
+    projects = parse_targets(data, resolutions) if isinstance(data, dict) else data
+    if render_cache is None:
+        render_cache = RenderCache()
+    return {
+        f"{target_dir(project)}/{name}": content
+        for project in projects
+        for name, content in iter_rpy(project, None, jobs, hit_cell, None, render_cache, input_name)
+    }
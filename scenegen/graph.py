@@ -0,0 +1,69 @@
+"""Scene adjacency built from ``go_scene`` targets.
+
+The generator uses it for the ``show_<id>`` dispatch table and to predict
+the images of scenes reachable from the one on screen; the validator uses it
+to report ``scene_id`` targets that name no scene.
+"""
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from .ir import Layer, Scene
+
+
+def scene_links(sc: Scene) -> Tuple[Tuple[int, str], ...]:
+    """``(hotspot index, target scene id)`` of every ``go_scene`` action."""
+    return tuple((j, h.action.target) for j, h in enumerate(sc.hotspots) if h.action.type == "go_scene")
+
+
+def _collect_images(layers: Sequence[Layer], out: Dict[str, None]) -> None:
+    for layer in layers:
+        if layer.type == "image":
+            for _, image in layer.variants:
+                out[image] = None
+            out[layer.image] = None
+        elif layer.type == "group":
+            _collect_images(layer.children, out)
+
+
+def scene_images(sc: Scene) -> Tuple[str, ...]:
+    """Images of the scene's image layers and their variants, in draw order, without repeats."""
+    out: Dict[str, None] = {}
+    _collect_images(sc.layers, out)
+    return tuple(out)
+
+
+class SceneIndex:
+    """Scene ids in input order with their outgoing links and images."""
+
+    __slots__ = ("links", "images")
+
+    def __init__(self):
+        self.links: Dict[str, Tuple[Tuple[int, str], ...]] = {}
+        self.images: Dict[str, Tuple[str, ...]] = {}
+
+    def add(self, sid: str, links: Tuple[Tuple[int, str], ...], images: Tuple[str, ...]) -> None:
+        self.links[sid] = links
+        self.images[sid] = images
+
+    def add_scene(self, sc: Scene) -> None:
+        self.add(sc.id, scene_links(sc), scene_images(sc))
+
+    def neighbours(self, sid: str) -> List[str]:
+        """Known scenes one ``go_scene`` away from ``sid``, first link first."""
+        out: Dict[str, None] = {}
+        for _, target in self.links.get(sid, ()):
+            if target != sid and target in self.images:
+                out[target] = None
+        return list(out)
+
+    def neighbour_images(self, sid: str) -> Tuple[str, ...]:
+        out: Dict[str, None] = {}
+        for target in self.neighbours(sid):
+            out.update(dict.fromkeys(self.images[target]))
+        return tuple(out)
+
+    def dangling(self) -> Iterator[Tuple[int, str, int, str]]:
+        """``(scene index, scene id, hotspot index, target)`` of links to unknown scenes."""
+        for i, (sid, links) in enumerate(self.links.items()):
+            for j, target in links:
+                if target not in self.links:
+                    yield i, sid, j, target
@@ -0,0 +1,101 @@
+"""Build-time hit-test bitmaps for polygon and circle hotspots.
+
+A hotspot's bounding box is split into ``cell`` x ``cell`` pixel cells and
+each cell is marked when its centre lies inside the shape (even-odd rule for
+polygons). The bits are emitted as a ``SceneHitMask`` used as the button's
+``focus_mask``, so Ren'Py resolves a click with one index into a byte array.
+"""
+import math
+from typing import Callable, List, Sequence, Tuple
+
+# pixels per mask cell; 0 keeps the bounding-box-only behaviour
+DEFAULT_HIT_CELL = 4
+
+# inside intervals [a, b) of the shape along the horizontal line at a given y
+Spans = Callable[[float], List[Tuple[float, float]]]
+
+
+class HitMask:
+    """Row-major bitmap over a hotspot's bounding box, LSB-first within bytes."""
+
+    __slots__ = ("cols", "rows", "cell", "bits")
+
+    def __init__(self, cols: int, rows: int, cell: int, bits: bytearray):
+        self.cols = cols
+        self.rows = rows
+        self.cell = cell
+        self.bits = bits
+
+    def hit(self, x: float, y: float) -> bool:
+        """Same lookup as the generated ``SceneHitMask``; ``x``/``y`` relative to the box."""
+        c = int(x) // self.cell
+        r = int(y) // self.cell
+        if c < 0 or r < 0 or c >= self.cols or r >= self.rows:
+            return False
+        i = r * self.cols + c
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+
+    def hex(self) -> str:
+        return self.bits.hex()
+
+
+def _rasterize(rect: Tuple[int, int, int, int], cell: int, spans_at: Spans) -> HitMask:
+    x0, y0, w, h = rect
+    cols = -(-w // cell)
+    rows = -(-h // cell)
+    bits = bytearray((cols * rows + 7) // 8)
+    for r in range(rows):
+        base = r * cols
+        for a, b in spans_at(y0 + (r + 0.5) * cell):
+            # cells whose centre x0 + (c + 0.5) * cell falls in [a, b)
+            first = max(0, math.ceil((a - x0) / cell - 0.5))
+            last = min(cols, math.ceil((b - x0) / cell - 0.5))
+            for i in range(base + first, base + last):
+                bits[i >> 3] |= 1 << (i & 7)
+    return HitMask(cols, rows, cell, bits)
+
+
+def rect_spans(rect: Tuple[int, int, int, int]) -> Spans:
+    x, y, w, h = rect
+
+    def spans_at(sy: float) -> List[Tuple[float, float]]:
+        return [(x, x + w)] if y <= sy < y + h and w > 0 else []
+
+    return spans_at
+
+
+def polygon_spans(points: Sequence[Tuple[int, int]]) -> Spans:
+    """Even-odd rule, like the generated masks."""
+    points = list(points)
+    edges = list(zip(points, points[1:] + points[:1]))
+
+    def spans_at(sy: float) -> List[Tuple[float, float]]:
+        xs = sorted(
+            x1 + (sy - y1) * (x2 - x1) / (y2 - y1)
+            for (x1, y1), (x2, y2) in edges
+            if (y1 <= sy < y2) or (y2 <= sy < y1)
+        )
+        return list(zip(xs[0::2], xs[1::2]))
+
+    return spans_at
+
+
+def circle_spans(circle: Tuple[int, int, int]) -> Spans:
+    cx, cy, radius = circle
+
+    def spans_at(sy: float) -> List[Tuple[float, float]]:
+        dy = sy - cy
+        if abs(dy) >= radius:
+            return []
+        half = math.sqrt(radius * radius - dy * dy)
+        return [(cx - half, cx + half)]
+
+    return spans_at
+
+
+def polygon_mask(points: Sequence[Tuple[int, int]], rect: Tuple[int, int, int, int], cell: int) -> HitMask:
+    return _rasterize(rect, cell, polygon_spans(points))
+
+
+def circle_mask(circle: Tuple[int, int, int], rect: Tuple[int, int, int, int], cell: int) -> HitMask:
+    return _rasterize(rect, cell, circle_spans(circle))
@@ -0,0 +1,369 @@
+"""Compact intermediate representation of a scenes project.
+
+The raw JSON is parsed once into ``__slots__`` objects with defaults applied
+and coordinates resolved to pixels (per scene, in one batch: see ``coords``).
+``validate`` builds it while checking the input, and the generator renders
+from it. The classes pickle as their constructor arguments, which keeps pool
+transfers and the on-disk project cache (``cache``) small and quick to load.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .coords import CoordBatch, bboxes
+
+_EMPTY: Dict[str, Any] = {}
+_CENTER = {"x": 0.5, "y": 0.5}
+
+
+def frozen(value: Any) -> Any:
+    """Hashable form of a JSON value for render cache keys.
+
+    Lists and dicts become tuples. ``1``, ``1.0`` and ``True`` compare equal
+    but are written out differently, so floats and bools carry their type
+    (floats by ``repr``, which also separates ``-0.0`` and matches ``nan``).
+    """
+    t = type(value)
+    if t is list or t is tuple:
+        return (t.__name__, tuple(frozen(v) for v in value))
+    if t is dict:
+        return ("dict", tuple((k, frozen(v)) for k, v in value.items()))
+    if t is float:
+        return ("float", repr(value))
+    if t is bool:
+        return ("bool", value)
+    return value
+
+
+class Project:
+    """``width`` x ``height`` is the screen the pixels are resolved for.
+
+    ``reference`` is the input's ``reference_resolution``; it differs from the
+    screen only for projects built for another target resolution (``at``).
+    """
+
+    __slots__ = ("width", "height", "coords_mode", "relative", "scenes", "reference")
+
+    def __init__(self, width: int, height: int, coords_mode: str, scenes: list | None = None,
+                 reference: Tuple[int, int] | None = None):
+        self.width = width
+        self.height = height
+        self.coords_mode = coords_mode
+        self.relative = coords_mode == "relative"
+        self.scenes = scenes if scenes is not None else []
+        self.reference = reference if reference is not None else (width, height)
+
+    def __reduce__(self):
+        return Project, (self.width, self.height, self.coords_mode, self.scenes, self.reference)
+
+    def at(self, width: int, height: int) -> "Project":
+        """The same input (without scenes) resolved for a ``width`` x ``height`` screen."""
+        return Project(width, height, self.coords_mode, reference=self.reference)
+
+    def scale(self) -> Tuple[float, float]:
+        """Factors turning input coordinates into pixels: ``round(value * s)``."""
+        if self.relative:
+            return self.width, self.height
+        refw, refh = self.reference
+        return self.width / refw, self.height / refh
+
+
+class Action:
+    """A hotspot action; ``target`` is the scene id, label, screen or function name."""
+
+    __slots__ = ("type", "target", "transition", "args", "kwargs")
+
+    def __init__(self, type: str, target: str | None, transition: Tuple[str, Any] | None,
+                 args: tuple, kwargs: tuple):
+        self.type = type
+        self.target = target
+        self.transition = transition
+        self.args = args
+        self.kwargs = kwargs
+
+    def key(self) -> tuple:
+        return (self.type, self.target, self.transition, self.args, self.kwargs)
+
+    def render_key(self) -> tuple:
+        """``key`` with the JSON values frozen: args and params may hold lists and dicts."""
+        return (self.type, self.target, frozen(self.transition), frozen(self.args), frozen(self.kwargs))
+
+    def __reduce__(self):
+        return Action, self.key()
+
+
+class Hotspot:
+    """``rect`` is the pixel bounding box; ``points``/``circle`` keep the exact shape."""
+
+    __slots__ = ("id", "shape", "rect", "points", "circle", "tooltip", "highlight", "opacity", "action")
+
+    def __init__(self, id: str, shape: str, rect: Tuple[int, int, int, int], points, circle,
+                 tooltip: str | None, highlight: bool, opacity, action: Action):
+        self.id = id
+        self.shape = shape
+        self.rect = rect
+        self.points = points
+        self.circle = circle
+        self.tooltip = tooltip
+        self.highlight = highlight
+        self.opacity = opacity
+        self.action = action
+
+    def key(self) -> tuple:
+        return (self.id, self.shape, self.rect, self.points, self.circle, self.tooltip,
+                self.highlight, self.opacity, self.action.key())
+
+    def render_key(self) -> tuple:
+        """``key`` without the id, which the generated button does not contain."""
+        return (self.shape, self.rect, self.points, self.circle, self.tooltip,
+                self.highlight, frozen(self.opacity), self.action.render_key())
+
+    def mask_key(self) -> tuple:
+        """The resolved geometry, all ``int`` pixels, that the hit mask is built from."""
+        return (self.shape, self.points, self.circle, self.rect)
+
+    def __reduce__(self):
+        return Hotspot, (self.id, self.shape, self.rect, self.points, self.circle, self.tooltip,
+                         self.highlight, self.opacity, self.action)
+
+
+class Layer:
+    __slots__ = ("id", "type", "zorder", "visible_if", "image", "variants", "color", "alpha",
+                 "children", "xpos", "ypos", "anchor", "zoom", "rotate")
+
+    def __init__(self, id: str, type: str, zorder, visible_if: str | None, image: str | None,
+                 variants: tuple, color: str | None, alpha, children: tuple,
+                 xpos: int, ypos: int, anchor: tuple, zoom, rotate):
+        self.id = id
+        self.type = type
+        self.zorder = zorder
+        self.visible_if = visible_if
+        self.image = image
+        self.variants = variants
+        self.color = color
+        self.alpha = alpha
+        self.children = children
+        self.xpos = xpos
+        self.ypos = ypos
+        self.anchor = anchor
+        self.zoom = zoom
+        self.rotate = rotate
+
+    def key(self) -> tuple:
+        return (self.id, self.type, self.zorder, self.visible_if, self.image, self.variants,
+                self.color, self.alpha, tuple(ch.key() for ch in self.children),
+                self.xpos, self.ypos, self.anchor, self.zoom, self.rotate)
+
+    def render_key(self) -> tuple:
+        """``key`` without id and zorder (already applied as the order), down the subtree.
+
+        Equal subtrees of differently named layers render to the same text.
+        """
+        return (self.type, self.visible_if, self.image, self.variants,
+                self.color, frozen(self.alpha), tuple(ch.render_key() for ch in self.children),
+                self.xpos, self.ypos, frozen(self.anchor), frozen(self.zoom), frozen(self.rotate))
+
+    def __reduce__(self):
+        return Layer, (self.id, self.type, self.zorder, self.visible_if, self.image, self.variants,
+                       self.color, self.alpha, self.children, self.xpos, self.ypos, self.anchor,
+                       self.zoom, self.rotate)
+
+
+class Scene:
+    """``layers`` are sorted by zorder (stable), as they are drawn.
+
+    ``digest`` memoizes ``manifest.scene_hash``; it is not part of ``key``.
+    """
+
+    __slots__ = ("id", "enter_transition", "layers", "hotspots", "digest")
+
+    def __init__(self, id: str, enter_transition: Tuple[str, Any] | None, layers: tuple, hotspots: tuple,
+                 digest: str | None = None):
+        self.id = id
+        self.enter_transition = enter_transition
+        self.layers = layers
+        self.hotspots = hotspots
+        self.digest = digest
+
+    def key(self) -> tuple:
+        return (self.id, self.enter_transition, tuple(L.key() for L in self.layers),
+                tuple(h.key() for h in self.hotspots))
+
+    def __reduce__(self):
+        return Scene, (self.id, self.enter_transition, self.layers, self.hotspots, self.digest)
+
+
+def parse_project(project: Dict[str, Any]) -> Project:
+    """Build a ``Project`` (without scenes) from the raw ``project`` object."""
+    rr = project["reference_resolution"]
+    return Project(int(rr["width"]), int(rr["height"]), project["coords_mode"])
+
+
+def parse_resolution(text: str) -> Tuple[int, int]:
+    """``"1920x1080"`` -> ``(1920, 1080)``; raise ``ValueError`` for anything else."""
+    w, sep, h = text.lower().partition("x")
+    if not sep or not w.isdigit() or not h.isdigit() or int(w) <= 0 or int(h) <= 0:
+        raise ValueError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return int(w), int(h)
+
+
+def _transition(t: Dict[str, Any] | None) -> Tuple[str, Any] | None:
+    if not t:
+        return None
+    return t.get("type", "dissolve").lower(), t.get("duration", 0.2)
+
+
+def _layer(raw: Dict[str, Any], p: Project, batch: CoordBatch, pending: List[Tuple[Layer, int]]) -> Layer:
+    t = raw.get("type")
+    tx = raw.get("transform", _EMPTY)
+    pos = tx.get("pos", _CENTER)
+    anchor = tx.get("anchor", _CENTER)
+    default = 0.5 if p.relative else 0
+    variants = raw.get("variants")
+    children = raw["children"] if t == "group" else ()
+    layer = Layer(
+        raw.get("id"),
+        t,
+        raw.get("zorder", 0),
+        raw.get("visibility", _EMPTY).get("if"),
+        raw["image"] if t == "image" else None,
+        tuple((v["if"], v["image"]) for v in variants) if variants else (),
+        raw["color"] if t == "color" else None,
+        raw["alpha"] if t == "color" else None,
+        tuple(_layer(ch, p, batch, pending) for ch in children),
+        0,
+        0,
+        (anchor.get("x", 0.5), anchor.get("y", 0.5)),
+        tx.get("zoom", 1.0),
+        tx.get("rotate", 0),
+    )
+    pending.append((layer, batch.add(pos.get("x", default), pos.get("y", default))))
+    return layer
+
+def _action(raw: Dict[str, Any]) -> Action:
+    t = raw["type"]
+    if t == "go_scene":
+        return Action(t, raw["scene_id"], _transition(raw.get("transition")), (), ())
+    if t in ("jump_label", "call_label"):
+        return Action(t, raw["label"], None, (), ())
+    if t == "call_screen":
+        return Action(t, raw["screen"], None, (), tuple(raw.get("params", _EMPTY).items()))
+    if t == "function":
+        return Action(t, raw["name"], None, tuple(raw.get("args", ())), tuple(raw.get("kwargs", _EMPTY).items()))
+    return Action(t, None, None, (), ())
+
+
+def _hotspot(raw: Dict[str, Any], batch: CoordBatch, pending: List[Tuple[Hotspot, int, int]]) -> Hotspot:
+    shape = raw["shape"]
+    # geometry is stored in ``batch`` and filled in by ``_resolve``
+    if shape == "rect":
+        r = raw["rect"]
+        i = batch.add(r["x"], r["y"])
+        batch.add(r["w"], r["h"])
+        n = 2
+    elif shape == "polygon":
+        i = batch.add_points(raw["points"])
+        n = len(batch) - i
+    else:  # circle
+        c = raw["circle"]
+        i = batch.add(c["cx"], c["cy"])
+        batch.add(c["r"], 0)  # assume r in X
+        n = 2
+    hover = raw.get("hover_effect") or _EMPTY
+    spot = Hotspot(
+        raw["id"],
+        shape,
+        None,
+        None,
+        None,
+        raw.get("tooltip"),
+        bool(hover.get("highlight", False)),
+        hover.get("opacity", 0.12),
+        _action(raw["action"]),
+    )
+    pending.append((spot, i, n))
+    return spot
+
+
+def _resolve(xs: List[int], ys: List[int], layers: List[Tuple[Layer, int]],
+             spots: List[Tuple[Hotspot, int, int]]) -> None:
+    """Store the resolved pixels ``xs``/``ys`` of every gathered coordinate."""
+    for layer, i in layers:
+        layer.xpos = xs[i]
+        layer.ypos = ys[i]
+    polygons = []
+    for spot, i, n in spots:
+        if spot.shape == "rect":
+            spot.rect = (xs[i], ys[i], xs[i + 1], ys[i + 1])
+        elif spot.shape == "polygon":
+            spot.points = tuple(zip(xs[i:i + n], ys[i:i + n]))
+            polygons.append((spot, (i, i + n)))
+        else:
+            cx, cy, r = xs[i], ys[i], xs[i + 1]
+            spot.circle = (cx, cy, r)
+            spot.rect = (cx - r, cy - r, 2 * r, 2 * r)
+    for (spot, _), box in zip(polygons, bboxes(xs, ys, [span for _, span in polygons])):
+        spot.rect = box
+
+
+def parse_scene(raw: Dict[str, Any], project: Project) -> Scene:
+    """Build a ``Scene``; ``raw`` is assumed to be structurally valid."""
+    batch = CoordBatch()
+    pending_layers: List[Tuple[Layer, int]] = []
+    pending_spots: List[Tuple[Hotspot, int, int]] = []
+    layers = [_layer(L, project, batch, pending_layers) for L in raw["layers"]]
+    layers.sort(key=lambda L: int(L.zorder))
+    hotspots = tuple(_hotspot(h, batch, pending_spots) for h in raw["hotspots"])
+    _resolve(*batch.resolve(*project.scale()), pending_layers, pending_spots)
+    return Scene(raw["id"], _transition(raw.get("enter_transition")), tuple(layers), hotspots)
+
+
+def _copy_layer(L: Layer) -> Layer:
+    return Layer(L.id, L.type, L.zorder, L.visible_if, L.image, L.variants, L.color, L.alpha,
+                 tuple(map(_copy_layer, L.children)) if L.children else (), L.xpos, L.ypos, L.anchor, L.zoom, L.rotate)
+
+
+def _copy_hotspot(h: Hotspot) -> Hotspot:
+    # geometry fields are tuples and the action has none: only the object is new
+    return Hotspot(h.id, h.shape, h.rect, h.points, h.circle, h.tooltip, h.highlight, h.opacity, h.action)
+
+
+def parse_variants(raw: Dict[str, Any], projects: Sequence[Project]) -> List[Scene]:
+    """``parse_scene`` for each of ``projects``: one input at several resolutions.
+
+    The raw scene is read and its coordinates gathered once, then resolved
+    for every target in one batch; only the pixel fields differ between the
+    returned scenes.
+    """
+    batch = CoordBatch()
+    pending_layers: List[Tuple[Layer, int]] = []
+    pending_spots: List[Tuple[Hotspot, int, int]] = []
+    layers = [_layer(L, projects[0], batch, pending_layers) for L in raw["layers"]]
+    layers.sort(key=lambda L: int(L.zorder))
+    hotspots = tuple(_hotspot(h, batch, pending_spots) for h in raw["hotspots"])
+    sid, transition = raw["id"], _transition(raw.get("enter_transition"))
+    scenes = []
+    resolved = batch.resolve_many([p.scale() for p in projects])
+    for n, (xs, ys) in enumerate(resolved):
+        _resolve(xs, ys, pending_layers, pending_spots)
+        if n < len(resolved) - 1:
+            # the next target overwrites the pixels in place: keep a copy of these
+            scenes.append(Scene(sid, transition, tuple(_copy_layer(L) for L in layers),
+                                tuple(_copy_hotspot(h) for h in hotspots)))
+        else:
+            scenes.append(Scene(sid, transition, tuple(layers), hotspots))
+    return scenes
+
+
+def parse(data: Dict[str, Any]) -> Project:
+    """Build the whole ``Project`` from an already validated document."""
+    project = parse_project(data["project"])
+    project.scenes = [parse_scene(sc, project) for sc in data["scenes"]]
+    return project
+
+
+def parse_targets(data: Dict[str, Any], resolutions: Sequence[Tuple[int, int]]) -> List[Project]:
+    """``parse`` for each ``(width, height)`` of ``resolutions``, reading the document once."""
+    targets = [parse_project(data["project"]).at(w, h) for w, h in resolutions]
+    for variants in (parse_variants(sc, targets) for sc in data["scenes"]):
+        for target, sc in zip(targets, variants):
+            target.scenes.append(sc)
+    return targets
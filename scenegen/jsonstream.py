@@ -0,0 +1,163 @@
+"""Incremental reader for scenes JSON that keeps about one scene in memory."""
+from typing import Any, Dict, Iterator, TextIO
+import json, pathlib
+
+CHUNK_SIZE = 1 << 16
+_WS = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Pulls JSON tokens and values out of a text stream read in chunks."""
+
+    def __init__(self, fh: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, n: int) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(n)
+        if not chunk:
+            self.eof = True
+            return False
+        # drop the consumed prefix so the buffer never holds more than one value
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"expected {ch!r} at JSON offset ~{self.pos}, got {got or 'EOF'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # value cut by the chunk boundary: grow geometrically so a big
+                # value is re-scanned O(log n) times, not once per chunk
+                if self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                    continue
+                raise
+            if end == len(self.buf) and self._fill(self.chunk_size):
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return obj
+
+
+class SceneStream:
+    """Iterate ``scenes`` of a project file without loading the whole document.
+
+    ``header`` holds every top-level key except ``scenes``. It is complete up to
+    ``project`` on construction; keys placed after the scenes array are added
+    once iteration finishes. If ``scenes`` comes before ``project`` the file is
+    scanned once to read the header, then reopened to stream the scenes.
+    A ``scenes`` value that is not an array is stored in ``header`` as is.
+    """
+
+    def __init__(self, path: pathlib.Path, chunk_size: int = CHUNK_SIZE):
+        self.path = pathlib.Path(path)
+        self.chunk_size = chunk_size
+        self.header: Dict[str, Any] = {}
+        self.has_scenes = False
+        self._reader: _Reader | None = None
+        reader = self._open()
+        if self._seek_scenes(reader, self.header):
+            if "project" in self.header:
+                self._reader = reader
+                return
+            # project follows the scenes: skip them to finish the header first
+            for _ in self._iter_array(reader):
+                pass
+            self._read_keys(reader, self.header)
+            reader.fh.close()
+            reader = self._open()
+            if self._seek_scenes(reader, {}):
+                self._reader = reader
+                return
+        reader.fh.close()
+
+    def _open(self) -> _Reader:
+        reader = _Reader(self.path.open("r", encoding="utf-8"), self.chunk_size)
+        try:
+            reader.expect("{")
+        except ValueError:
+            reader.fh.close()
+            raise
+        return reader
+
+    def _seek_scenes(self, reader: _Reader, header: Dict[str, Any]) -> bool:
+        """Read keys into ``header`` until the scenes array is reached."""
+        while True:
+            key = self._next_key(reader)
+            if key is None:
+                return False
+            if key == "scenes" and reader.peek() == "[":
+                self.has_scenes = True
+                reader.pos += 1
+                return True
+            header[key] = reader.value()
+
+    def _read_keys(self, reader: _Reader, header: Dict[str, Any]) -> None:
+        while True:
+            key = self._next_key(reader)
+            if key is None:
+                return
+            header[key] = reader.value()
+
+    @staticmethod
+    def _next_key(reader: _Reader) -> str | None:
+        ch = reader.peek()
+        if ch == ",":
+            reader.pos += 1
+            ch = reader.peek()
+        if ch == "}":
+            reader.pos += 1
+            return None
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"expected an object key at JSON offset ~{reader.pos}")
+        reader.expect(":")
+        return key
+
+    @staticmethod
+    def _iter_array(reader: _Reader) -> Iterator[Any]:
+        if reader.peek() == "]":
+            reader.pos += 1
+            return
+        while True:
+            yield reader.value()
+            ch = reader.peek()
+            reader.pos += 1
+            if ch == "]":
+                return
+            if ch != ",":
+                raise ValueError(f"expected ',' or ']' at JSON offset ~{reader.pos - 1}")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        reader, self._reader = self._reader, None
+        if reader is None:
+            return
+        try:
+            yield from self._iter_array(reader)
+            self._read_keys(reader, self.header)
+        finally:
+            reader.fh.close()
@@ -0,0 +1,169 @@
+"""Hotspot layout check: hotspots off screen, overlapping or shadowed.
+
+Ren'Py hands a click to the topmost button and hotspots are drawn in input
+order, so where two overlap the later one takes the click, and a hotspot
+covered entirely by later ones can never be clicked. Shapes are compared
+exactly (polygon and circle outlines, not their boxes) one pixel row at a
+time, with the same scanline spans as the hit masks; only the on-screen part
+of a hotspot counts.
+
+Candidate pairs come from a uniform grid over the on-screen bounding boxes:
+each box is filed under the cells it touches, and a pair is tested once, in
+the cell holding the top-left corner of the two boxes' intersection. For
+hotspots of comparable size that is O(n + k) for k overlapping pairs rather
+than O(n^2).
+"""
+from collections import defaultdict
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from .hittest import Spans, circle_spans, polygon_spans, rect_spans
+from .ir import Hotspot, Project, Scene
+
+MIN_CELL = 16
+_EPS = 1e-9
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1
+Intervals = List[Tuple[float, float]]
+
+
+def _spans(h: Hotspot) -> Spans:
+    if h.shape == "polygon":
+        return polygon_spans(h.points)
+    if h.shape == "circle":
+        return circle_spans(h.circle)
+    return rect_spans(h.rect)
+
+
+def _clip(spans: Intervals, lo: float, hi: float) -> Intervals:
+    return [(max(a, lo), min(b, hi)) for a, b in spans if a < hi and b > lo]
+
+
+def _union(lists: Sequence[Intervals]) -> Intervals:
+    out: Intervals = []
+    for a, b in sorted(s for spans in lists for s in spans):
+        if out and a <= out[-1][1]:
+            if b > out[-1][1]:
+                out[-1] = (out[-1][0], b)
+        else:
+            out.append((a, b))
+    return out
+
+
+def _shared(a: Intervals, b: Intervals) -> float:
+    """Length of the intersection of two sorted lists of disjoint intervals."""
+    total = 0.0
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo = max(a[i][0], b[j][0])
+        hi = min(a[i][1], b[j][1])
+        if hi > lo:
+            total += hi - lo
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return total
+
+
+def _length(spans: Intervals) -> float:
+    return sum(b - a for a, b in spans)
+
+
+def _candidate_pairs(boxes: Sequence[Box | None], cell: int) -> Iterator[Tuple[int, int, Box]]:
+    """``(j, k, intersection)`` for ``j < k`` whose boxes overlap, each pair once."""
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for j, box in enumerate(boxes):
+        if box is None:
+            continue
+        x0, y0, x1, y1 = box
+        for gx in range(x0 // cell, (x1 - 1) // cell + 1):
+            for gy in range(y0 // cell, (y1 - 1) // cell + 1):
+                grid[gx, gy].append(j)
+    for (gx, gy), members in grid.items():
+        for n, j in enumerate(members):
+            ax0, ay0, ax1, ay1 = boxes[j]
+            for k in members[n + 1:]:
+                bx0, by0, bx1, by1 = boxes[k]
+                x0 = max(ax0, bx0)
+                y0 = max(ay0, by0)
+                x1 = min(ax1, bx1)
+                y1 = min(ay1, by1)
+                if x0 < x1 and y0 < y1 and x0 // cell == gx and y0 // cell == gy:
+                    yield j, k, (x0, y0, x1, y1)
+
+
+def _shared_area(a: Spans, b: Spans, box: Box) -> float:
+    x0, y0, x1, y1 = box
+    return sum(_shared(_clip(a(y + 0.5), x0, x1), _clip(b(y + 0.5), x0, x1)) for y in range(y0, y1))
+
+
+def _shadowed(spans: Spans, box: Box, above: List[Tuple[Spans, Box]]) -> bool:
+    """Whether every on-screen row of the shape is covered by the ``above`` shapes."""
+    x0, y0, x1, y1 = box
+    for y in range(y0, y1):
+        own = _clip(spans(y + 0.5), x0, x1)
+        if not own:
+            continue
+        cover = _union([s(y + 0.5) for s, (_, by0, _, by1) in above if by0 <= y < by1])
+        if _length(own) - _shared(own, cover) > _EPS:
+            return False
+    return True
+
+
+def scene_layout(sc: Scene, i: int, width: int, height: int) -> List[str]:
+    """Layout problems of the ``i``-th scene on a ``width`` x ``height`` screen."""
+    found: List[Tuple[int, int, str]] = []  # (hotspot, other hotspot, message), sorted at the end
+    hotspots = sc.hotspots
+    boxes: List[Box | None] = []
+    for j, h in enumerate(hotspots):
+        x, y, w, hh = h.rect
+        box = (max(x, 0), max(y, 0), min(x + w, width), min(y + hh, height))
+        if w <= 0 or hh <= 0:
+            found.append((j, -1, f"scenes[{i}].hotspots[{j}] '{h.id}': has no clickable area"))
+            box = None
+        elif box[0] >= box[2] or box[1] >= box[3]:
+            found.append((j, -1, f"scenes[{i}].hotspots[{j}] '{h.id}': lies outside the {width}x{height} screen"))
+            box = None
+        elif box != (x, y, x + w, y + hh):
+            found.append((j, -1, f"scenes[{i}].hotspots[{j}] '{h.id}': extends outside the {width}x{height} screen"))
+        boxes.append(box)
+
+    sizes = sorted(max(b[2] - b[0], b[3] - b[1]) for b in boxes if b is not None)
+    if len(sizes) < 2:
+        return [message for _, _, message in found]
+    cell = max(MIN_CELL, sizes[len(sizes) // 2])
+    spans = [_spans(h) if box is not None else None for h, box in zip(hotspots, boxes)]
+    overlaps: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for j, k, shared in _candidate_pairs(boxes, cell):
+        if hotspots[j].shape == "rect" and hotspots[k].shape == "rect":
+            area = float((shared[2] - shared[0]) * (shared[3] - shared[1]))
+        else:
+            area = _shared_area(spans[j], spans[k], shared)
+        if area >= 0.5:
+            overlaps[j].append((k, area))
+
+    for j, above in overlaps.items():
+        above.sort()
+        if _shadowed(spans[j], boxes[j], [(spans[k], boxes[k]) for k, _ in above]):
+            covering = ", ".join(f"hotspots[{k}] '{hotspots[k].id}'" for k, _ in above)
+            found.append((j, above[0][0], (
+                f"scenes[{i}].hotspots[{j}] '{hotspots[j].id}': covered by {covering} "
+                "drawn above it, can never be clicked"
+            )))
+            continue
+        for k, area in above:
+            found.append((j, k, (
+                f"scenes[{i}].hotspots[{j}] '{hotspots[j].id}': overlaps hotspots[{k}] '{hotspots[k].id}' "
+                f"on {round(area)} px; clicks there go to '{hotspots[k].id}'"
+            )))
+    found.sort(key=lambda f: f[:2])
+    return [message for _, _, message in found]
+
+
+def check_layout(project: Project) -> List[str]:
+    """``scene_layout`` of every scene, in order."""
+    return [
+        message
+        for i, sc in enumerate(project.scenes)
+        for message in scene_layout(sc, i, project.width, project.height)
+    ]
@@ -0,0 +1,109 @@
+"""Content-hash manifest used to regenerate only the scenes that changed."""
+from typing import Any, Dict, List
+import hashlib, json, os, pathlib
+
+from . import __version__
+from .ir import Project, Scene
+
+MANIFEST_NAME = "_gen/.scenegen_manifest.json"
+# bumped when unchanged input renders differently (2: precomposed static layers,
+# 3: per-input tables next to the shared helpers), so outputs of an older
+# generator are rebuilt rather than mixed with new ones
+OUTPUT_FORMAT = 3
+
+
+def _digest(payload: Any) -> str:
+    text = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def scene_hash(scene: Scene) -> str:
+    """Stable hash of a parsed scene (defaults applied, unused keys ignored)."""
+    if scene.digest is None:
+        scene.digest = hashlib.sha256(repr(scene.key()).encode("utf-8")).hexdigest()
+    return scene.digest
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def input_key(src: pathlib.Path) -> str:
+    """``"<stem>_<hash of the path>"``: names the per-input files of ``src`` in a shared output dir.
+
+    The path is taken relative to the working directory when possible, so
+    ``a/scenes.json`` and ``b/scenes.json`` get different keys that survive
+    moving the whole project.
+    """
+    try:
+        rel = os.path.relpath(src)
+    except ValueError:  # another drive on Windows
+        rel = os.path.abspath(src)
+    return f"{src.stem}_{text_hash(pathlib.PurePath(rel).as_posix())[:8]}"
+
+
+def input_manifest_name(src: pathlib.Path) -> str:
+    """Manifest of ``src`` in an output dir shared with other inputs."""
+    return f"_gen/.scenegen_manifest.{input_key(src)}.json"
+
+
+def settings_hash(project: Project, hit_cell: int = 0) -> str:
+    """Hash of the project settings, generator options (and version) that affect every file."""
+    return _digest(
+        {
+            "scenegen": __version__,
+            "format": OUTPUT_FORMAT,
+            "reference_resolution": [project.width, project.height],
+            "coords_mode": project.coords_mode,
+            "hit_cell": hit_cell,
+        }
+    )
+
+
+class Manifest:
+    """Maps generated files (relative to the output dir) to the hash of their source.
+
+    ``generate_rpy`` consults and updates it; after a run ``removed`` lists the
+    files whose scenes disappeared from the input.
+    """
+
+    def __init__(
+        self,
+        settings: str | None = None,
+        entries: Dict[str, str] | None = None,
+        name: str = MANIFEST_NAME,
+    ):
+        self.name = name
+        self.settings = settings
+        self.entries: Dict[str, str] = dict(entries or {})
+        self.removed: List[str] = []
+
+    def is_fresh(self, settings: str, rel: str, digest: str) -> bool:
+        return self.settings == settings and self.entries.get(rel) == digest
+
+    def update(self, settings: str, entries: Dict[str, str]) -> None:
+        self.removed = sorted(set(self.entries) - set(entries))
+        self.settings = settings
+        self.entries = entries
+
+    def drop_missing(self, outdir: pathlib.Path) -> None:
+        """Forget entries whose file was deleted so they get regenerated."""
+        self.entries = {rel: h for rel, h in self.entries.items() if (outdir / rel).exists()}
+
+    @classmethod
+    def load(cls, outdir: pathlib.Path, name: str = MANIFEST_NAME) -> "Manifest":
+        path = outdir / name
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            return cls(raw["settings"], raw["entries"], name)
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(name=name)
+
+    def save(self, outdir: pathlib.Path) -> pathlib.Path:
+        path = outdir / self.name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"settings": self.settings, "entries": self.entries}
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,178 @@
+"""Phase and per-scene instrumentation for ``--profile``.
+
+Phases nest (streaming interleaves reading, validation, rendering and
+writing), so time is charged to the innermost active phase only: totals are
+exclusive and add up to the run. With ``memory=True`` ``tracemalloc`` tracks
+the peak traced Python heap of every phase and rendered scene; it slows the
+run down, so it is opt-in. When profiling is off none of this is called.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import csv, json, pathlib, time, tracemalloc
+
+CSV_FIELDS = ["input", "kind", "name", "wall_ms", "cpu_ms", "peak_kib", "layers", "hotspots", "saved", "bytes", "rendered"]
+
+# (wall, cpu, render peak, peak before the render, layers, hotspots, bytes or None,
+# displayables saved by precomposed static layers); the peaks are traced bytes, or
+# None without tracemalloc
+SceneStats = Tuple[float, float, int | None, int | None, int, int, int | None, int]
+
+
+def count_layers(layers) -> int:
+    return sum(1 + count_layers(L.children) for L in layers)
+
+
+class Probe:
+    """Measures one scene where it is rendered (possibly in a pool worker)."""
+
+    __slots__ = ("_wall", "_cpu", "_before")
+
+    def __init__(self):
+        self._before = None
+        if tracemalloc.is_tracing():
+            self._before = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def stop(self, scene, content: str | None, saved: int = 0) -> SceneStats:
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        peak = tracemalloc.get_traced_memory()[1] if self._before is not None else None
+        size = None if content is None else len(content.encode("utf-8"))
+        return wall, cpu, peak, self._before, count_layers(scene.layers), len(scene.hotspots), size, saved
+
+
+class _Phase:
+    __slots__ = ("name", "wall", "cpu", "peak")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak = 0
+
+
+class _Span:
+    __slots__ = ("_metrics", "_name")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._metrics._push(self._name)
+
+    def __exit__(self, *exc) -> None:
+        self._metrics._pop()
+
+
+class Metrics:
+    """Timings of one input: ``phase`` spans and ``scene`` rows."""
+
+    def __init__(self, source: str = "", memory: bool = False):
+        self.source = source
+        self.memory = memory
+        self.phases: Dict[str, _Phase] = {}
+        self.scenes: List[Dict[str, Any]] = []
+        self._stack: List[_Phase] = []
+        self._mark = (0.0, 0.0)
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _switch(self) -> None:
+        """Charge the time (and heap peak) since the last switch to the active phase."""
+        now = (time.perf_counter(), time.process_time())
+        if self._stack:
+            top = self._stack[-1]
+            top.wall += now[0] - self._mark[0]
+            top.cpu += now[1] - self._mark[1]
+            if self.memory:
+                top.peak = max(top.peak, tracemalloc.get_traced_memory()[1])
+        if self.memory:
+            tracemalloc.reset_peak()
+        self._mark = now
+
+    def _push(self, name: str) -> None:
+        self._switch()
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = _Phase(name)
+        self._stack.append(phase)
+
+    def _pop(self) -> None:
+        self._switch()
+        self._stack.pop()
+
+    def phase(self, name: str) -> _Span:
+        """``with metrics.phase("validate"): ...``; re-entering adds to the same phase."""
+        return _Span(self, name)
+
+    def timed(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Yield from ``items``, charging the time spent producing them to ``name``."""
+        it = iter(items)
+        while True:
+            self._push(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._pop()
+            yield item
+
+    def scene(self, sid: str, stats: SceneStats) -> None:
+        wall, cpu, peak, before, layers, hotspots, size, saved = stats
+        if peak is not None and self._stack:
+            # the probe reset the heap peak; keep both halves for the enclosing phase
+            self._stack[-1].peak = max(self._stack[-1].peak, peak, before)
+        self.scenes.append({
+            "id": sid,
+            "wall_ms": wall * 1e3,
+            "cpu_ms": cpu * 1e3,
+            "peak_kib": None if peak is None else peak / 1024,
+            "layers": layers,
+            "hotspots": hotspots,
+            "saved": saved,
+            "bytes": size,
+            "rendered": size is not None,
+        })
+
+    def report(self) -> Dict[str, Any]:
+        phases = [
+            {"name": p.name, "wall_ms": p.wall * 1e3, "cpu_ms": p.cpu * 1e3,
+             "peak_kib": p.peak / 1024 if self.memory else None}
+            for p in self.phases.values()
+        ]
+        return {
+            "input": self.source,
+            "phases": phases,
+            "scenes": self.scenes,
+            "totals": {
+                "wall_ms": sum(p["wall_ms"] for p in phases),
+                "cpu_ms": sum(p["cpu_ms"] for p in phases),
+                "scenes": len(self.scenes),
+                "rendered": sum(1 for s in self.scenes if s["rendered"]),
+                "layers": sum(s["layers"] for s in self.scenes),
+                "hotspots": sum(s["hotspots"] for s in self.scenes),
+                "saved": sum(s["saved"] for s in self.scenes),
+                "bytes": sum(s["bytes"] or 0 for s in self.scenes),
+            },
+        }
+
+
+def write_report(path: pathlib.Path, reports: List[Dict[str, Any]]) -> None:
+    """Write reports of one run as CSV (``.csv``) or JSON (anything else)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() != ".csv":
+        path.write_text(json.dumps({"inputs": reports}, indent=2), encoding="utf-8")
+        return
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, CSV_FIELDS)
+        writer.writeheader()
+        for report in reports:
+            for p in report["phases"]:
+                writer.writerow({"input": report["input"], "kind": "phase", **p})
+            for s in report["scenes"]:
+                row = dict(s, input=report["input"], kind="scene", name=s["id"])
+                del row["id"]
+                writer.writerow(row)
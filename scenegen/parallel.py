@@ -0,0 +1,51 @@
+"""Chunked, order-preserving process pool helpers."""
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Tuple
+import collections, itertools, os
+
+CHUNK_SIZE = 32
+
+
+def resolve_jobs(jobs: int | None) -> int:
+    """``0``/``None`` means one worker per CPU."""
+    if not jobs:
+        return os.cpu_count() or 1
+    return max(1, jobs)
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def imap_chunks(
+    fn: Callable[[List[Any]], Any],
+    items: Iterable[Any],
+    jobs: int = 1,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[List[Any], Any]]:
+    """Yield ``(chunk, fn(chunk))`` for consecutive chunks of ``items`` in input order.
+
+    With ``jobs > 1`` chunks are processed in a process pool; at most
+    ``2 * jobs`` chunks are in flight, so lazy inputs stay lazy. ``fn`` must be
+    picklable (a module-level function or a ``functools.partial`` of one).
+    """
+    jobs = resolve_jobs(jobs)
+    if jobs == 1:
+        for chunk in chunked(items, chunk_size):
+            yield chunk, fn(chunk)
+        return
+    pending: Deque[Tuple[List[Any], Future]] = collections.deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for chunk in chunked(items, chunk_size):
+            pending.append((chunk, pool.submit(fn, chunk)))
+            if len(pending) >= 2 * jobs:
+                done, fut = pending.popleft()
+                yield done, fut.result()
+        while pending:
+            done, fut = pending.popleft()
+            yield done, fut.result()
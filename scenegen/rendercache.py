@@ -0,0 +1,123 @@
+"""In-memory memo of rendered scene fragments shared across scenes.
+
+Template-heavy projects repeat the same layer subtrees (UI overlays, frames),
+hotspots and hit masks in many scenes. Fragments are keyed by the structural
+``render_key()`` of their normalized IR (ids left out, since they do not
+reach the output; JSON values frozen by ``ir.frozen``) plus the settings
+they were rendered with (reference resolution, hit-mask cell), so equal
+subtrees render once and generation time follows the unique content rather
+than the total. Values are rendered text; the least recently used entries
+are evicted past ``max_entries``.
+
+Pool workers each keep their own cache for the life of the process (see
+``__reduce__``); hit and miss counts travel back with every chunk through
+``take``/``add``.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple
+import threading
+
+DEFAULT_MAX_ENTRIES = 4096
+
+# kind -> (hits, misses), evicted entries
+Counts = Tuple[Dict[str, Tuple[int, int]], int]
+
+_process_caches: Dict[int, "RenderCache"] = {}
+
+
+def _process_cache(max_entries: int) -> "RenderCache":
+    """This process's cache of that size; what a pickled ``RenderCache`` turns into."""
+    cache = _process_caches.get(max_entries)
+    if cache is None:
+        cache = _process_caches[max_entries] = RenderCache(max_entries)
+    return cache
+
+
+class RenderCache:
+    """LRU map from ``(kind, structural key)`` to rendered text.
+
+    ``counts`` holds the hits and misses per kind that were ``add``-ed;
+    lookups are counted separately until ``take`` hands them over. Threads
+    may share one cache; lookups then skip the lock, so their counts are
+    approximate.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.counts: Dict[str, List[int]] = {}
+        self.evicted = 0
+        self._entries: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+        self._pending: Dict[str, List[int]] = {}
+        self._pending_evicted = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __reduce__(self):
+        # workers reuse one cache across chunks instead of an empty copy per chunk
+        return _process_cache, (self.max_entries,)
+
+    def get(self, kind: str, key: Hashable) -> Any:
+        """The value stored under ``key`` or ``None``; counts a hit or a miss."""
+        value = self._entries.get((kind, key))
+        counts = self._pending.get(kind)
+        if counts is None:
+            counts = self._pending[kind] = [0, 0]
+        if value is None:
+            counts[1] += 1
+            return None
+        counts[0] += 1
+        try:
+            self._entries.move_to_end((kind, key))
+        except KeyError:
+            pass  # evicted by another thread meanwhile
+        return value
+
+    def put(self, kind: str, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        entries = self._entries
+        entries[kind, key] = value
+        while len(entries) > self.max_entries:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+            self._pending_evicted += 1
+
+    def take(self) -> Counts:
+        """Lookups counted since the last ``take``, for ``add`` (possibly in another process)."""
+        with self._lock:
+            counts = {kind: (hits, misses) for kind, (hits, misses) in self._pending.items()}
+            evicted = self._pending_evicted
+            self._pending = {}
+            self._pending_evicted = 0
+        return counts, evicted
+
+    def add(self, taken: Counts) -> None:
+        counts, evicted = taken
+        with self._lock:
+            for kind, (hits, misses) in counts.items():
+                total = self.counts.get(kind)
+                if total is None:
+                    total = self.counts[kind] = [0, 0]
+                total[0] += hits
+                total[1] += misses
+            self.evicted += evicted
+
+    def stats(self) -> Tuple[int, int, int]:
+        """``(hits, misses, evicted)`` over every kind, like ``ProjectCache.stats``."""
+        return (sum(c[0] for c in self.counts.values()), sum(c[1] for c in self.counts.values()), self.evicted)
+
+    def summary(self) -> str:
+        """``"83% of 1200 lookups (layer 95%, hotspot 80%, mask 75%), 0 evicted"``."""
+        hits, misses, evicted = self.stats()
+        kinds = ", ".join(
+            f"{kind} {_rate(h, m)}" for kind, (h, m) in sorted(self.counts.items())
+        )
+        return f"{_rate(hits, misses)} of {hits + misses} lookups ({kinds}), {evicted} evicted"
+
+
+def _rate(hits: int, misses: int) -> str:
+    return f"{100 * hits / (hits + misses):.0f}%" if hits + misses else "-"
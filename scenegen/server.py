@@ -0,0 +1,261 @@
+"""Long-lived generation server speaking JSON-RPC 2.0 (``scenegen serve``).
+
+Requests and responses are single lines of JSON, over stdin/stdout or a Unix
+socket. Methods:
+
+- ``validate {path | data, [max_errors], [layout]}`` validates a project
+  and keeps it as the session's current project; scenes unchanged since
+  the previous call are reused (see ``SceneCache``). A validation error
+  lists every message found in ``error.data.errors``. With ``layout: true``
+  the result also lists hotspot layout problems (see ``scenegen.layout``).
+- ``generate_scene {scene_id, [path | data]}`` returns one rendered scene.
+- ``generate_project {[path | data], [out_dir]}`` returns every file, or
+  writes them to ``out_dir`` through a manifest and tables file named
+  like the CLI's for the same input path (projects sent as ``data`` use
+  the defaults), so server and CLI runs into one dir stay incremental.
+
+Without ``path``/``data`` the ``generate_*`` methods use the current project.
+Requests run concurrently on a thread pool; responses carry the request id
+and may arrive out of order.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+import argparse, json, logging, pathlib, socketserver, sys, threading
+
+from .generator import DEFAULT_INPUT_NAME, generate_rpy, iter_rpy, render_scene
+from .hittest import DEFAULT_HIT_CELL
+from .ir import Project, Scene
+from .layout import check_layout
+from .manifest import MANIFEST_NAME, Manifest, input_key, input_manifest_name
+from .rendercache import RenderCache
+from .validator import SceneCache, ValidationError, validate
+from .writer import write_files
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# implementation-defined server errors
+VALIDATION_ERROR = -32001
+INPUT_ERROR = -32002
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class Session:
+    """Project state shared by every client of one server.
+
+    Validation replaces the current project under a lock; rendering and
+    writing run on the immutable IR outside it, taking the lock only to
+    read and store shared state. Writers to one output dir and input are
+    serialized by a lock of their own, since they share its manifest.
+    Rendered scenes are kept until their IR changes, and fragments they
+    share with other scenes (``RenderCache``) for the life of the server.
+    """
+
+    def __init__(self, hit_cell: int = DEFAULT_HIT_CELL):
+        self.hit_cell = hit_cell
+        self._lock = threading.Lock()
+        self._cache = SceneCache()
+        self._render_cache = RenderCache()
+        self._project: Project | None = None
+        self._source: pathlib.Path | None = None
+        self._scenes: Dict[str, Scene] = {}
+        self._rendered: Dict[str, Tuple[Scene, str, str]] = {}
+        self._manifests: Dict[Tuple[pathlib.Path, str], Manifest] = {}
+        self._writers: Dict[Tuple[pathlib.Path, str], threading.Lock] = {}
+        self.methods: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "validate": self.validate,
+            "generate_scene": self.generate_scene,
+            "generate_project": self.generate_project,
+        }
+
+    def _load(self, params: Dict[str, Any]) -> Tuple[Project, pathlib.Path | None, int]:
+        """``(project, path it was read from, scenes revalidated)``, read together under the lock."""
+        source = None
+        if "data" in params:
+            data = params["data"]
+        elif "path" in params:
+            source = pathlib.Path(params["path"])
+            try:
+                data = json.loads(source.read_text(encoding="utf-8"))
+            except OSError as e:
+                raise RpcError(INPUT_ERROR, f"Cannot read {params['path']}: {e}")
+            except ValueError as e:
+                raise RpcError(INPUT_ERROR, f"Invalid JSON in {params['path']}: {e}")
+        else:
+            with self._lock:
+                if self._project is None:
+                    raise RpcError(INVALID_PARAMS, "no project loaded: pass 'path' or 'data'")
+                return self._project, self._source, self._cache.checked
+        if not isinstance(data, dict):
+            raise RpcError(INVALID_PARAMS, "'data' must be a JSON object")
+        max_errors = params.get("max_errors", 1)
+        if not isinstance(max_errors, int):
+            raise RpcError(INVALID_PARAMS, "'max_errors' must be an integer")
+        with self._lock:
+            try:
+                project = validate(data, cache=self._cache, max_errors=max_errors)
+            except ValidationError as e:
+                raise RpcError(VALIDATION_ERROR, str(e), {"errors": e.errors})
+            self._project = project
+            self._source = source
+            self._scenes = {sc.id: sc for sc in project.scenes}
+            return project, source, self._cache.checked
+
+    def validate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if "data" not in params and "path" not in params:
+            raise RpcError(INVALID_PARAMS, "validate needs 'path' or 'data'")
+        project, _, checked = self._load(params)
+        result = {"scenes": [sc.id for sc in project.scenes], "revalidated": checked}
+        if params.get("layout"):
+            result["layout"] = check_layout(project)
+        return result
+
+    def generate_scene(self, params: Dict[str, Any]) -> Dict[str, str]:
+        sid = params.get("scene_id")
+        if not isinstance(sid, str):
+            raise RpcError(INVALID_PARAMS, "generate_scene needs a string 'scene_id'")
+        project, _, _ = self._load(params)
+        with self._lock:
+            sc = self._scenes.get(sid) if project is self._project else None
+            cached = self._rendered.get(sid)
+        if sc is None:
+            sc = next((s for s in project.scenes if s.id == sid), None)
+            if sc is None:
+                raise RpcError(INVALID_PARAMS, f"unknown scene '{sid}'")
+        if cached is not None and cached[0] is sc:
+            rel, content = cached[1], cached[2]
+        else:
+            rel, content = render_scene(sc, project, self.hit_cell, self._render_cache)
+            with self._lock:
+                self._rendered[sid] = (sc, rel, content)
+        return {"file": rel, "content": content}
+
+    def generate_project(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if "out_dir" in params and not isinstance(params["out_dir"], str):
+            raise RpcError(INVALID_PARAMS, "'out_dir' must be a string")
+        project, source, _ = self._load(params)
+        input_name = DEFAULT_INPUT_NAME if source is None else input_key(source)
+        if "out_dir" not in params:
+            return {"files": generate_rpy(project, None, 1, self.hit_cell, self._render_cache, input_name)}
+        outdir = pathlib.Path(params["out_dir"])
+        key = (outdir, MANIFEST_NAME if source is None else input_manifest_name(source))
+        with self._lock:
+            writing = self._writers.setdefault(key, threading.Lock())
+        with writing:
+            with self._lock:
+                manifest = self._manifests.get(key)
+            if manifest is None:
+                manifest = Manifest.load(outdir, key[1])
+            manifest.drop_missing(outdir)
+            files = iter_rpy(project, manifest, 1, self.hit_cell, None, self._render_cache, input_name)
+            writer = write_files(outdir, files, manifest)
+            with self._lock:
+                self._manifests[key] = manifest
+        return {"written": writer.written, "identical": writer.skipped, "removed": writer.removed}
+
+    def handle(self, line: str) -> str | None:
+        """Answer one request line; notifications (no ``id``) get no response."""
+        rid = None
+        notification = False
+        try:
+            try:
+                req = json.loads(line)
+            except ValueError as e:
+                raise RpcError(PARSE_ERROR, f"Parse error: {e}")
+            if not isinstance(req, dict) or req.get("jsonrpc") != "2.0" or not isinstance(req.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "Invalid request")
+            rid = req.get("id")
+            notification = "id" not in req
+            method = self.methods.get(req["method"])
+            if method is None:
+                raise RpcError(METHOD_NOT_FOUND, f"Method not found: {req['method']}")
+            params = req.get("params", {})
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params must be an object")
+            result = method(params)
+            response: Dict[str, Any] = {"jsonrpc": "2.0", "id": rid, "result": result}
+        except RpcError as e:
+            error = {"code": e.code, "message": str(e)}
+            if e.data is not None:
+                error["data"] = e.data
+            response = {"jsonrpc": "2.0", "id": rid, "error": error}
+        except Exception as e:
+            logging.exception("Request failed: %s", line[:200])
+            response = {"jsonrpc": "2.0", "id": rid, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        if notification:
+            return None
+        return json.dumps(response, ensure_ascii=False)
+
+
+def serve_stdio(session: Session, threads: int, stdin=None, stdout=None) -> None:
+    """Serve requests from ``stdin`` until EOF, answering on ``stdout``."""
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    out_lock = threading.Lock()
+
+    def answer(line: str) -> None:
+        response = session.handle(line)
+        if response is not None:
+            with out_lock:
+                stdout.write(response + "\n")
+                stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for line in stdin:
+            if line.strip():
+                pool.submit(answer, line)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for raw in self.rfile:
+            line = raw.decode("utf-8")
+            if not line.strip():
+                continue
+            response = self.server.session.handle(line)
+            if response is not None:
+                self.wfile.write(response.encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+
+class _SocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_socket(session: Session, path: pathlib.Path) -> None:
+    """Serve each connection on its own thread until interrupted."""
+    path.unlink(missing_ok=True)
+    with _SocketServer(str(path), _Handler) as server:
+        server.session = session
+        logging.info("Listening on %s", path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Server stopped")
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="scenegen serve", description="SceneGen JSON-RPC generation server")
+    p.add_argument("--socket", help="Unix socket path (default: stdin/stdout)")
+    p.add_argument("--threads", type=int, default=4, help="Requests handled at once in stdio mode")
+    p.add_argument(
+        "--hit-cell", type=int, default=DEFAULT_HIT_CELL,
+        help="Hit-mask cell size in pixels for polygon/circle hotspots (0 = click by bounding box)",
+    )
+    args = p.parse_args(argv)
+    session = Session(args.hit_cell)
+    if args.socket:
+        serve_socket(session, pathlib.Path(args.socket))
+    else:
+        serve_stdio(session, max(1, args.threads))
+    return 0
@@ -1,7 +1,35 @@
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from functools import partial
+import logging, re
+
+from .graph import SceneIndex, scene_links
+from .ir import Project, Scene, parse_project, parse_scene, parse_variants
+from .jsonstream import SceneStream
+from .parallel import imap_chunks, resolve_jobs
 
 class ValidationError(Exception):
-    pass
+    """``errors`` holds every message found: one, unless ``max_errors`` asked for more."""
+
+    def __init__(self, message: str, errors: List[str] | None = None):
+        super().__init__(message)
+        self.errors = [message] if errors is None else errors
+
+class SceneCache:
+    """Raw scenes and their IR kept between ``validate`` calls (watch mode).
+
+    A scene equal to its cached raw dict, under an unchanged ``project``
+    object, is neither checked nor parsed again: its cached ``Scene`` is
+    reused. The raw dicts are kept by reference, so callers must not mutate
+    them afterwards. ``checked`` counts the scenes the last call had to
+    validate.
+    """
+
+    __slots__ = ("project", "scenes", "checked")
+
+    def __init__(self):
+        self.project: Dict[str, Any] | None = None
+        self.scenes: Dict[str, Tuple[dict, Scene]] = {}
+        self.checked = 0
 
 def _expect_keys(obj: dict, required: List[str], ctx: str):
     for k in required:
@@ -18,21 +46,11 @@ def _expect_in(val, allowed: List[str], ctx: str):
     if val not in allowed:
         raise ValidationError(f"{ctx}: expected one of {allowed}, got {val}")
 
+_COLOR = re.compile(r"#(?:[0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})")
+
 def _is_color(s: str) -> bool:
     # very lenient hex check like #RRGGBB or #RRGGBBAA
-    if not isinstance(s, str) or not s.startswith("#"):
-        return False
-    hexpart = s[1:]
-    return len(hexpart) in (3, 4, 6, 8) and all(c in "0123456789abcdefABCDEF" for c in hexpart)
-
-def _expect_color(s: str, ctx: str):
-    if not _is_color(s):
-        raise ValidationError(f"{ctx}: expected hex color like #RRGGBB or #RRGGBBAA, got {s}")
-
-def _expect_number_range(val, lo: float, hi: float, ctx: str):
-    _expect_type(val, (int, float), ctx)
-    if not (lo <= float(val) <= hi):
-        raise ValidationError(f"{ctx}: expected in range [{lo}..{hi}], got {val}")
+    return isinstance(s, str) and _COLOR.fullmatch(s) is not None
 
 def _validate_project(project: Dict[str, Any]):
     _expect_keys(project, ["reference_resolution", "coords_mode"], "project")
@@ -43,110 +61,418 @@ def _validate_project(project: Dict[str, Any]):
     _expect_type(rr["height"], (int, float), "project.reference_resolution.height")
     _expect_in(project["coords_mode"], ["relative", "absolute"], "project.coords_mode")
 
-def _validate_layers(layers: List[dict], ctx: str = "layers"):
-    seen_ids = set()
-    for i, layer in enumerate(layers):
-        lctx = f"{ctx}[{i}]"
-        _expect_keys(layer, ["id", "type", "zorder"], lctx)
-        _expect_type(layer["id"], str, f"{lctx}.id")
-        if layer["id"] in seen_ids:
-            raise ValidationError(f"{lctx}.id duplicated: {layer['id']}")
-        seen_ids.add(layer["id"])
-        _expect_in(layer["type"], ["image", "color", "group"], f"{lctx}.type")
-        _expect_type(layer["zorder"], (int, float), f"{lctx}.zorder")
-
-        if layer["type"] == "image":
-            _expect_keys(layer, ["image"], f"{lctx} (image layer)")
-            _expect_type(layer["image"], str, f"{lctx}.image")
-        if layer["type"] == "color":
-            _expect_keys(layer, ["color", "alpha"], f"{lctx} (color layer)")
-            _expect_color(layer["color"], f"{lctx}.color")
-            _expect_number_range(layer["alpha"], 0.0, 1.0, f"{lctx}.alpha")
-        if layer["type"] == "group":
-            _expect_keys(layer, ["children"], f"{lctx} (group layer)")
-            _expect_type(layer["children"], list, f"{lctx}.children")
-            _validate_layers(layer["children"], ctx=f"{lctx}.children")
-
-        if "variants" in layer:
-            _expect_type(layer["variants"], list, f"{lctx}.variants")
-            for j, v in enumerate(layer["variants"]):
-                vctx = f"{lctx}.variants[{j}]"
-                _expect_keys(v, ["if", "image"], vctx)
-                _expect_type(v["if"], str, f"{vctx}.if")
-                _expect_type(v["image"], str, f"{vctx}.image")
-
-def _validate_hotspot(h: Dict[str, Any], coords_mode: str, ctx: str):
-    _expect_keys(h, ["id", "shape", "action"], ctx)
-    _expect_type(h["id"], str, f"{ctx}.id")
-    _expect_in(h["shape"], ["rect", "polygon", "circle"], f"{ctx}.shape")
-
-    if h["shape"] == "rect":
-        _expect_keys(h, ["rect"], f"{ctx} rect")
-        rect = h["rect"]
-        _expect_keys(rect, ["x", "y", "w", "h"], f"{ctx}.rect")
-        for k in ["x", "y", "w", "h"]:
-            _expect_type(rect[k], (int, float), f"{ctx}.rect.{k}")
-            if coords_mode == "relative":
-                _expect_number_range(rect[k], 0.0, 1.0, f"{ctx}.rect.{k}")
-    elif h["shape"] == "polygon":
-        _expect_keys(h, ["points"], f"{ctx} polygon")
+# Per-scene rules. SceneChecker formats a message only once a rule has
+# failed; the wording matches the ``_expect_*`` helpers above.
+_NUM = (int, float)
+_SCENE_KEYS = ("id", "layers", "hotspots")
+_LAYER_KEYS = ("id", "type", "zorder")
+_HOTSPOT_KEYS = ("id", "shape", "action")
+_RECT_KEYS = ("x", "y", "w", "h")
+_CIRCLE_KEYS = ("cx", "cy", "r")
+_LAYER_TYPES = ["image", "color", "group"]
+_SHAPES = ["rect", "polygon", "circle"]
+_ACTION_KEYS = {
+    "go_scene": "scene_id", "jump_label": "label", "call_label": "label", "call_screen": "screen", "function": "name",
+}
+_ACTION_TYPES = list(_ACTION_KEYS)
+
+def _missing(obj: dict, keys: Tuple[str, ...]) -> str | None:
+    for k in keys:
+        if k not in obj:
+            return k
+    return None
+
+def _type_error(ctx: str, val, names: str) -> str:
+    return f"{ctx}: expected type {names}, got {type(val).__name__}"
+
+def _range_error(ctx: str, val) -> str:
+    return f"{ctx}: expected in range [0.0..1.0], got {val}"
+
+def _point_errors(p, ctx: str, relative: bool) -> List[str]:
+    if not isinstance(p, (list, tuple)) or len(p) != 2:
+        return [f"{ctx} must be [x,y]"]
+    out = [_type_error(f"{ctx}.{k}", v, "int, float") for k, v in zip("xy", p) if not isinstance(v, _NUM)]
+    if relative:
+        out += [_range_error(f"{ctx}.{k}", v) for k, v in zip("xy", p) if isinstance(v, _NUM) and not 0.0 <= v <= 1.0]
+    return out
+
+# scene IR (None when it has errors), its messages, and its id once known to be a string
+# the parsed scene is a tuple of one Scene per target when the checker has targets
+SceneResult = Tuple[Scene | Tuple[Scene, ...] | None, List[str], str | None]
+
+class SceneChecker:
+    """Per-scene rules compiled once for a project.
+
+    ``check`` makes one pass over a raw scene. Clean input costs only
+    ``isinstance`` and membership tests. A failed rule appends its message
+    with the JSON path and the pass carries on past independent fields, so
+    every problem of the scene is reported. A structurally broken object
+    (wrong type, missing key) is not looked into further. Duplicate scene ids
+    span scenes and are left to the caller. With ``targets`` (projects from
+    ``project.at``) a passing scene is parsed for each of them at once.
+    """
+
+    __slots__ = ("project", "targets", "_relative", "_shapes", "_layer_types")
+
+    def __init__(self, project: Project, targets: Sequence[Project] = ()):
+        self.project = project
+        self.targets = tuple(targets)
+        self._relative = project.coords_mode == "relative"
+        self._shapes: Dict[str, Callable] = {"rect": self._rect, "polygon": self._polygon, "circle": self._circle}
+        self._layer_types: Dict[str, Callable] = {
+            "image": self._image_layer, "color": self._color_layer, "group": self._group_layer,
+        }
+
+    def __reduce__(self):
+        # pool workers rebuild the tables instead of unpickling bound methods
+        return SceneChecker, (self.project, self.targets)
+
+    def check(self, sc: Dict[str, Any], i: int) -> SceneResult:
+        ctx = f"scenes[{i}]"
+        if not isinstance(sc, dict):
+            return None, [_type_error(ctx, sc, "dict")], None
+        k = _missing(sc, _SCENE_KEYS)
+        if k is not None:
+            return None, [f"{ctx}: missing required key '{k}'"], None
+        sid = sc["id"]
+        if not isinstance(sid, str):
+            return None, [_type_error(f"{ctx}.id", sid, "str")], None
+
+        err: List[str] = []
+        layers = sc["layers"]
+        if isinstance(layers, list):
+            self._layers(layers, f"{ctx}.layers", err)
+        else:
+            err.append(_type_error(f"{ctx}.layers", layers, "list"))
+        hotspots = sc["hotspots"]
+        if isinstance(hotspots, list):
+            base = f"{ctx}.hotspots"
+            for j, h in enumerate(hotspots):
+                self._hotspot(h, base, j, err)
+        else:
+            err.append(_type_error(f"{ctx}.hotspots", hotspots, "list"))
+        if err:
+            return None, err, sid
+        if self.targets:
+            return tuple(parse_variants(sc, self.targets)), err, sid
+        return parse_scene(sc, self.project), err, sid
+
+    def _layers(self, layers: List[Any], base: str, err: List[str]):
+        seen_ids = set()
+        for i, layer in enumerate(layers):
+            if not isinstance(layer, dict):
+                err.append(_type_error(f"{base}[{i}]", layer, "dict"))
+                continue
+            k = _missing(layer, _LAYER_KEYS)
+            if k is not None:
+                err.append(f"{base}[{i}]: missing required key '{k}'")
+                continue
+            lid = layer["id"]
+            if not isinstance(lid, str):
+                err.append(_type_error(f"{base}[{i}].id", lid, "str"))
+            elif lid in seen_ids:
+                err.append(f"{base}[{i}].id duplicated: {lid}")
+            else:
+                seen_ids.add(lid)
+            t = layer["type"]
+            check = self._layer_types.get(t) if isinstance(t, str) else None
+            if check is None:
+                err.append(f"{base}[{i}].type: expected one of {_LAYER_TYPES}, got {t}")
+            if not isinstance(layer["zorder"], _NUM):
+                err.append(_type_error(f"{base}[{i}].zorder", layer["zorder"], "int, float"))
+            if check is not None:
+                check(layer, base, i, err)
+            if "variants" in layer:
+                self._variants(layer["variants"], base, i, err)
+
+    def _image_layer(self, layer: dict, base: str, i: int, err: List[str]):
+        if "image" not in layer:
+            err.append(f"{base}[{i}] (image layer): missing required key 'image'")
+        elif not isinstance(layer["image"], str):
+            err.append(_type_error(f"{base}[{i}].image", layer["image"], "str"))
+
+    def _color_layer(self, layer: dict, base: str, i: int, err: List[str]):
+        k = _missing(layer, ("color", "alpha"))
+        if k is not None:
+            err.append(f"{base}[{i}] (color layer): missing required key '{k}'")
+            return
+        if not _is_color(layer["color"]):
+            err.append(f"{base}[{i}].color: expected hex color like #RRGGBB or #RRGGBBAA, got {layer['color']}")
+        alpha = layer["alpha"]
+        if not isinstance(alpha, _NUM):
+            err.append(_type_error(f"{base}[{i}].alpha", alpha, "int, float"))
+        elif not 0.0 <= alpha <= 1.0:
+            err.append(_range_error(f"{base}[{i}].alpha", alpha))
+
+    def _group_layer(self, layer: dict, base: str, i: int, err: List[str]):
+        if "children" not in layer:
+            err.append(f"{base}[{i}] (group layer): missing required key 'children'")
+        elif not isinstance(layer["children"], list):
+            err.append(_type_error(f"{base}[{i}].children", layer["children"], "list"))
+        else:
+            self._layers(layer["children"], f"{base}[{i}].children", err)
+
+    def _variants(self, variants: Any, base: str, i: int, err: List[str]):
+        if not isinstance(variants, list):
+            err.append(_type_error(f"{base}[{i}].variants", variants, "list"))
+            return
+        for j, v in enumerate(variants):
+            if not isinstance(v, dict):
+                err.append(_type_error(f"{base}[{i}].variants[{j}]", v, "dict"))
+                continue
+            k = _missing(v, ("if", "image"))
+            if k is not None:
+                err.append(f"{base}[{i}].variants[{j}]: missing required key '{k}'")
+                continue
+            for key in ("if", "image"):
+                if not isinstance(v[key], str):
+                    err.append(_type_error(f"{base}[{i}].variants[{j}].{key}", v[key], "str"))
+
+    def _hotspot(self, h: Any, base: str, j: int, err: List[str]):
+        if not isinstance(h, dict):
+            err.append(_type_error(f"{base}[{j}]", h, "dict"))
+            return
+        k = _missing(h, _HOTSPOT_KEYS)
+        if k is not None:
+            err.append(f"{base}[{j}]: missing required key '{k}'")
+            return
+        if not isinstance(h["id"], str):
+            err.append(_type_error(f"{base}[{j}].id", h["id"], "str"))
+        shape = h["shape"]
+        check = self._shapes.get(shape) if isinstance(shape, str) else None
+        if check is None:
+            err.append(f"{base}[{j}].shape: expected one of {_SHAPES}, got {shape}")
+        else:
+            check(h, base, j, err)
+        self._action(h["action"], base, j, err)
+
+    def _numbers(self, obj: Any, keys: Tuple[str, ...], base: str, j: int, name: str, err: List[str]):
+        """Check the coordinates ``keys`` of ``obj``, the hotspot's ``name`` field."""
+        if not isinstance(obj, dict):
+            err.append(_type_error(f"{base}[{j}].{name}", obj, "dict"))
+            return
+        k = _missing(obj, keys)
+        if k is not None:
+            err.append(f"{base}[{j}].{name}: missing required key '{k}'")
+            return
+        relative = self._relative
+        for k in keys:
+            v = obj[k]
+            if not isinstance(v, _NUM):
+                err.append(_type_error(f"{base}[{j}].{name}.{k}", v, "int, float"))
+            elif relative and not 0.0 <= v <= 1.0:
+                err.append(_range_error(f"{base}[{j}].{name}.{k}", v))
+
+    def _rect(self, h: dict, base: str, j: int, err: List[str]):
+        if "rect" not in h:
+            err.append(f"{base}[{j}] rect: missing required key 'rect'")
+        else:
+            self._numbers(h["rect"], _RECT_KEYS, base, j, "rect", err)
+
+    def _circle(self, h: dict, base: str, j: int, err: List[str]):
+        if "circle" not in h:
+            err.append(f"{base}[{j}] circle: missing required key 'circle'")
+        else:
+            self._numbers(h["circle"], _CIRCLE_KEYS, base, j, "circle", err)
+
+    def _polygon(self, h: dict, base: str, j: int, err: List[str]):
+        if "points" not in h:
+            err.append(f"{base}[{j}] polygon: missing required key 'points'")
+            return
         pts = h["points"]
-        _expect_type(pts, list, f"{ctx}.points")
+        if not isinstance(pts, list):
+            err.append(_type_error(f"{base}[{j}].points", pts, "list"))
+            return
         if len(pts) < 3:
-            raise ValidationError(f"{ctx}.points must have >=3 points")
+            err.append(f"{base}[{j}].points must have >=3 points")
+            return
+        relative = self._relative
         for pi, p in enumerate(pts):
-            if (not isinstance(p, (list, tuple))) or len(p) != 2:
-                raise ValidationError(f"{ctx}.points[{pi}] must be [x,y]")
-            x, y = p
-            _expect_type(x, (int, float), f"{ctx}.points[{pi}].x")
-            _expect_type(y, (int, float), f"{ctx}.points[{pi}].y")
-            if coords_mode == "relative":
-                _expect_number_range(x, 0.0, 1.0, f"{ctx}.points[{pi}].x")
-                _expect_number_range(y, 0.0, 1.0, f"{ctx}.points[{pi}].y")
-    else:  # circle
-        _expect_keys(h, ["circle"], f"{ctx} circle")
-        c = h["circle"]
-        _expect_keys(c, ["cx", "cy", "r"], f"{ctx}.circle")
-        for k in ["cx", "cy", "r"]:
-            _expect_type(c[k], (int, float), f"{ctx}.circle.{k}")
-            if coords_mode == "relative":
-                _expect_number_range(c[k], 0.0, 1.0, f"{ctx}.circle.{k}")
-
-    # action
-    act = h["action"]
-    _expect_type(act, dict, f"{ctx}.action")
-    _expect_keys(act, ["type"], f"{ctx}.action")
-    _expect_in(act["type"], ["go_scene", "jump_label", "call_label", "call_screen", "function"], f"{ctx}.action.type")
-    if act["type"] == "go_scene":
-        _expect_keys(act, ["scene_id"], f"{ctx}.action(go_scene)")
-    elif act["type"] in ("jump_label", "call_label"):
-        _expect_keys(act, ["label"], f"{ctx}.action({act['type']})")
-    elif act["type"] == "call_screen":
-        _expect_keys(act, ["screen"], f"{ctx}.action(call_screen)")
-    elif act["type"] == "function":
-        _expect_keys(act, ["name"], f"{ctx}.action(function)")
-
-def validate(data: Dict[str, Any]) -> None:
-    # top-level
+            if isinstance(p, (list, tuple)) and len(p) == 2:
+                x, y = p
+                if isinstance(x, _NUM) and isinstance(y, _NUM) and (
+                    not relative or (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0)
+                ):
+                    continue
+            err += _point_errors(p, f"{base}[{j}].points[{pi}]", relative)
+
+    def _action(self, act: Any, base: str, j: int, err: List[str]):
+        if not isinstance(act, dict):
+            err.append(_type_error(f"{base}[{j}].action", act, "dict"))
+            return
+        if "type" not in act:
+            err.append(f"{base}[{j}].action: missing required key 'type'")
+            return
+        t = act["type"]
+        key = _ACTION_KEYS.get(t) if isinstance(t, str) else None
+        if key is None:
+            err.append(f"{base}[{j}].action.type: expected one of {_ACTION_TYPES}, got {t}")
+        elif key not in act:
+            err.append(f"{base}[{j}].action({t}): missing required key '{key}'")
+
+class _Errors:
+    """Messages found so far; raises ``ValidationError`` once ``limit`` is reached."""
+
+    __slots__ = ("messages", "limit")
+
+    def __init__(self, limit: int = 1):
+        self.messages: List[str] = []
+        self.limit = limit if limit > 0 else float("inf")
+
+    def extend(self, messages: Iterable[str]):
+        for m in messages:
+            self.messages.append(m)
+            if len(self.messages) >= self.limit:
+                self.raise_if_any()
+
+    def raise_if_any(self):
+        if self.messages:
+            raise ValidationError("\n".join(self.messages), list(self.messages))
+
+def _check_chunk(checker: SceneChecker, chunk: List[Tuple[int, dict]]) -> List[SceneResult]:
+    """Check ``(index, raw scene)`` pairs (pool worker)."""
+    return [checker.check(sc, i) for i, sc in chunk]
+
+def _checked(scenes: Iterable[dict], checker: SceneChecker, jobs: int) -> Iterator[Tuple[int, SceneResult]]:
+    if resolve_jobs(jobs) == 1:
+        for i, sc in enumerate(scenes):
+            yield i, checker.check(sc, i)
+        return
+    for chunk, results in imap_chunks(partial(_check_chunk, checker), enumerate(scenes), jobs):
+        for (i, _), result in zip(chunk, results):
+            yield i, result
+
+def _cached(scenes: List[dict], checker: SceneChecker, cache: SceneCache) -> Iterator[Tuple[int, SceneResult]]:
+    kept: Dict[str, Tuple[dict, Scene]] = {}
+    cache.checked = 0
+    for i, sc in enumerate(scenes):
+        hit = cache.scenes.get(sc.get("id")) if isinstance(sc, dict) else None
+        if hit is not None and hit[0] == sc:
+            result = (hit[1], [], sc["id"])
+        else:
+            result = checker.check(sc, i)
+            cache.checked += 1
+        if result[0] is not None:
+            kept[result[2]] = (sc, result[0])
+        yield i, result
+    cache.scenes = kept
+
+def _valid_scenes(
+    results: Iterable[Tuple[int, SceneResult]], errors: _Errors, index: SceneIndex, where: Dict[str, int],
+) -> Iterator[Scene]:
+    """Yield the scenes without errors; index every scene id for the link check."""
+    for i, (parsed, messages, sid) in results:
+        if sid is not None:
+            if sid in where:
+                messages = [f"scenes[{i}].id duplicated: {sid}", *messages]
+            else:
+                where[sid] = i
+                # links are all the check needs; a broken scene still counts as a target
+                linked = parsed[0] if isinstance(parsed, tuple) else parsed
+                index.add(sid, () if linked is None else scene_links(linked), ())
+        if messages:
+            errors.extend(messages)
+        else:
+            yield parsed
+
+def _check_links(index: SceneIndex, where: Dict[str, int]):
+    """Warn about ``go_scene`` targets that name no scene of this file.
+
+    Not an error: a project may be split across several inputs written to
+    one output dir, whose dispatch tables are merged at init.
+    """
+    for _, sid, j, target in index.dangling():
+        logging.warning(
+            "scenes[%d].hotspots[%d].action.scene_id: unknown scene '%s' (must come from another input)",
+            where[sid], j, target,
+        )
+
+def _check_root(data: Dict[str, Any]) -> Project:
     _expect_keys(data, ["version", "project", "scenes"], "root")
     _expect_type(data["version"], str, "version")
     _validate_project(data["project"])
     _expect_type(data["scenes"], list, "scenes")
+    return parse_project(data["project"])
+
+def _check_scenes(
+    data: Dict[str, Any], checker: SceneChecker, jobs: int, cache: SceneCache | None, max_errors: int,
+) -> list:
+    errors = _Errors(max_errors)
+    index = SceneIndex()
+    where: Dict[str, int] = {}
+    if cache is None:
+        results = _checked(data["scenes"], checker, jobs)
+    else:
+        if cache.project != data["project"]:
+            cache.scenes = {}
+        cache.project = data["project"]
+        results = _cached(data["scenes"], checker, cache)
+    scenes = list(_valid_scenes(results, errors, index, where))
+    _check_links(index, where)
+    errors.raise_if_any()
+    return scenes
+
+def validate(
+    data: Dict[str, Any], jobs: int = 1, cache: SceneCache | None = None, max_errors: int = 1,
+) -> Project:
+    """Raise ``ValidationError`` for the problems found.
+
+    Returns the project IR, built while checking, so callers can generate
+    without walking the raw JSON again. By default the first problem is
+    raised; ``max_errors`` collects up to that many (``0``: all) into one
+    error, each message starting with its JSON path. Problems with the root
+    or ``project`` are always raised at once. ``jobs > 1`` checks chunks of
+    scenes in a process pool and reports the same errors as a serial pass.
+    With a ``cache`` scenes unchanged since the previous call are reused,
+    and validation runs serially. ``go_scene`` targets missing from this
+    file are logged as warnings, since another input may define them.
+    """
+    project = _check_root(data)
+    project.scenes = _check_scenes(data, SceneChecker(project), jobs, cache, max_errors)
+    return project
+
+def validate_targets(
+    data: Dict[str, Any], resolutions: Sequence[Tuple[int, int]], jobs: int = 1, max_errors: int = 1,
+) -> List[Project]:
+    """``validate`` once and return the IR for each ``(width, height)`` of ``resolutions``.
+
+    Every scene is checked and read once; its coordinates are resolved for
+    all targets in one batch (``ir.parse_variants``). Absolute coordinates
+    scale from ``reference_resolution`` to each target, relative ones are
+    resolved against the target directly.
+    """
+    project = _check_root(data)
+    targets = [project.at(w, h) for w, h in resolutions]
+    variants = _check_scenes(data, SceneChecker(project, targets), jobs, None, max_errors)
+    for n, target in enumerate(targets):
+        target.scenes = [scenes[n] for scenes in variants]
+    return targets
+
+def validate_stream(stream: SceneStream, jobs: int = 1, max_errors: int = 1) -> Iterator[Scene]:
+    """Streaming counterpart of ``validate``: return an iterator that yields
+    the IR of each scene once it passes.
+
+    ``project`` is checked right away; root keys that may follow the scenes
+    array in the file are checked after the last scene, where collected
+    errors are raised, and unknown ``go_scene`` targets are logged there.
+    """
+    header = stream.header
+    _expect_keys(header, ["project"], "root")
+    _validate_project(header["project"])
+    if "scenes" in header:
+        _expect_type(header["scenes"], list, "scenes")
+    return _iter_stream_scenes(stream, parse_project(header["project"]), jobs, _Errors(max_errors))
 
-    coords_mode = data["project"]["coords_mode"]
-    scene_ids = set()
-    for i, sc in enumerate(data["scenes"]):
-        sctx = f"scenes[{i}]"
-        _expect_keys(sc, ["id", "layers", "hotspots"], sctx)
-        _expect_type(sc["id"], str, f"{sctx}.id")
-        if sc["id"] in scene_ids:
-            raise ValidationError(f"{sctx}.id duplicated: {sc['id']}")
-        scene_ids.add(sc["id"])
-
-        _expect_type(sc["layers"], list, f"{sctx}.layers")
-        _validate_layers(sc["layers"], f"{sctx}.layers")
-
-        _expect_type(sc["hotspots"], list, f"{sctx}.hotspots")
-        for j, h in enumerate(sc["hotspots"]):
-            _expect_type(h, dict, f"{sctx}.hotspots[{j}]")
-            _validate_hotspot(h, coords_mode, f"{sctx}.hotspots[{j}]")
+def _iter_stream_scenes(stream: SceneStream, project: Project, jobs: int, errors: _Errors) -> Iterator[Scene]:
+    index = SceneIndex()
+    where: Dict[str, int] = {}
+    yield from _valid_scenes(_checked(stream, SceneChecker(project), jobs), errors, index, where)
+    header = stream.header
+    if not stream.has_scenes:
+        errors.extend(["root: missing required key 'scenes'"])
+    elif "version" not in header:
+        errors.extend(["root: missing required key 'version'"])
+    elif not isinstance(header["version"], str):
+        errors.extend([_type_error("version", header["version"], "str")])
+    _check_links(index, where)
+    errors.raise_if_any()
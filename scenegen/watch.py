@@ -0,0 +1,88 @@
+"""Polling file watcher with debounce for ``--watch``.
+
+Only the standard library is used, so files are polled by ``(mtime, size)``
+instead of subscribing to OS notifications. A burst of saves triggers one
+callback once the file has been quiet for ``debounce`` seconds.
+"""
+from typing import Callable, Dict, Iterable, List, Tuple
+import logging, pathlib, time
+
+POLL_INTERVAL = 0.02
+DEFAULT_DEBOUNCE = 0.05
+
+Stamp = Tuple[int, int] | None
+
+
+def _stamp(path: pathlib.Path) -> Stamp:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    """Track stamps of the paths returned by ``sources`` and report settled changes.
+
+    ``sources`` is called on every poll so files added to a watched directory
+    are picked up. ``poll`` reports ``(path, seen)`` once the path's stamp
+    changed and then stayed the same for ``debounce`` seconds; ``seen`` is the
+    ``clock()`` time the last save of the burst was noticed. Missing files
+    (e.g. mid-save renames) are skipped until they reappear.
+    """
+
+    def __init__(
+        self,
+        sources: Callable[[], Iterable[pathlib.Path]],
+        debounce: float = DEFAULT_DEBOUNCE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.sources = sources
+        self.debounce = debounce
+        self.clock = clock
+        self._seen: Dict[pathlib.Path, Stamp] = {}
+        # path -> (stamp, time it was first observed)
+        self._pending: Dict[pathlib.Path, Tuple[Stamp, float]] = {}
+
+    def prime(self) -> List[pathlib.Path]:
+        """Record the current stamps without reporting them; return the paths."""
+        paths = list(self.sources())
+        for path in paths:
+            self._seen[path] = _stamp(path)
+        return paths
+
+    def poll(self) -> List[Tuple[pathlib.Path, float]]:
+        now = self.clock()
+        ready = []
+        current = set()
+        for path in self.sources():
+            current.add(path)
+            stamp = _stamp(path)
+            if stamp is None or stamp == self._seen.get(path):
+                self._pending.pop(path, None)
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != stamp:
+                self._pending[path] = (stamp, now)  # (re)start the quiet period
+            elif now - pending[1] >= self.debounce:
+                del self._pending[path]
+                self._seen[path] = stamp
+                ready.append((path, pending[1]))
+        for path in set(self._seen) - current:
+            del self._seen[path]
+        return ready
+
+    def run(
+        self,
+        on_change: Callable[[pathlib.Path, float], object],
+        interval: float = POLL_INTERVAL,
+        stop: Callable[[], bool] = lambda: False,
+    ) -> None:
+        """Call ``on_change`` for each settled change until ``stop()`` or Ctrl+C."""
+        try:
+            while not stop():
+                for path, seen in self.poll():
+                    on_change(path, seen)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logging.info("Watch stopped")
@@ -0,0 +1,152 @@
+"""Output writer that skips identical files and swaps changes in atomically."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+import hashlib, logging, os, pathlib, shutil, tempfile, threading
+
+from .manifest import Manifest
+
+
+def _sha256_file(path: pathlib.Path) -> bytes:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 16), b""):
+            h.update(block)
+    return h.digest()
+
+
+class OutputWriter:
+    """Collect generated files for ``outdir`` and apply them in one commit.
+
+    ``write`` compares the new bytes with the existing file (size first, then
+    hash) and drops identical content, so untouched files keep their mtime.
+    Changed files go to a staging directory inside ``outdir`` and are moved
+    into place with ``os.replace`` by ``commit``; ``abort`` leaves ``outdir``
+    untouched. With ``threads > 0`` comparing and staging run in a thread pool.
+    """
+
+    def __init__(self, outdir: pathlib.Path, threads: int = 0):
+        self.outdir = pathlib.Path(outdir)
+        self.written = 0
+        self.skipped = 0
+        self.removed = 0
+        self.changed: List[pathlib.Path] = []
+        self._staging: pathlib.Path | None = None
+        self._staged: List[Tuple[pathlib.Path, pathlib.Path]] = []
+        self._remove: List[pathlib.Path] = []
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=threads) if threads > 0 else None
+        # bound queued contents so a fast producer cannot buffer the whole output
+        self._slots = threading.BoundedSemaphore(4 * threads) if threads > 0 else None
+        self._futures: List[Future] = []
+
+    def _staging_dir(self) -> pathlib.Path:
+        with self._lock:
+            if self._staging is None:
+                self.outdir.mkdir(parents=True, exist_ok=True)
+                self._staging = pathlib.Path(tempfile.mkdtemp(prefix=".scenegen-staging-", dir=self.outdir))
+            return self._staging
+
+    def _stage(self, rel: str, data: bytes) -> None:
+        target = self.outdir / rel
+        try:
+            if target.stat().st_size == len(data) and _sha256_file(target) == hashlib.sha256(data).digest():
+                with self._lock:
+                    self.skipped += 1
+                return
+        except FileNotFoundError:
+            pass
+        staging = self._staging_dir()
+        with self._lock:
+            tmp = staging / f"{len(self._staged)}.tmp"
+            self._staged.append((tmp, target))
+        tmp.write_bytes(data)
+
+    def _stage_async(self, rel: str, data: bytes) -> None:
+        try:
+            self._stage(rel, data)
+        finally:
+            self._slots.release()
+
+    def write(self, rel: str, content: str) -> None:
+        data = content.encode("utf-8")
+        if self._pool is None:
+            self._stage(rel, data)
+            return
+        self._slots.acquire()
+        self._futures.append(self._pool.submit(self._stage_async, rel, data))
+
+    def remove(self, rel: str) -> None:
+        self._remove.append(self.outdir / rel)
+
+    def _drain(self) -> None:
+        futures, self._futures = self._futures, []
+        try:
+            for fut in futures:
+                fut.result()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def commit(self) -> None:
+        """Move staged files into place and delete removed ones."""
+        try:
+            self._drain()
+            for tmp, target in self._staged:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+                self.written += 1
+                self.changed.append(target)
+            for path in self._remove:
+                if path.exists():
+                    path.unlink()
+                    self.removed += 1
+                # Ren'Py keeps loading a compiled script whose source is gone
+                path.with_suffix(".rpyc").unlink(missing_ok=True)
+        finally:
+            self._cleanup()
+
+    def abort(self) -> None:
+        """Discard staged files; ``outdir`` is left as it was."""
+        try:
+            self._drain()
+        except Exception:
+            pass  # the caller is already handling the error that made it abort
+        finally:
+            self._cleanup()
+
+    def _cleanup(self) -> None:
+        if self._staging is not None:
+            shutil.rmtree(self._staging, ignore_errors=True)
+            self._staging = None
+        self._staged = []
+        self._remove = []
+
+
+def write_files(
+    outdir: pathlib.Path, files: Iterable[Tuple[str, str]], manifest: Manifest, io_threads: int = 0
+) -> OutputWriter:
+    """Write ``(relpath, content)`` pairs as they arrive, then prune stale files.
+
+    Nothing in ``outdir`` changes unless every file was produced.
+    """
+    writer = OutputWriter(outdir, io_threads)
+    produced = 0
+    try:
+        for rel, content in files:
+            writer.write(rel, content)
+            produced += 1
+        for rel in manifest.removed:
+            writer.remove(rel)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+    for path in writer.changed:
+        logging.info("Wrote %s", path)
+    manifest.save(outdir)
+    logging.info(
+        "Output %s: %d written, %d identical, %d unchanged, %d removed",
+        outdir, writer.written, writer.skipped, len(manifest.entries) - produced, writer.removed,
+    )
+    return writer
@@ -1,7 +1,13 @@
 
 """Utilities to generate Ren'Py scripts from JSON data."""
 
-from .converter import json_to_renpy, convert_file
-
-__all__ = ["json_to_renpy", "convert_file"]
+from .batch import convert_many
+from .converter import json_to_renpy, convert_file, convert_file_sharded, iter_renpy
+from .shards import write_shards
+from .stream import iter_dialogues
+
+__all__ = [
+    "json_to_renpy", "convert_file", "convert_file_sharded", "convert_many", "iter_renpy", "iter_dialogues",
+    "write_shards",
+]
 
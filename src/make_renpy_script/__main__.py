@@ -1,20 +1,74 @@
 from __future__ import annotations
 
 import argparse
+import glob
+import sys
 from pathlib import Path
 
-from .converter import convert_file
+from .batch import convert_many, expand_inputs, plan
+from .converter import convert_file, convert_file_sharded
 
 
-def main(argv: list[str] | None = None) -> None:
-    """Command line interface for the ``make_renpy_script`` package."""
+def main(argv: list[str] | None = None) -> int:
+    """Command line interface for the ``make_renpy_script`` package.
+
+    A single JSON file is converted as before. Several inputs, directories
+    or globs are converted as a batch over ``--jobs`` processes, mirroring
+    the input tree under ``--output``.
+    """
     parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("json_file", type=Path, help="Path to the JSON file to convert")
-    parser.add_argument("--output", "-o", type=Path, help="Optional output file path")
-    args = parser.parse_args(argv)
+    parser.add_argument(
+        "json_file", nargs="+",
+        help="JSON file to convert; or several files, directories (searched for *.json) and globs",
+    )
+    parser.add_argument(
+        "--output", "-o", type=Path,
+        help="Optional output file path (output directory with --shard-lines or several inputs)",
+    )
+    parser.add_argument(
+        "--shard-lines", type=int, default=0, metavar="N",
+        help="Split the script into labelled .rpy shards of N lines chained with jump (0 = one flat file)",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1,
+        help="Worker processes for several inputs (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="With several inputs, also convert files whose output is newer than the input",
+    )
+    # inputs may follow the options too: make-renpy -o out -j 8 en/ ru/
+    args = parser.parse_intermixed_args(argv)
+    if args.shard_lines < 0:
+        parser.error("--shard-lines must not be negative")
+
+    single = args.json_file[0]
+    if len(args.json_file) == 1 and not Path(single).is_dir() and not glob.has_magic(single):
+        if args.shard_lines:
+            report = convert_file_sharded(Path(single), args.output, args.shard_lines)
+            print(
+                f"{len(report.files)} files, {len(report.written)} written, "
+                f"{len(report.removed)} removed"
+            )
+        else:
+            convert_file(Path(single), args.output)
+        return 0
 
-    convert_file(args.json_file, args.output)
+    inputs = expand_inputs(args.json_file)
+    if not inputs:
+        print(f"No JSON files match {', '.join(args.json_file)}", file=sys.stderr)
+        return 2
+    try:
+        jobs = plan(inputs, args.output, args.shard_lines)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    summary = convert_many(jobs, args.jobs, args.force)
+    for src, error in summary.failed:
+        print(f"FAILED {src}: {error}", file=sys.stderr)
+    print(summary.line())
+    return 1 if summary.failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
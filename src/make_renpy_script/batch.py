@@ -0,0 +1,173 @@
+"""Convert many dialogue files at once: directories, globs and a process pool."""
+
+from __future__ import annotations
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .converter import convert_file, convert_file_sharded
+from .shards import script_name
+
+
+@dataclass(frozen=True)
+class Job:
+    """One input and where its output goes (a file, or a directory of shards).
+
+    ``name`` prefixes the labels and files of the shards; by default it is
+    derived from the stem of ``src``.
+    """
+
+    src: Path
+    out: Path
+    shard_lines: int = 0
+    name: str = ""
+
+    def script_name(self) -> str:
+        return self.name or script_name(self.src.stem)
+
+    def stamp(self) -> Path:
+        """The file whose mtime tells when ``src`` was last converted."""
+        if self.shard_lines:
+            return self.out / f".{self.script_name()}.shards.json"
+        return self.out
+
+
+@dataclass
+class Summary:
+    converted: list[Path] = field(default_factory=list)
+    skipped: list[Path] = field(default_factory=list)
+    failed: list[tuple[Path, str]] = field(default_factory=list)
+    bytes_in: int = 0
+    seconds: float = 0.0
+
+    def line(self) -> str:
+        n = len(self.converted)
+        rate = n / self.seconds if self.seconds else 0.0
+        mb = self.bytes_in / 1e6
+        mb_rate = mb / self.seconds if self.seconds else 0.0
+        return (
+            f"{n} converted, {len(self.skipped)} up to date, {len(self.failed)} failed "
+            f"in {self.seconds:.2f} s: {rate:.1f} files/s, {mb:.1f} MB at {mb_rate:.1f} MB/s"
+        )
+
+
+def expand_inputs(patterns: list[str]) -> list[tuple[Path, Path]]:
+    """Resolve files, directories (``**/*.json``) and globs to ``(path, path relative to its root)``.
+
+    The relative path is what the output tree mirrors: a directory with its
+    own name (``en/`` -> ``en/intro.json``, so ``en/`` and ``ru/`` do not
+    collide), below the fixed prefix of a glob, or just the name of a plain
+    file.
+    """
+    found: dict[Path, Path] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            root = Path(path.resolve().name)
+            matches = [(p, root / p.relative_to(path)) for p in sorted(path.rglob("*.json")) if p.is_file()]
+        elif glob.has_magic(pattern):
+            prefix = _fixed_prefix(pattern)
+            matches = [
+                (p, p.relative_to(Path(*prefix)) if prefix else p)
+                for p in sorted(Path(m) for m in glob.glob(pattern, recursive=True))
+                if p.is_file()
+            ]
+        else:
+            matches = [(path, Path(path.name))]
+        for p, rel in matches:
+            found.setdefault(p, rel)
+    return list(found.items())
+
+
+def _fixed_prefix(pattern: str) -> list[str]:
+    """Leading path components of ``pattern`` without glob characters."""
+    parts = []
+    for part in Path(pattern).parts[:-1]:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return parts
+
+
+def plan(
+    inputs: list[tuple[Path, Path]], out_dir: Path | None, shard_lines: int = 0,
+) -> list[Job]:
+    """One ``Job`` per input; outputs mirror the relative paths under ``out_dir``.
+
+    Without ``out_dir`` each output goes next to its input. Shards are named
+    after the whole relative path (``en/intro.json`` -> ``en_intro``), since
+    their labels share one namespace with every other input's. Raises
+    ``ValueError`` before anything is converted when two inputs would write
+    the same output.
+    """
+    jobs = []
+    owners: dict[Path, Path] = {}
+    for src, rel in inputs:
+        base = src.parent if out_dir is None else out_dir / rel.parent
+        if shard_lines:
+            job = Job(src, base, shard_lines, script_name("_".join(rel.with_suffix("").parts)))
+        else:
+            job = Job(src, base / f"{src.stem}.rpy")
+        other = owners.setdefault(job.stamp(), src)
+        if other != src:
+            raise ValueError(f"{other} and {src} would both write {job.out}")
+        jobs.append(job)
+    return jobs
+
+
+def is_fresh(job: Job) -> bool:
+    """Whether the output exists and is newer than the input."""
+    try:
+        return job.stamp().stat().st_mtime_ns > job.src.stat().st_mtime_ns
+    except OSError:
+        return False
+
+
+def run_job(job: Job) -> tuple[Path, int, str | None]:
+    """Convert one input; return ``(src, input bytes, error or None)`` (pool worker)."""
+    try:
+        size = job.src.stat().st_size
+        if job.shard_lines:
+            convert_file_sharded(job.src, job.out, job.shard_lines, job.script_name())
+        else:
+            job.out.parent.mkdir(parents=True, exist_ok=True)
+            convert_file(job.src, job.out)
+    except Exception as e:
+        return job.src, 0, f"{type(e).__name__}: {e}"
+    return job.src, size, None
+
+
+def resolve_jobs(jobs: int) -> int:
+    """``0`` means one worker per CPU."""
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def convert_many(jobs: list[Job], workers: int = 1, force: bool = False) -> Summary:
+    """Run ``jobs`` over ``workers`` processes, skipping fresh outputs unless ``force``."""
+    summary = Summary()
+    start = time.perf_counter()
+    todo = []
+    for job in jobs:
+        if not force and is_fresh(job):
+            summary.skipped.append(job.src)
+        else:
+            todo.append(job)
+    workers = min(resolve_jobs(workers), len(todo)) if todo else 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # small files are cheap: hand them out in batches to keep the pool busy
+            results = list(pool.map(run_job, todo, chunksize=max(1, len(todo) // (workers * 8))))
+    else:
+        results = [run_job(job) for job in todo]
+    for src, size, error in results:
+        if error is None:
+            summary.converted.append(src)
+            summary.bytes_in += size
+        else:
+            summary.failed.append((src, error))
+    summary.seconds = time.perf_counter() - start
+    return summary
@@ -3,26 +3,39 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Mapping, Any
+from typing import Any, Iterable, Iterator, Mapping
 import json
+import os
 
+from .shards import DEFAULT_SHARD_LINES, ShardReport, script_name, write_shards
+from .stream import iter_dialogues
 
-def json_to_renpy(data: Mapping[str, Any]) -> str:
-    """Convert a mapping describing dialogue into Ren'Py script text.
+# text buffered before each write to the output file
+WRITE_BUFFER = 1 << 20
 
-    The input mapping is expected to have a ``dialogues`` key with an
-    iterable of dictionaries containing ``speaker`` and ``text`` keys.
+
+def iter_renpy(dialogues: Iterable[Mapping[str, Any]]) -> Iterator[str]:
+    """Yield the Ren'Py script line, newline included, of each dialogue entry.
+
+    ``dialogues`` may be any iterable, e.g. ``iter_dialogues`` over a file,
+    so a script can be converted without holding it in memory.
     """
-    lines: list[str] = []
-    dialogues = data.get("dialogues", [])
     for entry in dialogues:
         speaker = entry.get("speaker", "")
         text = entry.get("text", "")
         if speaker:
-            lines.append(f'{speaker} "{text}"')
+            yield f'{speaker} "{text}"\n'
         else:
-            lines.append(text)
-    return "\n".join(lines) + ("\n" if lines else "")
+            yield text + "\n"
+
+
+def json_to_renpy(data: Mapping[str, Any]) -> str:
+    """Convert a mapping describing dialogue into Ren'Py script text.
+
+    The input mapping is expected to have a ``dialogues`` key with an
+    iterable of dictionaries containing ``speaker`` and ``text`` keys.
+    """
+    return "".join(iter_renpy(data.get("dialogues", [])))
 
 
 def load_json(path: Path) -> Mapping[str, Any]:
@@ -34,6 +47,11 @@ def load_json(path: Path) -> Mapping[str, Any]:
 def convert_file(in_path: Path, out_path: Path | None = None) -> Path:
     """Convert a JSON file to a Ren'Py script file.
 
+    The dialogues are read, converted and written one at a time through a
+    buffered file, so memory does not grow with the script. Output goes to a
+    temporary file next to ``out_path`` that replaces it only once the whole
+    input has been converted; on an error the previous output is kept.
+
     Parameters
     ----------
     in_path:
@@ -42,9 +60,40 @@ def convert_file(in_path: Path, out_path: Path | None = None) -> Path:
         Optional path for the output .rpy file. If not provided it will
         be placed next to ``in_path`` with the same stem.
     """
-    data = load_json(in_path)
-    script_text = json_to_renpy(data)
     if out_path is None:
         out_path = in_path.with_suffix(".rpy")
-    out_path.write_text(script_text, encoding="utf8")
+    tmp = out_path.with_name(f".{out_path.name}.tmp")
+    try:
+        with tmp.open("w", encoding="utf8", buffering=WRITE_BUFFER) as fh:
+            fh.writelines(iter_renpy(iter_dialogues(in_path)))
+        os.replace(tmp, out_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
     return out_path
+
+
+def convert_file_sharded(
+    in_path: Path, out_dir: Path | None = None, shard_lines: int = DEFAULT_SHARD_LINES,
+    name: str | None = None,
+) -> ShardReport:
+    """Convert a JSON file to labelled Ren'Py script shards (see ``shards``).
+
+    Parameters
+    ----------
+    in_path:
+        Path to the input JSON file.
+    out_dir:
+        Directory for the shards; defaults to the directory of ``in_path``.
+    shard_lines:
+        Dialogue entries per shard (and per label).
+    name:
+        Prefix of the labels and file names; defaults to one derived from
+        the stem of ``in_path``. Labels are global in Ren'Py, so scripts of
+        one game need distinct names.
+    """
+    if out_dir is None:
+        out_dir = in_path.parent
+    if name is None:
+        name = script_name(in_path.stem)
+    return write_shards(iter_dialogues(in_path), out_dir, name, shard_lines)
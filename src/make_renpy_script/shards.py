@@ -0,0 +1,160 @@
+"""Split a dialogue script into labelled ``.rpy`` shards chained with ``jump``.
+
+Every ``shard_lines`` entries go to ``<name>_<nnnn>.rpy`` as one label,
+``<name>_<nnnn>``, which jumps to the next shard's label; the last one
+returns. ``<name>_characters.rpy`` holds the entry label ``<name>``.
+Ren'Py recompiles only the files whose text changed, so an edit touches one
+shard instead of the whole script.
+
+A speaker that is an identifier names the game's own ``Character`` and is
+emitted as is, like in the flat script. Any other speaker can only be a
+display name; it is interned as ``<name>_who_<slug>_<hash>`` with a
+``define ... = Character("<speaker>")`` in the characters file. The name is
+derived from the speaker alone, so adding a speaker never renames the
+others and shards that did not change keep their text. A manifest, ``.<name>.shards.json``, keeps
+a hash of every file so unchanged shards are neither rewritten nor read
+back, and shards beyond the new last one are removed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Mapping
+
+DEFAULT_SHARD_LINES = 2000
+INDENT = "    "
+
+_NOT_IDENT = re.compile(r"[^0-9A-Za-z_]")
+
+
+@dataclass
+class ShardReport:
+    """Files of one sharded conversion; ``written`` is the subset rewritten."""
+
+    files: list[Path] = field(default_factory=list)
+    written: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+
+
+def script_name(stem: str) -> str:
+    """A Ren'Py identifier derived from a file stem, used for labels and files."""
+    name = _NOT_IDENT.sub("_", stem) or "dialogue"
+    return f"d_{name}" if name[0].isdigit() else name
+
+
+def speaker_name(name: str, speaker: str) -> str:
+    """What the shards of ``name`` say ``speaker`` with: itself if it is an identifier.
+
+    Otherwise the name of the ``define`` interned for it.
+    """
+    if speaker.isidentifier():
+        return speaker
+    slug = _NOT_IDENT.sub("_", speaker)
+    if slug != speaker:
+        slug = f"{slug}_{hashlib.sha1(speaker.encode('utf8')).hexdigest()[:6]}"
+    return f"{name}_who_{slug}"
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def _shards(
+    dialogues: Iterable[Mapping[str, Any]], name: str, shard_lines: int, speakers: dict[str, str],
+) -> Iterator[str]:
+    """Yield the text of each shard; fills ``speakers`` (speaker -> ``speaker_name``) on the way."""
+    lines: list[str] = []
+    n = 0
+    for entry in dialogues:
+        if len(lines) > shard_lines:
+            # full, and there is more: chain to the next shard
+            n += 1
+            lines.append(f"{INDENT}jump {name}_{n:04d}\n")
+            yield "".join(lines)
+            lines = []
+        if not lines:
+            lines.append(f"label {name}_{n:04d}:\n")
+        speaker = entry.get("speaker", "")
+        text = entry.get("text", "")
+        if speaker:
+            who = speakers.get(speaker)
+            if who is None:
+                who = speakers[speaker] = speaker_name(name, speaker)
+            lines.append(f'{INDENT}{who} "{text}"\n')
+        else:
+            lines.append(INDENT + text + "\n")
+    if lines:
+        lines.append(f"{INDENT}return\n")
+        yield "".join(lines)
+
+
+def _characters(name: str, speakers: Mapping[str, str], shards: int) -> str:
+    lines = [f"# Speakers of {name} without a Character of their own\n"]
+    for speaker, who in sorted(speakers.items(), key=lambda item: item[1]):
+        if who != speaker:
+            lines.append(f"define {who} = Character({json.dumps(speaker, ensure_ascii=False)})\n")
+    lines.append(f"\nlabel {name}:\n")
+    lines.append(f"{INDENT}jump {name}_0000\n" if shards else f"{INDENT}return\n")
+    return "".join(lines)
+
+
+def _write(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with tmp.open("w", encoding="utf8") as fh:
+            fh.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def write_shards(
+    dialogues: Iterable[Mapping[str, Any]], out_dir: Path, name: str,
+    shard_lines: int = DEFAULT_SHARD_LINES,
+) -> ShardReport:
+    """Write ``dialogues`` as shards of ``shard_lines`` entries into ``out_dir``.
+
+    ``dialogues`` is consumed once, one shard at a time, so an iterator over
+    a file keeps memory bounded by the shard size. Files whose hash matches
+    the manifest and which still exist are skipped.
+    """
+    if shard_lines < 1:
+        raise ValueError(f"shard_lines must be at least 1, got {shard_lines}")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / f".{name}.shards.json"
+    try:
+        previous = json.loads(manifest_path.read_text(encoding="utf8"))
+    except (OSError, ValueError):
+        previous = {}
+    hashes: dict[str, str] = {}
+    report = ShardReport()
+
+    def emit(filename: str, text: str) -> None:
+        path = out_dir / filename
+        digest = hashes[filename] = _text_hash(text)
+        report.files.append(path)
+        if previous.get(filename) != digest or not path.exists():
+            _write(path, text)
+            report.written.append(path)
+
+    speakers: dict[str, str] = {}
+    count = 0
+    for count, text in enumerate(_shards(dialogues, name, shard_lines, speakers), 1):
+        emit(f"{name}_{count - 1:04d}.rpy", text)
+    emit(f"{name}_characters.rpy", _characters(name, speakers, count))
+
+    for filename in previous:
+        if filename not in hashes:
+            path = out_dir / filename
+            for stale in (path, path.with_suffix(".rpyc")):
+                if stale.exists():
+                    stale.unlink()
+                    report.removed.append(stale)
+    _write(manifest_path, json.dumps(hashes, indent=1, sort_keys=True))
+    return report
@@ -0,0 +1,166 @@
+"""Incremental reader for the ``dialogues`` array of a dialogue JSON file."""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+CHUNK_SIZE = 1 << 16
+_WS = " \t\n\r"
+# an array separator with the whitespace around it
+_SEP = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Pull JSON tokens and values out of a text stream read in chunks.
+
+    Only the unread tail of the buffer is kept, so memory is bounded by the
+    chunk size plus the largest single value.
+    """
+
+    def __init__(self, fh: TextIO, chunk_size: int = CHUNK_SIZE) -> None:
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+
+    def _fill(self, n: int) -> bool:
+        chunk = self.fh.read(n)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"expected {ch!r} at JSON offset ~{self.pos}, got {got or 'EOF'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # value cut by the chunk boundary: grow geometrically so a big
+                # value is re-scanned O(log n) times, not once per chunk
+                if self._fill(max(self.chunk_size, len(self.buf) - self.pos)):
+                    continue
+                raise
+            if end == len(self.buf) and self._fill(self.chunk_size):
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return obj
+
+    def key(self) -> str | None:
+        """Return the next key of the current object, or ``None`` at its end."""
+        ch = self.peek()
+        if ch == ",":
+            self.pos += 1
+            ch = self.peek()
+        if ch == "}":
+            self.pos += 1
+            return None
+        key = self.value()
+        if not isinstance(key, str):
+            raise ValueError(f"expected an object key at JSON offset ~{self.pos}")
+        self.expect(":")
+        return key
+
+    def separator(self) -> str:
+        """Consume the ``,`` or ``]`` after an array value and return it."""
+        ch = self.peek()
+        self.pos += 1
+        if ch == ",":
+            self.peek()
+        elif ch != "]":
+            raise ValueError(f"expected ',' or ']' at JSON offset ~{self.pos - 1}")
+        return ch
+
+    def items(self) -> Iterator[Any]:
+        """Yield the values of the array whose ``[`` was just consumed.
+
+        Every buffered value up to the last ``}`` is decoded in one
+        ``json.loads`` call. Parsing from a value boundary is deterministic,
+        so that slice only parses if the ``}`` ends a value of the array; if
+        it does not (a ``}`` inside a string, say) the rest of the buffer is
+        decoded value by value.
+        """
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        scan, sep = _decoder.scan_once, _SEP.match
+        while True:
+            buf, pos = self.buf, self.pos
+            cut = buf.rfind("}", pos)
+            values = None
+            if cut > pos:
+                try:
+                    values = json.loads(f"[{buf[pos:cut + 1]}]")
+                except ValueError:
+                    pass
+            if values is not None:
+                self.pos = cut + 1
+                ch = self.separator()
+                yield from values
+                if ch == "]":
+                    return
+                continue
+            while True:
+                try:
+                    obj, end = scan(buf, pos)
+                    m = sep(buf, end)
+                except (StopIteration, json.JSONDecodeError):
+                    m = None
+                if m is None:
+                    break
+                pos = m.end()
+                yield obj
+                if m.group(1) == "]":
+                    self.pos = pos
+                    return
+            # the next value is cut by the chunk boundary (or malformed)
+            self.pos = pos
+            obj = self.value()
+            ch = self.separator()
+            yield obj
+            if ch == "]":
+                return
+
+def iter_dialogues(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the entries of the top-level ``dialogues`` array of ``path`` one by one.
+
+    The file is read in ``chunk_size`` pieces, so only about one entry is in
+    memory at a time. Other top-level keys are parsed and dropped; a missing
+    ``dialogues`` yields nothing, like ``json_to_renpy``. Malformed JSON, or a
+    ``dialogues`` value that is not an array, raises ``ValueError`` once the
+    reader gets to it.
+    """
+    with path.open("r", encoding="utf8") as fh:
+        reader = _Reader(fh, chunk_size)
+        reader.expect("{")
+        while True:
+            key = reader.key()
+            if key is None:
+                return
+            if key != "dialogues":
+                reader.value()
+                continue
+            reader.expect("[")
+            yield from reader.items()
@@ -0,0 +1,20 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+import suite
+
+
+def test_suite_compares_against_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    argv = ["--scenes", "4", "--dialogue-lines", "50", "--repeat", "1", "--baseline", str(baseline)]
+    assert suite.main(argv + ["--save-baseline"]) == 0
+    stored = json.loads(baseline.read_text(encoding="utf-8"))
+    assert [r["case"] for r in stored["results"]] == ["validate", "generate", "write", "convert", "convert-file"]
+    assert all(r["items_per_s"] > 0 and r["peak_kib"] > 0 for r in stored["results"])
+
+    assert suite.main(argv + ["--budget", "0"]) == 1
+    assert "REGRESSION validate" in capsys.readouterr().out
+    assert suite.main(argv + ["--variants", "0"]) == 2  # recorded with other inputs
@@ -1,9 +1,15 @@
+import json
+import os
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1] / "src"))
 
-from make_renpy_script import json_to_renpy
+from make_renpy_script import convert_file, convert_file_sharded, iter_dialogues, iter_renpy, json_to_renpy
+from make_renpy_script.__main__ import main
+from make_renpy_script.shards import speaker_name
 
 
 def test_json_to_renpy_simple():
@@ -16,3 +22,142 @@ def test_json_to_renpy_simple():
     }
     expected = "e \"Hello\"\nl \"Hi\"\nScene change\n"
     assert json_to_renpy(data) == expected
+
+
+def test_convert_file_streams_dialogues(tmp_path):
+    dialogues = [{"speaker": f"c{i % 3}", "text": "line " * (i % 7) + str(i)} for i in range(500)]
+    dialogues[10] = {"text": "narration, with \"quotes\" and ünïcode"}
+    for i in range(20, 500, 37):
+        dialogues[i] = {"speaker": "e", "text": 'a "}, {" in the text } ' * (i % 5)}
+    data = {"meta": {"title": "t", "tags": ["a", 1.5]}, "dialogues": dialogues, "after": 12345}
+    src = tmp_path / "script.json"
+    src.write_text(json.dumps(data, indent=1), encoding="utf8")
+
+    # tiny chunks cut keys, strings and numbers at every possible boundary; bigger
+    # ones decode whole runs of entries at once and must not stop at a "}" in a string
+    for chunk_size in (7, 64, 1000, 1 << 16):
+        assert list(iter_dialogues(src, chunk_size=chunk_size)) == dialogues
+    assert "".join(iter_renpy(iter_dialogues(src, chunk_size=7))) == json_to_renpy(data)
+    assert convert_file(src) == tmp_path / "script.rpy"
+    assert (tmp_path / "script.rpy").read_text(encoding="utf8") == json_to_renpy(data)
+
+    empty = tmp_path / "empty.json"
+    empty.write_text('{"other": []}', encoding="utf8")
+    assert convert_file(empty).read_text(encoding="utf8") == ""
+
+    src.write_text(json.dumps(data)[:-40], encoding="utf8")  # truncated
+    with pytest.raises(ValueError):
+        convert_file(src)
+    # the previous output is left in place
+    assert (tmp_path / "script.rpy").read_text(encoding="utf8") == json_to_renpy(data)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["empty.json", "empty.rpy", "script.json", "script.rpy"]
+
+
+def test_sharded_output_interns_speakers_and_skips_unchanged(tmp_path):
+    dialogues = [{"speaker": ["e", "Mr. Smith"][i % 2], "text": f"line {i}"} for i in range(10)]
+    dialogues[4] = {"text": "scene bg room"}
+    src = tmp_path / "1st act.json"
+    src.write_text(json.dumps({"dialogues": dialogues}), encoding="utf8")
+    out = tmp_path / "game"
+
+    report = convert_file_sharded(src, out, shard_lines=4)
+    names = ["d_1st_act_0000.rpy", "d_1st_act_0001.rpy", "d_1st_act_0002.rpy", "d_1st_act_characters.rpy"]
+    assert [p.name for p in report.files] == names and report.written == report.files
+    smith = speaker_name("d_1st_act", "Mr. Smith")
+    assert smith.startswith("d_1st_act_who_Mr__Smith_")
+    # an identifier is the game's own Character
+    assert speaker_name("d_1st_act", "e") == "e"
+    assert (out / names[1]).read_text(encoding="utf8") == (
+        "label d_1st_act_0001:\n"
+        "    scene bg room\n"
+        f'    {smith} "line 5"\n'
+        '    e "line 6"\n'
+        f'    {smith} "line 7"\n'
+        "    jump d_1st_act_0002\n"
+    )
+    assert (out / names[2]).read_text(encoding="utf8").endswith('"line 9"\n    return\n')
+    assert (out / names[3]).read_text(encoding="utf8") == (
+        "# Speakers of d_1st_act without a Character of their own\n"
+        f'define {smith} = Character("Mr. Smith")\n'
+        "\nlabel d_1st_act:\n"
+        "    jump d_1st_act_0000\n"
+    )
+
+    # an edit rewrites its shard only; a shorter script drops the stale shards
+    dialogues[6]["text"] = "edited"
+    src.write_text(json.dumps({"dialogues": dialogues}), encoding="utf8")
+    assert [p.name for p in convert_file_sharded(src, out, shard_lines=4).written] == [names[1]]
+    (out / "d_1st_act_0002.rpyc").write_bytes(b"")
+    src.write_text(json.dumps({"dialogues": dialogues[:8]}), encoding="utf8")
+    report = convert_file_sharded(src, out, shard_lines=4)
+    assert [p.name for p in report.written] == [names[1]]
+    assert sorted(p.name for p in report.removed) == ["d_1st_act_0002.rpy", "d_1st_act_0002.rpyc"]
+    assert (out / names[1]).read_text(encoding="utf8").endswith('"line 7"\n    return\n')
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_cli_converts_directories_and_globs_in_parallel(tmp_path, capsys, jobs):
+    src = tmp_path / "loc"
+    for rel in ("en/ch1.json", "en/sub/ch2.json", "ru/ch1.json"):
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_text(json.dumps({"dialogues": [{"speaker": "e", "text": rel}]}), encoding="utf8")
+    (src / "en/notes.txt").write_text("not json", encoding="utf8")
+    out = tmp_path / "game"
+
+    # a directory mirrors itself and the tree below it, a glob the tree below its fixed prefix
+    argv = [str(src / "en"), str(src / "*" / "ch1.json"), "-o", str(out), "-j", str(jobs)]
+    assert main(argv) == 0
+    assert sorted(p.relative_to(out).as_posix() for p in out.rglob("*.rpy")) == [
+        "en/ch1.rpy", "en/sub/ch2.rpy", "ru/ch1.rpy",
+    ]
+    assert (out / "en/sub/ch2.rpy").read_text(encoding="utf8") == 'e "en/sub/ch2.json"\n'
+    assert capsys.readouterr().out.startswith("3 converted, 0 up to date, 0 failed in ")
+
+    # outputs newer than their inputs are skipped; a changed input is converted again
+    os.utime(src / "ru/ch1.json", ns=(0, (out / "ru/ch1.rpy").stat().st_mtime_ns + 10**9))
+    (src / "ru/broken.json").write_text("{", encoding="utf8")
+    assert main(argv + [str(src / "ru/broken.json")]) == 1
+    captured = capsys.readouterr()
+    assert captured.out.startswith("1 converted, 2 up to date, 1 failed in ")
+    assert "files/s" in captured.out and "MB/s" in captured.out
+    assert f"FAILED {src / 'ru/broken.json'}: " in captured.err
+
+
+def test_cli_names_shards_after_their_relative_path(tmp_path, capsys):
+    src = tmp_path / "loc"
+    for lang in ("en", "ru"):
+        (src / lang).mkdir(parents=True)
+        (src / lang / "intro.json").write_text(
+            json.dumps({"dialogues": [{"speaker": "e", "text": lang}]}), encoding="utf8",
+        )
+    out = tmp_path / "game"
+
+    assert main([str(src / "*" / "intro.json"), "-o", str(out), "--shard-lines", "10"]) == 0
+    assert capsys.readouterr().out.startswith("2 converted, ")
+    # labels are global in Ren'Py: the two scripts must not both define intro_0000
+    assert (out / "en/en_intro_0000.rpy").read_text(encoding="utf8") == 'label en_intro_0000:\n    e "en"\n    return\n'
+    assert (out / "ru/ru_intro_characters.rpy").read_text(encoding="utf8").endswith(
+        "label ru_intro:\n    jump ru_intro_0000\n"
+    )
+    assert main([str(src / "*" / "intro.json"), "-o", str(out), "--shard-lines", "10"]) == 0
+    assert capsys.readouterr().out.startswith("0 converted, 2 up to date, ")
+
+
+def test_cli_refuses_inputs_that_share_an_output(tmp_path, capsys):
+    for lang in ("en", "ru"):
+        (tmp_path / lang).mkdir()
+        (tmp_path / lang / "intro.json").write_text(
+            json.dumps({"dialogues": [{"speaker": "e", "text": lang}]}), encoding="utf8",
+        )
+    out = tmp_path / "game"
+
+    # directories keep their own name, so en/ and ru/ land side by side
+    assert main(["-o", str(out), "-j", "2", str(tmp_path / "en"), str(tmp_path / "ru")]) == 0
+    assert (out / "en/intro.rpy").read_text(encoding="utf8") == 'e "en"\n'
+    assert (out / "ru/intro.rpy").read_text(encoding="utf8") == 'e "ru"\n'
+
+    # two plain files of one name would overwrite each other: nothing is converted
+    argv = ["-o", str(tmp_path / "flat"), str(tmp_path / "en/intro.json"), str(tmp_path / "ru/intro.json")]
+    assert main(argv) == 2
+    assert "would both write" in capsys.readouterr().err
+    assert not (tmp_path / "flat").exists()
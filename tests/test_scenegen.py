@@ -1,10 +1,28 @@
+import json
+import os
+import random
+import re
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ensure the root of the repository is on the import path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from scenegen.generator import generate_rpy
+from scenegen import cli, coords, generator, layout, server
+from scenegen.cache import ProjectCache
+from scenegen.emitter import Emitter
+from scenegen.generator import generate_rpy, generate_targets, iter_rpy
+from scenegen.ir import parse, parse_targets
+from scenegen.jsonstream import SceneStream
+from scenegen.layout import check_layout
+from scenegen.manifest import Manifest, input_key
+from scenegen.metrics import Metrics
+from scenegen.rendercache import RenderCache
+from scenegen.validator import ValidationError, validate, validate_stream, validate_targets
+from scenegen.watch import Watcher
+from scenegen.writer import OutputWriter
 
 
 def test_go_scene_transition_applied():
@@ -93,3 +111,736 @@ def test_go_scene_transition_mixed_case_type():
         "with SlideTransition(push_side='left', duration=0.3)" in screen
     )
 
+def _scene(sid, image="bg/x.png"):
+    return {
+        "id": sid,
+        "layers": [{"id": "bg", "type": "image", "image": image, "zorder": 0}],
+        "hotspots": [],
+    }
+
+
+def _project(*scenes, width=100, height=100):
+    return {
+        "version": "1.0",
+        "project": {
+            "reference_resolution": {"width": width, "height": height},
+            "coords_mode": "relative",
+        },
+        "scenes": list(scenes),
+    }
+
+
+def test_manifest_regenerates_only_changed_scenes():
+    manifest = Manifest()
+    first = generate_rpy(_project(_scene("one"), _scene("two")), manifest)
+    assert set(first) == {
+        "_gen/scene_helpers.rpy", "_gen/scene_helpers_scenes.rpy", "_gen/scene_one.rpy", "_gen/scene_two.rpy",
+    }
+
+    assert generate_rpy(_project(_scene("one"), _scene("two")), manifest) == {}
+
+    files = generate_rpy(_project(_scene("one", "bg/new.png")), manifest)
+    # the input's dispatch table lists the scenes, so it follows the removal
+    assert list(files) == ["_gen/scene_one.rpy", "_gen/scene_helpers_scenes.rpy"]
+    assert manifest.removed == ["_gen/scene_two.rpy"]
+
+
+def test_manifest_settings_change_forces_full_regeneration():
+    manifest = Manifest()
+    generate_rpy(_project(_scene("one")), manifest)
+    files = generate_rpy(_project(_scene("one"), width=200), manifest)
+    assert set(files) == {"_gen/scene_helpers.rpy", "_gen/scene_helpers_scenes.rpy", "_gen/scene_one.rpy"}
+
+
+def test_scene_stream_matches_json_loads(tmp_path):
+    data = _project(_scene("one"), _scene("two", "bg/ü 2.png"))
+    # "scenes" before "project" exercises the header-first rescan
+    reordered = {"scenes": data["scenes"], "version": "1.0", "project": data["project"]}
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(reordered, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert list(SceneStream(src, chunk_size=7)) == data["scenes"]
+    stream = SceneStream(src, chunk_size=7)
+    assert stream.header["project"] == data["project"]
+    assert [sc.id for sc in validate_stream(stream)] == ["one", "two"]
+    assert stream.header["version"] == "1.0"
+
+
+def test_validate_stream_reports_missing_scenes(tmp_path):
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps({"version": "1.0", "project": _project()["project"]}), encoding="utf-8")
+    with pytest.raises(ValidationError, match="missing required key 'scenes'"):
+        list(validate_stream(SceneStream(src)))
+
+
+def test_jobs_output_matches_serial():
+    data = _project(*[_scene(f"s{i}", f"bg/{i}.png") for i in range(70)])
+    assert list(generate_rpy(data, jobs=2).items()) == list(generate_rpy(data).items())
+
+
+def test_jobs_validation_reports_serial_error():
+    scenes = [_scene(f"s{i}") for i in range(70)]
+    scenes[40]["id"] = "s3"
+    scenes[50]["layers"][0]["zorder"] = "top"
+    with pytest.raises(ValidationError, match=r"^scenes\[40\]\.id duplicated: s3$"):
+        validate(_project(*scenes), jobs=2)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_validate_collects_every_error_up_to_max(jobs, caplog):
+    scenes = [_scene(f"s{i}") for i in range(70)]
+    scenes[5]["layers"][0] = {"id": "bg", "type": "colour", "zorder": "top", "variants": "night"}
+    scenes[40]["id"] = "s3"
+    scenes[50]["hotspots"] = [
+        {"id": "h", "shape": "polygon", "points": [[0, 0], [2, 0.5], "p"], "action": {"type": "go_scene"}},
+        {"id": "g", "shape": "rect", "rect": {"x": 0, "y": 0, "w": 1, "h": 1},
+         "action": {"type": "go_scene", "scene_id": "nowhere"}},
+    ]
+    expected = [
+        "scenes[5].layers[0].type: expected one of ['image', 'color', 'group'], got colour",
+        "scenes[5].layers[0].zorder: expected type int, float, got str",
+        "scenes[5].layers[0].variants: expected type list, got str",
+        "scenes[40].id duplicated: s3",
+        "scenes[50].hotspots[0].points[1].x: expected in range [0.0..1.0], got 2",
+        "scenes[50].hotspots[0].points[2] must be [x,y]",
+        "scenes[50].hotspots[0].action(go_scene): missing required key 'scene_id'",
+    ]
+    with pytest.raises(ValidationError) as e:
+        validate(_project(*scenes), jobs=jobs, max_errors=0)
+    assert e.value.errors == expected
+    assert str(e.value) == "\n".join(expected)
+    with pytest.raises(ValidationError) as e:
+        validate(_project(*scenes), jobs=jobs, max_errors=2)
+    assert e.value.errors == expected[:2]
+
+    # a link to another input's scene is only a warning
+    del scenes[50]["hotspots"][0]
+    with pytest.raises(ValidationError) as e:
+        validate(_project(*scenes), jobs=jobs, max_errors=10)
+    assert e.value.errors[-1] == "scenes[40].id duplicated: s3"
+    assert "scenes[50].hotspots[0].action.scene_id: unknown scene 'nowhere'" in caplog.text
+
+
+def test_cli_project_cache_skips_parse_and_validate(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    caplog.set_level("INFO")
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(_project(_scene("one"), _scene("two"))), encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+    argv = ["--in", str(src), "--out-dir", str(tmp_path / "out"), "--cache-dir", str(cache_dir), "--full"]
+
+    assert cli.main(argv) == 0
+    assert f"Project cache miss: {src}" in caplog.text
+    first = (tmp_path / "out/_gen/scene_one.rpy").read_text(encoding="utf-8")
+    caplog.clear()
+    monkeypatch.setattr(cli, "validate", None)  # a hit must not need it
+    monkeypatch.setattr(cli.json, "loads", None)
+    assert cli.main(argv) == 0
+    monkeypatch.undo()
+    assert f"Project cache {cache_dir}: 1 hit(s), 0 miss(es), 0 evicted" in caplog.text
+    assert (tmp_path / "out/_gen/scene_one.rpy").read_text(encoding="utf-8") == first
+
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    src.write_text(json.dumps(_project(_scene("one"))), encoding="utf-8")
+    assert cli.main(argv) == 0
+    assert len(list(cache_dir.glob("*.project.pickle"))) == 2
+
+    older, newer = sorted(cache_dir.glob("*.project.pickle"), key=lambda p: p.stat().st_mtime_ns)
+    cache = ProjectCache(cache_dir, max_bytes=older.stat().st_size + 1)
+    key = older.name.split(".")[0]
+    project = cache.load(key)  # a hit makes the older entry the most recently used
+    assert [sc.id for sc in project.scenes] == ["one", "two"] and cache.stats() == (1, 0, 0)
+    cache.store(key, project)
+    assert cache.evicted == 1 and list(cache_dir.glob("*.project.pickle")) == [older]
+
+
+def test_cli_batch_collects_exit_codes(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    indir = tmp_path / "input"
+    indir.mkdir()
+    (indir / "a.json").write_text(json.dumps(_project(_scene("a"))), encoding="utf-8")
+    (indir / "b.json").write_text(json.dumps(_project(_scene("b"))), encoding="utf-8")
+    (indir / "broken.json").write_text("{", encoding="utf-8")
+    (indir / "invalid.json").write_text(json.dumps({"version": "1.0"}), encoding="utf-8")
+    out = tmp_path / "out"
+
+    assert cli.main(["--in", str(indir), "--out-dir", str(out)]) == 4
+    assert (out / "_gen/scene_a.rpy").exists()
+    assert (out / "_gen/scene_b.rpy").exists()
+
+    # per-input manifests: regenerating one input must not prune the other's scenes
+    (indir / "a.json").write_text(json.dumps(_project(_scene("a2"))), encoding="utf-8")
+    assert cli.main(["--in", str(indir / "a.json"), "--out-dir", str(out)]) == 0
+    assert not (out / "_gen/scene_a.rpy").exists()
+    assert (out / "_gen/scene_b.rpy").exists()
+
+
+def test_cli_manifests_of_same_named_inputs_are_separate(tmp_path, monkeypatch):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    monkeypatch.chdir(tmp_path)
+    for sub, sid in (("a", "one"), ("b", "two")):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "scenes.json").write_text(json.dumps(_project(_scene(sid))), encoding="utf-8")
+
+    assert cli.main(["--in", "a/scenes.json", "--in", "b/scenes.json", "--out-dir", "out"]) == 0
+    assert len(list((tmp_path / "out/_gen").glob(".scenegen_manifest.scenes_*.json"))) == 2
+
+    (tmp_path / "a/scenes.json").write_text(json.dumps(_project(_scene("three"))), encoding="utf-8")
+    assert cli.main(["--in", "a/scenes.json", "--out-dir", "out"]) == 0
+    assert not (tmp_path / "out/_gen/scene_one.rpy").exists()
+    assert (tmp_path / "out/_gen/scene_two.rpy").exists()
+
+
+def test_writer_skips_identical_and_aborts_cleanly(tmp_path):
+    same = tmp_path / "_gen/same.rpy"
+    same.parent.mkdir()
+    same.write_text("keep", encoding="utf-8")
+    os.utime(same, (1, 1))
+
+    writer = OutputWriter(tmp_path, threads=2)
+    writer.write("_gen/same.rpy", "keep")
+    writer.write("_gen/new.rpy", "fresh")
+    writer.abort()
+    assert not (tmp_path / "_gen/new.rpy").exists()
+
+    writer = OutputWriter(tmp_path)
+    writer.write("_gen/same.rpy", "keep")
+    writer.write("_gen/new.rpy", "fresh")
+    writer.commit()
+    assert (writer.written, writer.skipped) == (1, 1)
+    assert same.stat().st_mtime == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["_gen"]
+
+
+def test_iter_rpy_renders_lazily():
+    data = _project(*[_scene(f"s{i}") for i in range(40)])
+    files = iter_rpy(data)
+    assert next(files)[0] == "_gen/scene_s0.rpy"
+    data["scenes"][39]["id"] = "late"  # in the next chunk, not rendered yet
+    rest = [rel for rel, _ in files]
+    assert rest[-3:] == ["_gen/scene_late.rpy", "_gen/scene_helpers.rpy", "_gen/scene_helpers_scenes.rpy"]
+
+
+def test_emitter_indent_stack():
+    em = Emitter()
+    em.line("screen s():")
+    with em.indent():
+        em.line("fixed:")
+        with em.indent(8):
+            em.lines(["add a", "", "add b"])
+    em.line()
+    assert em.getvalue() == "screen s():\n    fixed:\n            add a\n\n            add b\n\n"
+
+
+def test_nested_group_indentation():
+    scene = _scene("deep")
+    scene["layers"].append(
+        {"id": "g", "type": "group", "zorder": 1, "children": [
+            {"id": "g2", "type": "group", "zorder": 0, "children": [
+                {"id": "i", "type": "image", "image": "ui/i.png", "zorder": 0},
+            ]},
+        ]}
+    )
+    screen = generate_rpy(_project(scene))["_gen/scene_deep.rpy"]
+    assert "\n        fixed:\n            fixed:\n                add \"ui/i.png\" at Transform(" in screen
+
+
+def test_validate_returns_ir_with_pixel_coords():
+    scene = _scene("one")
+    scene["layers"].append({"id": "top", "type": "color", "color": "#000", "alpha": 0.5, "zorder": -1})
+    scene["hotspots"] = [
+        {"id": "p", "shape": "polygon", "points": [[0.1, 0.2], [0.5, 0.2], [0.3, 0.6]],
+         "action": {"type": "jump_label", "label": "x"}},
+        {"id": "c", "shape": "circle", "circle": {"cx": 0.5, "cy": 0.5, "r": 0.1},
+         "action": {"type": "go_scene", "scene_id": "one", "transition": {"type": "Fade"}}},
+    ]
+    project = validate(_project(scene, width=200, height=100))
+    sc = project.scenes[0]
+    assert [L.id for L in sc.layers] == ["top", "bg"]
+    assert (sc.layers[1].xpos, sc.layers[1].ypos) == (100, 50)
+    poly, circle = sc.hotspots
+    assert poly.rect == (20, 20, 80, 40)
+    assert circle.circle == (100, 50, 20)
+    assert circle.action.transition == ("fade", 0.2)
+    assert not hasattr(sc, "__dict__")
+    assert iter_rpy(project) is not None and generate_rpy(project) == generate_rpy(_project(scene, width=200, height=100))
+
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_target_resolutions_from_one_validation(tmp_path, monkeypatch, jobs):
+    scene = _scene("one")
+    scene["layers"].append({"id": "tint", "type": "color", "color": "#000", "alpha": 0.5, "zorder": 1})
+    scene["hotspots"] = [
+        {"id": "p", "shape": "polygon", "points": [[0.1, 0.2], [0.5, 0.2], [0.3, 0.6]],
+         "action": {"type": "go_scene", "scene_id": "one"}},
+        {"id": "c", "shape": "circle", "circle": {"cx": 0.5, "cy": 0.5, "r": 0.1},
+         "action": {"type": "jump_label", "label": "x"}},
+    ]
+    data = _project(scene, _scene("two"))
+    resolutions = [(1280, 720), (1920, 1080), (3840, 2160)]
+    projects = validate_targets(data, resolutions, jobs)
+    for (w, h), project in zip(resolutions, projects):
+        # the same as validating an input authored at that resolution
+        assert generate_rpy(project) == generate_rpy(validate(_project(scene, _scene("two"), width=w, height=h)))
+    assert generate_targets(data, resolutions) == generate_targets(projects)
+
+    pixels = dict(data, project={"reference_resolution": {"width": 1280, "height": 720}, "coords_mode": "absolute"})
+    pixels["scenes"] = [dict(_scene("one"), hotspots=[
+        {"id": "r", "shape": "rect", "rect": {"x": 128, "y": 72, "w": 640, "h": 361},
+         "action": {"type": "jump_label", "label": "x"}},
+    ])]
+    small, big = validate_targets(pixels, [(1280, 720), (3840, 2160)])
+    assert small.scenes[0].hotspots[0].rect == (128, 72, 640, 361)
+    assert big.scenes[0].hotspots[0].rect == (384, 216, 1920, 1083)
+
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(data), encoding="utf-8")
+    out = tmp_path / "out"
+    argv = ["--in", str(src), "--out-dir", str(out), "--target-resolution", "1280x720", "3840x2160"]
+    assert cli.main(argv + ["--jobs", str(jobs)]) == 0
+    assert sorted(p.name for p in out.iterdir()) == ["1280x720", "3840x2160"]
+    for name, content in generate_targets(projects, input_name=input_key(src)).items():
+        if not name.startswith("1920x1080/"):
+            assert (out / name).read_text(encoding="utf-8") == content
+    with pytest.raises(SystemExit):
+        cli.main(argv + ["--stream"])
+
+def test_coords_numpy_path_matches_python(monkeypatch):
+    pytest.importorskip("numpy")
+    scene = _scene("big")
+    # .5 boundaries exercise round-half-to-even on both paths
+    scene["hotspots"] = [
+        {"id": f"p{k}", "shape": "polygon", "action": {"type": "jump_label", "label": "x"},
+         "points": [[(k + i) / 400, ((k * i) % 97) / 200] for i in range(150)]}
+        for k in range(4)
+    ] + [{"id": "r", "shape": "rect", "rect": {"x": 0.25, "y": 0.75, "w": 0.125, "h": 0.5},
+          "action": {"type": "jump_label", "label": "x"}}]
+    data = _project(scene, width=201, height=101)
+    fast = parse(data).scenes[0].key()
+    fast_targets = [p.scenes[0].key() for p in parse_targets(data, [(640, 360), (1, 1)])]
+    monkeypatch.setattr(coords, "_np", None)
+    assert parse(data).scenes[0].key() == fast
+    assert [p.scenes[0].key() for p in parse_targets(data, [(640, 360), (1, 1)])] == fast_targets
+
+
+def test_polygon_and_circle_hotspots_get_hit_masks():
+    scene = _scene("m")
+    scene["hotspots"] = [
+        {"id": "tri", "shape": "polygon", "points": [[0.0, 0.0], [0.4, 0.0], [0.0, 0.4]],
+         "action": {"type": "jump_label", "label": "x"}},
+        {"id": "c", "shape": "circle", "circle": {"cx": 0.5, "cy": 0.5, "r": 0.2},
+         "action": {"type": "jump_label", "label": "x"}},
+        {"id": "r", "shape": "rect", "rect": {"x": 0.0, "y": 0.0, "w": 0.1, "h": 0.1},
+         "action": {"type": "jump_label", "label": "x"}},
+    ]
+    tri, circle, _ = parse(_project(scene)).scenes[0].hotspots
+    mask = generator._hit_mask(tri, 4)
+    assert (mask.cols, mask.rows) == (10, 10)
+    assert mask.hit(2, 2) and mask.hit(30, 5) and not mask.hit(30, 30) and not mask.hit(41, 0)
+    mask = generator._hit_mask(circle, 1)
+    assert mask.hit(20, 20) and mask.hit(20, 1) and not mask.hit(1, 1) and not mask.hit(39, 39)
+
+    screen = generate_rpy(_project(scene))["_gen/scene_m.rpy"]
+    assert 'define scene_m_hitmask_0 = SceneHitMask(10, 10, 4, "' in screen
+    assert "focus_mask scene_m_hitmask_1" in screen
+    assert screen.count("focus_mask True") == 1
+    assert "SceneHitMask" not in generate_rpy(_project(scene), hit_cell=0)["_gen/scene_m.rpy"]
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_cache_renders_repeated_fragments_once(tmp_path, monkeypatch, caplog, jobs):
+    # three scenes from one template: own background, shared overlay and hotspots
+    # whose ids differ per scene, as ids do not reach the output
+    scenes = [_scene(f"s{i}", f"bg/{i}.png") for i in range(3)]
+    for sc in scenes:
+        sid = sc["id"]
+        frame = {"id": f"{sid}_frame", "type": "image", "image": "ui/frame.png", "zorder": 0,
+                 "transform": {"pos": {"x": 0.5, "y": 0.9}, "anchor": {"x": 0.5, "y": 1.0}}}
+        sc["layers"].append(
+            {"id": f"{sid}_ui", "type": "group", "zorder": 5, "visibility": {"if": "show_ui"}, "children": [frame]}
+        )
+        sc["hotspots"] = [
+            {"id": f"{sid}_tri", "shape": "polygon", "points": [[0.0, 0.0], [0.4, 0.0], [0.0, 0.4]],
+             "tooltip": "Map", "action": {"type": "go_scene", "scene_id": "s0", "transition": {"type": "fade"}}},
+            {"id": f"{sid}_back", "shape": "rect", "rect": {"x": 0.8, "y": 0.8, "w": 0.2, "h": 0.2},
+             "action": {"type": "jump_label", "label": "back"}},
+        ]
+    project = validate(_project(*scenes))
+    plain = generate_rpy(project, render_cache=RenderCache(0))
+    cache = RenderCache()
+    assert generate_rpy(project, jobs=jobs, render_cache=cache) == plain
+    assert "focus_mask scene_s2_hitmask_0" in plain["_gen/scene_s2.rpy"]
+    assert "    if show_ui:\n" in plain["_gen/scene_s2.rpy"]
+    assert cache.counts == {"layer": [2, 4], "hotspot": [4, 2], "mask": [2, 1]}
+    assert cache.stats() == (8, 7, 0)
+    assert generator.render_scene(project.scenes[1], project, render_cache=cache)[1] == plain["_gen/scene_s1.rpy"]
+    # a pool run counts its lookups here but keeps the entries in the workers
+    assert cache.stats() == ((13, 7, 0) if jobs == 1 else (8, 12, 0))
+
+    # least recently used entries go first; output does not depend on the bound
+    small = RenderCache(2)
+    assert generate_rpy(project, render_cache=small) == plain
+    assert len(small) == 2 and small.evicted == 13
+
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(_project(*scenes)), encoding="utf-8")
+    with caplog.at_level("INFO"):
+        assert cli.main(["--in", str(src), "--out-dir", str(tmp_path / "out"), "--jobs", str(jobs)]) == 0
+    assert "Render cache: 53% of 15 lookups (hotspot 67%, layer 33%, mask 67%), 0 evicted" in caplog.text
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_render_cache_keys_freeze_json_values(jobs):
+    # nested lists/dicts in actions must not break the keys, and values that
+    # compare equal but are written out differently (1, 1.0, True) must not share
+    # an entry
+    scenes = []
+    for sid, one, zoom in (("a", 1, 1), ("b", 1.0, 1.0), ("c", True, 1)):
+        sc = _scene(sid)
+        sc["layers"].append({"id": "logo", "type": "image", "image": "ui/logo.png", "zorder": 1, "visibility": {"if": "show_logo"},
+                             "transform": {"zoom": zoom}})
+        sc["hotspots"] = [
+            {"id": "fn", "shape": "polygon", "points": [[0.0, 0.0], [0.4, 0.0], [0.0, 0.4]],
+             "action": {"type": "function", "name": "pick",
+                        "args": [[one, 2]], "kwargs": {"k": {"a": [one]}}}},
+            {"id": "menu", "shape": "circle", "circle": {"cx": 0.7, "cy": 0.7, "r": 0.1},
+             "action": {"type": "call_screen", "screen": "menu", "params": {"tabs": [one], "opts": {"x": one}}}},
+        ]
+        scenes.append(sc)
+    project = validate(_project(*scenes))
+    plain = generate_rpy(project, render_cache=RenderCache(0))
+    cache = RenderCache()
+    assert generate_rpy(project, jobs=jobs, render_cache=cache) == plain
+    assert "Function(pick, [1, 2], k={'a': [1]})" in plain["_gen/scene_a.rpy"]
+    assert "Function(pick, [1.0, 2], k={'a': [1.0]})" in plain["_gen/scene_b.rpy"]
+    assert "CallScreen('menu', tabs=[True], opts={'x': True})" in plain["_gen/scene_c.rpy"]
+    assert "zoom=1.0" in plain["_gen/scene_b.rpy"] and "zoom=1," in plain["_gen/scene_c.rpy"]
+    if jobs == 1:
+        # masks and background are shared by all three scenes, the logo by a and c only
+        assert cache.counts == {"layer": [3, 3], "hotspot": [0, 6], "mask": [4, 2]}
+
+
+def test_layout_check_reports_bounds_overlaps_and_shadowed(tmp_path, monkeypatch, caplog):
+    def spot(sid, shape, **geometry):
+        return dict(id=sid, shape=shape, action={"type": "jump_label", "label": "x"}, **geometry)
+
+    scene = _scene("m")
+    scene["hotspots"] = [
+        spot("under", "rect", rect={"x": 0.1, "y": 0.1, "w": 0.1, "h": 0.1}),
+        spot("left", "rect", rect={"x": 0.0, "y": 0.0, "w": 0.15, "h": 0.3}),
+        spot("tri", "polygon", points=[[0.15, 0.0], [0.3, 0.0], [0.15, 0.3]]),  # covers the rest of "under"
+        spot("ring", "circle", circle={"cx": 0.9, "cy": 0.9, "r": 0.2}),
+        spot("ball", "circle", circle={"cx": 0.5, "cy": 0.5, "r": 0.1}),
+        spot("corner", "polygon", points=[[0.35, 0.35], [0.45, 0.35], [0.35, 0.45]]),  # outside "ball"
+        spot("flat", "rect", rect={"x": 0.5, "y": 0.5, "w": 0.0, "h": 0.1}),
+    ]
+    messages = check_layout(validate(_project(scene)))
+    assert messages == [
+        "scenes[0].hotspots[0] 'under': covered by hotspots[1] 'left', hotspots[2] 'tri' drawn above it, "
+        "can never be clicked",
+        "scenes[0].hotspots[3] 'ring': extends outside the 100x100 screen",
+        "scenes[0].hotspots[6] 'flat': has no clickable area",
+    ]
+
+    # the grid finds exactly the pairs a brute-force comparison finds
+    rng = random.Random(7)
+    boxes = []
+    for _ in range(400):
+        x, y = rng.randrange(-20, 1900), rng.randrange(-20, 1060)
+        boxes.append((max(x, 0), max(y, 0), x + rng.randrange(1, 120), y + rng.randrange(1, 60)))
+    brute = {
+        (j, k) for j in range(len(boxes)) for k in range(j + 1, len(boxes))
+        if max(boxes[j][0], boxes[k][0]) < min(boxes[j][2], boxes[k][2])
+        and max(boxes[j][1], boxes[k][1]) < min(boxes[j][3], boxes[k][3])
+    }
+    pairs = [(j, k) for j, k, _ in layout._candidate_pairs(boxes, 32)]
+    assert len(pairs) == len(set(pairs)) and set(pairs) == brute
+
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(_project(scene)), encoding="utf-8")
+    for extra in ([], ["--stream"]):
+        caplog.clear()
+        assert cli.main(["--in", str(src), "--out-dir", str(tmp_path / "out"), "--check-layout", *extra]) == 0
+        warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+        assert warnings == [f"Layout: {m}" for m in messages]
+
+
+def test_solids_are_interned_in_tables():
+    scenes = []
+    for sid in ("a", "b"):
+        scene = _scene(sid)
+        # conditional, so it is not precomposed with the background
+        scene["layers"].append({"id": "tint", "type": "color", "color": "#000000", "alpha": 0.2, "zorder": 1,
+                                "visibility": {"if": "night"}})
+        scene["hotspots"] = [
+            {"id": "r", "shape": "rect", "rect": {"x": 0.0, "y": 0.0, "w": 0.2, "h": 0.1},
+             "hover_effect": {"highlight": True}, "action": {"type": "jump_label", "label": "x"}},
+        ]
+        scenes.append(scene)
+    manifest = Manifest()
+    files = generate_rpy(_project(*scenes), manifest)
+    tables = files["_gen/scene_helpers_scenes.rpy"]
+    assert tables.count(" = Solid(") == 4
+    assert '    scene_solid_ffffff_20x10 = Solid("#FFFFFF", xysize=(20, 10))\n' in tables
+    screen = files["_gen/scene_b.rpy"]
+    assert "Solid(" not in screen
+    assert "add scene_solid_000000_100x100 alpha 0.2 at Transform(" in screen
+    assert "add scene_solid_ffffff_1x10 xpos 19" in screen
+
+    # an unchanged scene's solids stay defined when only another scene changes
+    scenes[1]["hotspots"] = []
+    files = generate_rpy(_project(*scenes), manifest)
+    assert set(files) == {"_gen/scene_b.rpy"}
+
+
+def test_static_layer_runs_are_precomposed():
+    scenes = []
+    for sid in ("a", "b"):
+        scene = _scene(sid)
+        scene["layers"] += [
+            {"id": "tint", "type": "color", "color": "#000000", "alpha": 0.5, "zorder": 1},
+            {"id": "lamp", "type": "image", "image": "fx/lamp.png", "zorder": 2, "visibility": {"if": "lamp_on"}},
+            {"id": "overlay", "type": "image", "image": "ui/overlay.png", "zorder": 3},
+            {"id": "sky", "type": "image", "image": "bg/day.png", "zorder": 4,
+             "variants": [{"if": "night", "image": "bg/night.png"}]},
+            {"id": "logo", "type": "image", "image": "ui/logo.png", "zorder": 5},
+            {"id": "frame", "type": "image", "image": "ui/frame.png", "zorder": 6,
+             "transform": {"pos": {"x": 0.1, "y": 0.2}, "anchor": {"x": 0.0, "y": 0.0}, "zoom": 2.0}},
+        ]
+        scenes.append(scene)
+    manifest = Manifest()
+    metrics = Metrics()
+    files = dict(iter_rpy(_project(*scenes), manifest, metrics=metrics))
+    screen = files["_gen/scene_a.rpy"]
+    assert "# Static layers precomposed into scene_static_*: 2 fewer displayables per screen update" in screen
+    assert screen.count("add scene_static_") == 2
+    # conditional layers, variants and lone static layers are emitted as before
+    assert "if lamp_on:" in screen and "ConditionSwitch(" in screen
+    assert 'add "ui/overlay.png" at Transform(' in screen
+    assert [s["saved"] for s in metrics.scenes] == [2, 2]
+
+    tables = files["_gen/scene_helpers_scenes.rpy"]
+    # equal runs in both scenes share one variable, after the solids it uses
+    assert tables.count(" = Fixed(") == 2
+    assert tables.index("    scene_solid_000000_100x100 = ") < tables.index("    scene_static_")
+    assert (
+        '        Transform("bg/x.png", xpos=50, ypos=50, anchor=(0.5, 0.5), zoom=1.0, rotate=0),\n'
+        "        Transform(scene_solid_000000_100x100, alpha=0.5, xpos=50, ypos=50, anchor=(0.5, 0.5), zoom=1.0, "
+        "rotate=0),\n"
+        "        xysize=(100, 100))\n"
+    ) in tables
+    assert '        Transform("ui/frame.png", xpos=10, ypos=20, anchor=(0.0, 0.0), zoom=2.0, rotate=0),\n' in tables
+
+    # an unchanged scene's runs stay defined when only another scene changes
+    scenes[1]["layers"][-1]["transform"]["zoom"] = 3.0
+    files = generate_rpy(_project(*scenes), manifest)
+    assert set(files) == {"_gen/scene_b.rpy", "_gen/scene_helpers_scenes.rpy"}
+    assert files["_gen/scene_helpers_scenes.rpy"].count(" = Fixed(") == 3
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_inputs_sharing_out_dir_keep_their_helpers(tmp_path, monkeypatch, jobs):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    indir = tmp_path / "input"
+    indir.mkdir()
+    for stem, sids, color in (("hall", ("hall", "stairs"), "#112233"), ("garden", ("garden",), "#445566")):
+        scenes = []
+        for sid in sids:
+            scene = _scene(sid, f"bg/{sid}.png")
+            scene["layers"] += [
+                {"id": "tint", "type": "color", "color": color, "alpha": 0.3, "zorder": 1},
+                {"id": "frame", "type": "image", "image": "ui/frame.png", "zorder": 2},
+            ]
+            scene["hotspots"] = [
+                {"id": "h", "shape": "circle", "circle": {"cx": 0.5, "cy": 0.5, "r": 0.1}, "tooltip": sid,
+                 "hover_effect": {"highlight": True}, "action": {"type": "jump_label", "label": "x"}},
+            ]
+            scenes.append(scene)
+        (indir / f"{stem}.json").write_text(json.dumps(_project(*scenes)), encoding="utf-8")
+    out = tmp_path / "out"
+    assert cli.main(["--in", str(indir), "--out-dir", str(out), "--jobs", str(jobs)]) == 0
+
+    texts = {p.name: p.read_text(encoding="utf-8") for p in (out / "_gen").glob("*.rpy")}
+    assert sorted(n for n in texts if n.startswith("scene_helpers")) == [
+        "scene_helpers.rpy", f"scene_helpers_{input_key(indir / 'garden.json')}.rpy",
+        f"scene_helpers_{input_key(indir / 'hall.json')}.rpy",
+    ]
+    everything = "".join(texts.values())
+    assert everything.count("label scene__internal__go:") == 1
+    defined = set(re.findall(r"^\s*(?:define )?(scene_\w+) = ", everything, re.M))
+    for sid in ("hall", "stairs", "garden"):
+        screen = texts[f"scene_{sid}.rpy"]
+        used = set(re.findall(r"\b(scene_(?:solid|static)_\w+|scene_\w+_hitmask_\d+)\b", screen))
+        assert used and used <= defined, sid
+        assert f'"{sid}": "show_{sid}",' in everything
+
+
+def test_scene_index_drives_dispatch_prediction_and_dangling_check(tmp_path, caplog):
+    one, two, three = _scene("one", "bg/1.png"), _scene("two", "bg/2.png"), _scene("three")
+    two["layers"][0]["variants"] = [{"if": "night", "image": "bg/2n.png"}]
+    one["hotspots"] = [
+        {"id": f"h{k}", "shape": "rect", "rect": {"x": 0.0, "y": 0.0, "w": 0.1, "h": 0.1},
+         "action": {"type": "go_scene", "scene_id": target}}
+        for k, target in enumerate(["two", "one", "two"])
+    ]
+    files = generate_rpy(validate(_project(one, two, three)))
+    assert "jump expression scene_labels[_sc]" in files["_gen/scene_helpers.rpy"]
+    tables = files["_gen/scene_helpers_scenes.rpy"]
+    assert '        "three": "show_three",\n' in tables
+    assert '        "one": ("bg/2n.png", "bg/2.png",),\n' in tables
+    assert '"two": (' not in tables
+    assert 'on "show" action Function(scene_predict_neighbours, "one")' in files["_gen/scene_one.rpy"]
+    assert "scene_predict_neighbours" not in files["_gen/scene_two.rpy"]
+
+    # "four" may live in another input sharing the output dir
+    three["hotspots"] = [dict(one["hotspots"][0], action={"type": "go_scene", "scene_id": "four"})]
+    message = "scenes[2].hotspots[0].action.scene_id: unknown scene 'four' (must come from another input)"
+    validate(_project(one, two, three))
+    assert caplog.messages == [message]
+    caplog.clear()
+    src = tmp_path / "scenes.json"
+    src.write_text(json.dumps(_project(one, two, three)), encoding="utf-8")
+    assert [sc.id for sc in validate_stream(SceneStream(src))] == ["one", "two", "three"]
+    assert caplog.messages == [message]
+
+
+def test_watcher_debounces_bursts(tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text("{}", encoding="utf-8")
+    now = [0.0]
+    watcher = Watcher(lambda: [src], debounce=0.05, clock=lambda: now[0])
+    assert watcher.prime() == [src]
+    assert watcher.poll() == []
+    for size in range(3):  # a burst of saves
+        src.write_text("{}" + " " * (size + 1), encoding="utf-8")
+        now[0] += 0.02
+        assert watcher.poll() == []
+    now[0] += 0.05
+    assert watcher.poll() == [(src, 0.06)]
+    assert watcher.poll() == []
+
+
+def test_cli_watch_revalidates_only_changed_scenes(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    src = tmp_path / "a.json"
+    src.write_text(json.dumps(_project(_scene("one"), _scene("two"))), encoding="utf-8")
+    out = tmp_path / "out"
+
+    def run(self, on_change, interval=0, stop=None):
+        src.write_text("{", encoding="utf-8")  # a half-written save
+        assert on_change(src, 0.0) == 4
+        src.write_text(json.dumps(_project(_scene("one"), _scene("two", "bg/new.png"))), encoding="utf-8")
+        assert on_change(src, 0.0) == 0
+
+    monkeypatch.setattr(Watcher, "run", run)
+    with caplog.at_level("INFO"):
+        assert cli.main(["--in", str(src), "--out-dir", str(out), "--watch"]) == 0
+    cycles = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Cycle")]
+    assert "2/2 scenes revalidated, 4 files written" in cycles[0]
+    assert "1/2 scenes revalidated, 1 files written" in cycles[1]
+    assert "bg/new.png" in (out / "_gen/scene_two.rpy").read_text(encoding="utf-8")
+
+
+def test_server_session_over_stdio(tmp_path):
+    import io
+
+    src = tmp_path / "a.json"
+    src.write_text(json.dumps(_project(_scene("one"), _scene("two"))), encoding="utf-8")
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "validate", "params": {"path": str(src)}},
+        {"jsonrpc": "2.0", "id": 2, "method": "nope"},
+        {"jsonrpc": "2.0", "method": "validate", "params": {"path": str(src)}},  # notification
+    ]
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests) + "{oops\n")
+    stdout = io.StringIO()
+    session = server.Session()
+    server.serve_stdio(session, threads=2, stdin=stdin, stdout=stdout)
+    responses = {r["id"]: r for r in map(json.loads, stdout.getvalue().splitlines())}
+    assert responses[1]["result"]["scenes"] == ["one", "two"]
+    assert responses[2]["error"]["code"] == server.METHOD_NOT_FOUND
+    assert responses[None]["error"]["code"] == server.PARSE_ERROR
+
+    first = session.generate_scene({"scene_id": "two"})
+    assert first["file"] == "_gen/scene_two.rpy" and "screen scene_two():" in first["content"]
+    data = _project(_scene("one", "bg/new.png"), _scene("two"))
+    assert session.validate({"data": data})["revalidated"] == 1
+    assert session.generate_scene({"scene_id": "two"})["content"] is first["content"]
+
+    data = json.loads(json.dumps(data))  # the cache keeps the raw dicts it saw
+    data["scenes"][0]["hotspots"] = [{"id": "h", "shape": "rect", "action": {"type": "go_scene"},
+                                       "rect": {"x": 0, "y": 0, "w": 0.1, "h": 0.1}}]
+    response = json.loads(session.handle(json.dumps(
+        {"jsonrpc": "2.0", "id": 3, "method": "generate_project", "params": {"data": data}}
+    )))
+    assert response["error"]["code"] == server.VALIDATION_ERROR
+    for bad in (123, None):
+        response = json.loads(session.handle(json.dumps(
+            {"jsonrpc": "2.0", "id": 4, "method": "generate_project", "params": {"out_dir": bad}}
+        )))
+        assert response["error"]["code"] == server.INVALID_PARAMS
+    out = tmp_path / "out"
+    assert session.generate_project({"out_dir": str(out)}) == {"written": 4, "identical": 0, "removed": 0}
+    assert (out / "_gen/scene_one.rpy").exists()
+
+
+def test_server_writes_outside_session_lock_with_cli_manifest(tmp_path, monkeypatch, caplog):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    src = tmp_path / "a.json"
+    src.write_text(json.dumps(_project(_scene("one"), _scene("two"))), encoding="utf-8")
+    out = tmp_path / "out"
+    session = server.Session()
+    session.validate({"path": str(src)})
+    entered, release = threading.Event(), threading.Event()
+    real_write = server.write_files
+
+    def slow_write(*args):
+        entered.set()
+        release.wait(5)
+        return real_write(*args)
+
+    monkeypatch.setattr(server, "write_files", slow_write)
+    with ThreadPoolExecutor(2) as pool:
+        writing = pool.submit(session.generate_project, {"out_dir": str(out)})
+        assert entered.wait(5)
+        # other requests go through while the project is being written
+        other = pool.submit(session.validate, {"data": _project(_scene("three"))})
+        assert other.result(timeout=2) == {"scenes": ["three"], "revalidated": 1}
+        release.set()
+        assert writing.result()["written"] == 4
+    assert (out / f"_gen/scene_helpers_{input_key(src)}.rpy").exists()
+
+    # the CLI finds the server's manifest for the same input
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    caplog.set_level("INFO")
+    assert cli.main(["--in", str(src), "--out-dir", str(out)]) == 0
+    assert "0 written, 0 identical, 4 unchanged, 0 removed" in caplog.text
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_cli_profile_report(tmp_path, monkeypatch, stream):
+    monkeypatch.setattr(cli, "_setup_logging", lambda log_file=None: tmp_path / "run.log")
+    scene = _scene("one")
+    scene["layers"].append({"id": "g", "type": "group", "zorder": 1, "children": [
+        {"id": "i", "type": "image", "image": "ui/i.png", "zorder": 0}]})
+    src = tmp_path / "a.json"
+    src.write_text(json.dumps(_project(scene, _scene("two"))), encoding="utf-8")
+    report = tmp_path / "profile.json"
+    argv = ["--in", str(src), "--out-dir", str(tmp_path / "out"), "--profile", str(report), "--profile-memory"]
+    assert cli.main(argv + ["--stream"] * stream) == 0
+
+    (run,) = json.loads(report.read_text(encoding="utf-8"))["inputs"]
+    phases = {p["name"]: p for p in run["phases"]}
+    assert {"read", "validate", "generate", "write"} <= set(phases)
+    assert all(p["wall_ms"] >= 0 and p["peak_kib"] > 0 for p in phases.values())
+    assert [(s["id"], s["layers"], s["rendered"]) for s in run["scenes"]] == [("one", 3, True), ("two", 1, True)]
+    assert run["totals"]["bytes"] == sum(s["bytes"] for s in run["scenes"]) > 0
+
+    csv_report = tmp_path / "profile.csv"
+    assert cli.main(argv[:-2] + [str(csv_report)]) == 0
+    rows = csv_report.read_text(encoding="utf-8").splitlines()
+    assert rows[0].startswith("input,kind,name,wall_ms")
+    assert any(",scene,two," in row and row.endswith(",False") for row in rows)  # unchanged: not rendered